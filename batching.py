@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+class InferenceBatcher:
+    """Batch predictions from many sessions into one forward pass of a shared model.
+
+    Sessions await predict(); requests are collected until max_batch are
+    pending or window seconds have passed since the first one, then the whole
+    batch goes through CompiledMLP.forward_batch and each session gets its own
+    command back. window=0 batches whatever was queued during one pass of the
+    event loop without waiting. A larger window and max_batch give bigger
+    batches (more throughput) at the cost of up to window seconds of latency.
+    Frames can name the model to predict with (a session's Bot.ml_model, which
+    changes when the bot swaps models); a batch is split into one forward pass
+    per model. Must be used from a single event loop.
+    """
+
+    def __init__(self, ml_model, window=0.001, max_batch=32):
+        self.ml_model = ml_model
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.predictions = 0
+        self.max_batch_seen = 0
+        self._pending = []
+        self._timer = None
+
+    async def predict(self, game_state, prev_commands, ml_model=None):
+        """Queue one frame and wait for its predicted command (ml_model defaults to self.ml_model)"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((ml_model or self.ml_model, game_state, prev_commands, future))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            if self.window > 0:
+                self._timer = loop.call_later(self.window, self.flush)
+            else:
+                self._timer = loop.call_soon(self.flush)
+        return await future
+
+    def flush(self):
+        """Run the pending frames as one batch and resolve their futures"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        by_model = {}
+        for request in pending:
+            by_model.setdefault(id(request[0]), []).append(request)
+        for requests in by_model.values():
+            try:
+                self._run_batch(requests)
+            except Exception as e:
+                # Fail the waiting sessions instead of leaving them blocked forever
+                for _, _, _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+
+        self.batches += 1
+        self.predictions += len(pending)
+        self.max_batch_seen = max(self.max_batch_seen, len(pending))
+
+    def _run_batch(self, requests):
+        """One forward pass over frames that share a model; resolves their futures"""
+        ml_model = requests[0][0]
+        if ml_model.engine is None:
+            ml_model.compile()
+        engine = ml_model.engine
+        telemetry = ml_model.telemetry
+        start = time.perf_counter()
+        frames = [(game_state, prev_commands) for _, game_state, prev_commands, _ in requests]
+        probabilities = engine.forward_batch(engine.batch_features(frames))
+        predicted = probabilities.argmax(axis=1)
+        batch_time = time.perf_counter() - start
+
+        for row, (_, game_state, _, future), idx in zip(probabilities, requests, predicted):
+            idx = int(idx)
+            if telemetry.level:
+                # Every frame in the batch is charged its share of the batch time
+                telemetry.record(batch_time / len(requests), row, idx, game_state)
+            predicted_cmd = engine.commands[idx]
+            # Fallback to neutral if prediction is invalid (as in GameMLP.predict)
+            if predicted_cmd not in ml_model.command_mapping:
+                predicted_cmd = "neutral"
+            if not future.done():
+                future.set_result(predicted_cmd)
+
+    def stats(self):
+        """Batch counters"""
+        return {
+            'batches': self.batches,
+            'predictions': self.predictions,
+            'mean_batch': self.predictions / self.batches if self.batches else 0.0,
+            'max_batch': self.max_batch_seen,
+        }
@@ -0,0 +1,824 @@
+import argparse
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from ml_model import GameMLP, build_feature_matrix, build_history_indices, build_numeric_block
+from game_state import GameState
+from data_collector import GameDataCollector, BufferedCSVWriter
+from frame_store import FrameStore, FrameStoreWriter, convert_csv
+from fake_emulator import FakeEmulator, synthetic_state_dict
+from scheduler import FrameScheduler
+
+# Commands the bot issues, used to fill synthetic training frames
+BENCH_COMMANDS = [
+    "neutral", ">", "<", "^", "v", "v+>", "v+<", "v+R", "<+Y", ">+Y",
+    ">+^+B", "<+^+B", "!>", "!<", "!v", "!v+!>", "!v+!<", "!v+!R"
+]
+
+def synthetic_training_frame(n_rows, seed=0, commands=None):
+    """Build a DataFrame with the same columns as training_data.csv (commands default to BENCH_COMMANDS)"""
+    rng = np.random.default_rng(seed)
+    p1_x = rng.integers(0, 400, n_rows)
+    p1_y = rng.integers(150, 200, n_rows)
+    p2_x = rng.integers(0, 400, n_rows)
+    p2_y = rng.integers(150, 200, n_rows)
+    commands = np.array(commands or BENCH_COMMANDS, dtype=object)
+    history = [commands[rng.integers(0, len(commands), n_rows)] for _ in range(4)]
+    # Early frames have no command history yet
+    for i, column in enumerate(history[1:]):
+        column[:i + 1] = None
+    return pd.DataFrame({
+        'timer': rng.integers(0, 100, n_rows),
+        'player1_x': p1_x,
+        'player1_y': p1_y,
+        'player1_health': rng.integers(0, 177, n_rows),
+        'player1_prev_health': rng.integers(0, 177, n_rows),
+        'player2_x': p2_x,
+        'player2_y': p2_y,
+        'player2_health': rng.integers(0, 177, n_rows),
+        'player2_prev_health': rng.integers(0, 177, n_rows),
+        'distance': np.sqrt((p1_x - p2_x) ** 2 + (p1_y - p2_y) ** 2),
+        'relative_x': p2_x - p1_x,
+        'relative_y': p2_y - p1_y,
+        'current_command': pd.Series(history[0], dtype=object),
+        'prev_command': pd.Series(history[1], dtype=object),
+        'prev2_command': pd.Series(history[2], dtype=object),
+        'prev3_command': pd.Series(history[3], dtype=object),
+        'damage_dealt': rng.integers(0, 10, n_rows),
+        'damage_taken': rng.integers(0, 10, n_rows),
+        'command_duration': rng.integers(0, 5, n_rows),
+    })
+
+def legacy_feature_loop(df, command_mapping):
+    """The original per-row df.iloc feature loop from GameMLP.train, kept as a reference"""
+    X = []
+    for i in range(len(df)):
+        features = [
+            df.iloc[i]['player1_x'],
+            df.iloc[i]['player1_y'],
+            df.iloc[i]['player1_health'],
+            df.iloc[i]['player2_x'],
+            df.iloc[i]['player2_y'],
+            df.iloc[i]['player2_health'],
+            df.iloc[i]['timer'],
+            df.iloc[i]['relative_x'],
+            df.iloc[i]['relative_y'],
+            df.iloc[i]['distance']
+        ]
+        if 'player1_x_velocity' in df.columns:
+            features.extend([
+                df.iloc[i]['player1_x_velocity'],
+                df.iloc[i]['player1_y_velocity'],
+                df.iloc[i]['player2_x_velocity'],
+                df.iloc[i]['player2_y_velocity']
+            ])
+        else:
+            features.extend([0, 0, 0, 0])
+        for cmd in [df.iloc[i]['prev_command'], df.iloc[i]['prev2_command'], df.iloc[i]['prev3_command']]:
+            if cmd in command_mapping:
+                cmd_features = [0] * len(command_mapping)
+                cmd_features[command_mapping[cmd]] = 1
+                features.extend(cmd_features)
+            else:
+                features.extend([0] * len(command_mapping))
+        X.append(features)
+    return np.array(X)
+
+def benchmark_features(rows):
+    """Compare the legacy feature loop with the columnar feature builder"""
+    # Round-trip through CSV so dtypes (and missing history) match a real training file
+    df = synthetic_training_frame(rows)
+    df = pd.read_csv(io.StringIO(df.to_csv(index=False)))
+    command_mapping = {cmd: idx for idx, cmd in enumerate(sorted(set(df['current_command'].unique())))}
+
+    start = time.perf_counter()
+    legacy = legacy_feature_loop(df, command_mapping)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnar = build_feature_matrix(df, command_mapping)
+    columnar_time = time.perf_counter() - start
+
+    identical = legacy.dtype == columnar.dtype and np.array_equal(legacy, columnar, equal_nan=True)
+    print(f"Feature matrix shape: {columnar.shape}, bit-identical: {identical}")
+    print(f"Legacy loop:      {rows / legacy_time:12.0f} rows/s ({legacy_time:.3f}s)")
+    print(f"Columnar builder: {rows / columnar_time:12.0f} rows/s ({columnar_time:.3f}s)")
+    print(f"Speedup: {legacy_time / columnar_time:.1f}x")
+
+def synthetic_game_states(n_frames, seed=0):
+    """Parsed GameState objects for a stream of synthetic frames"""
+    rng = np.random.default_rng(seed)
+    return [GameState(synthetic_state_dict(rng)) for _ in range(n_frames)]
+
+def trained_bench_model(rows=2000, hidden_layer_sizes=(128, 64, 32), max_iter=20, commands=None):
+    """Train a GameMLP in memory on synthetic frames (nothing is written to disk)"""
+    from sklearn.neural_network import MLPClassifier
+    df = synthetic_training_frame(rows, commands=commands)
+    game_model = GameMLP()
+    game_model.command_mapping = {cmd: idx for idx, cmd in enumerate(sorted(set(df['current_command'])))}
+    game_model.scaler.fit(build_numeric_block(df))
+    X = game_model.frame_features(df)
+    y = df['current_command'].map(game_model.command_mapping).to_numpy()
+    game_model.model = MLPClassifier(hidden_layer_sizes=hidden_layer_sizes, max_iter=max_iter, random_state=42)
+    with warnings.catch_warnings():
+        # A short training run is enough for timing; convergence doesn't matter here
+        warnings.simplefilter('ignore')
+        game_model.model.fit(X, y)
+    game_model.compile()
+    game_model.is_trained = True
+    return game_model
+
+def latency_summary(samples):
+    """p50/p99 latency (microseconds) of a list of perf_counter durations"""
+    samples = np.array(samples) * 1e6
+    return f"p50 {np.percentile(samples, 50):8.1f}us  p99 {np.percentile(samples, 99):8.1f}us"
+
+def benchmark_inference(rows):
+    """Per-call latency of sklearn predict_proba versus the compiled engine"""
+    game_model = trained_bench_model()
+    engine = game_model.engine
+    states = synthetic_game_states(rows)
+    commands = BENCH_COMMANDS + [None]
+    history = [[commands[(i + k) % len(commands)] for k in range(3)] for i in range(rows)]
+
+    sklearn_times = []
+    max_diff = 0.0
+    for state, prev_commands in zip(states, history):
+        start = time.perf_counter()
+        features = game_model.scale_features(game_model.prepare_features(state, prev_commands))
+        expected = game_model.model.predict_proba(features)[0]
+        reverse_mapping = {v: k for k, v in game_model.command_mapping.items()}
+        reverse_mapping[int(np.argmax(expected))]
+        sklearn_times.append(time.perf_counter() - start)
+        max_diff = max(max_diff, np.abs(engine.predict_proba(state, prev_commands) - expected).max())
+
+    compiled_times = []
+    for state, prev_commands in zip(states, history):
+        start = time.perf_counter()
+        engine.predict(state, prev_commands)
+        compiled_times.append(time.perf_counter() - start)
+
+    print(f"Max |compiled - predict_proba|: {max_diff:.2e}")
+    print(f"sklearn predict_proba: {latency_summary(sklearn_times)}")
+    print(f"CompiledMLP:           {latency_summary(compiled_times)}")
+
+class LegacyButtons:
+    """The original Buttons: one attribute per button, rebuilt into a dict for every send"""
+
+    KEYS = [('up', 'Up'), ('down', 'Down'), ('right', 'Right'), ('left', 'Left'), ('select', 'Select'),
+            ('start', 'Start'), ('Y', 'Y'), ('B', 'B'), ('X', 'X'), ('A', 'A'), ('L', 'L'), ('R', 'R')]
+
+    def __init__(self, buttons_dict=None):
+        for attribute, key in self.KEYS:
+            setattr(self, attribute, buttons_dict[key] if buttons_dict is not None else False)
+
+    def object_to_dict(self):
+        return {key: getattr(self, attribute) for attribute, key in self.KEYS}
+
+class LegacyPlayer:
+    """The original Player (instance __dict__, no slots)"""
+
+    def __init__(self, player_dict):
+        self.player_id = player_dict['character']
+        self.health = player_dict['health']
+        self.x_coord = player_dict['x']
+        self.y_coord = player_dict['y']
+        self.is_jumping = player_dict['jumping']
+        self.is_crouching = player_dict['crouching']
+        self.player_buttons = LegacyButtons(player_dict['buttons'])
+        self.is_player_in_move = player_dict['in_move']
+        self.move_id = player_dict['move']
+
+class LegacyGameState:
+    """The original GameState (instance __dict__, no slots)"""
+
+    def __init__(self, input_dict):
+        self.player1 = LegacyPlayer(input_dict['p1'])
+        self.player2 = LegacyPlayer(input_dict['p2'])
+        self.timer = input_dict['timer']
+        self.fight_result = input_dict['result']
+        self.has_round_started = input_dict['round_started']
+        self.is_round_over = input_dict['round_over']
+
+def legacy_command_dict(p1_buttons, p2_buttons):
+    """The original Command.object_to_dict"""
+    return {'p1': p1_buttons.object_to_dict(), 'p2': p2_buttons.object_to_dict(),
+            'type': 'buttons', 'player_count': 2, 'savegamepath': ''}
+
+def time_per_call(function, items):
+    """Mean microseconds per call of function over items"""
+    start = time.perf_counter()
+    for item in items:
+        function(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+def benchmark_objects(rows):
+    """Per-frame parse+build of GameState and Command serialization, original classes versus slots/bitmask"""
+    import json
+    import tracemalloc
+    from buttons import BUTTON_FIELDS
+    from command import Command
+
+    rng = np.random.default_rng(0)
+    payloads = [json.dumps(synthetic_state_dict(rng)).encode() for _ in range(rows)]
+    legacy_build = time_per_call(lambda payload: LegacyGameState(json.loads(payload)), payloads)
+    build = time_per_call(lambda payload: GameState(json.loads(payload)), payloads)
+    parse_only = time_per_call(json.loads, payloads)
+
+    def retained_bytes(cls):
+        dicts = [json.loads(payload) for payload in payloads[:1000]]
+        tracemalloc.start()
+        states = [cls(d) for d in dicts]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size / len(states)
+
+    # The bot presses a small set of button combinations
+    masks = [int(mask) for mask in rng.choice([0, 1, 2, 4, 8, 6, 10, 68, 132, 517, 1026], size=rows)]
+    commands = []
+    legacy_buttons = []
+    for mask in masks:
+        command = Command()
+        command.player_buttons.mask = mask
+        commands.append(command)
+        buttons = LegacyButtons()
+        for attribute, _, bit in BUTTON_FIELDS:
+            setattr(buttons, attribute, bool(mask & bit))
+        legacy_buttons.append(buttons)
+    idle = LegacyButtons()
+    legacy_send = time_per_call(lambda buttons: json.dumps(legacy_command_dict(buttons, idle)).encode(), legacy_buttons)
+    send = time_per_call(Command.to_bytes, commands)
+    identical = all(command.to_bytes() == json.dumps(legacy_command_dict(buttons, idle)).encode()
+                    for command, buttons in zip(commands, legacy_buttons))
+
+    print(f"json.loads alone:               {parse_only:7.2f}us/frame")
+    print(f"Parse+build, original classes:  {legacy_build:7.2f}us/frame ({retained_bytes(LegacyGameState):.0f} bytes/state)")
+    print(f"Parse+build, slots/bitmask:     {build:7.2f}us/frame ({retained_bytes(GameState):.0f} bytes/state)")
+    print(f"Serialize, object_to_dict+dumps: {legacy_send:6.2f}us/frame")
+    print(f"Serialize, Command.to_bytes:     {send:6.2f}us/frame (byte-identical: {identical})")
+
+# Button attribute for each command symbol, as in the original _press_button/_release_button chains
+LEGACY_COMMAND_BUTTONS = [("v", 'down'), ("<", 'left'), (">", 'right'), ("^", 'up'), ("A", 'A'),
+                          ("B", 'B'), ("Y", 'Y'), ("R", 'R'), ("L", 'L')]
+
+def legacy_set_button(buttons, btn, pressed):
+    """The original if/elif chain of _press_button/_release_button"""
+    for symbol, attribute in LEGACY_COMMAND_BUTTONS:
+        if btn == symbol:
+            setattr(buttons, attribute, pressed)
+            break
+
+def legacy_run_command(buttons, cmd):
+    """The original per-frame command execution: release nine buttons, then parse the command string"""
+    for symbol in ["v", "<", ">", "^", "A", "B", "Y", "R", "L"]:
+        legacy_set_button(buttons, symbol, False)
+    if "+" in cmd:
+        for btn in cmd.split("+"):
+            if btn.startswith("!"):
+                legacy_set_button(buttons, btn[1:], False)
+            else:
+                legacy_set_button(buttons, btn, True)
+    else:
+        if cmd.startswith("!"):
+            legacy_set_button(buttons, cmd[1:], False)
+        else:
+            legacy_set_button(buttons, cmd, True)
+
+def benchmark_commands(rows):
+    """run_command throughput: string parsing per frame versus the precompiled command table"""
+    from buttons import BUTTON_FIELDS, Buttons
+    from bot import Bot
+
+    rng = np.random.default_rng(0)
+    commands = [BENCH_COMMANDS[i] for i in rng.integers(0, len(BENCH_COMMANDS), size=rows)]
+    model = GameMLP()
+    model.command_mapping = {cmd: idx for idx, cmd in enumerate(BENCH_COMMANDS)}
+    bot = Bot(ml_model=model)
+
+    # Same resulting buttons from any starting state
+    matches = True
+    for cmd in BENCH_COMMANDS:
+        for start_mask in rng.integers(0, 1 << 12, size=50):
+            legacy = LegacyButtons()
+            for attribute, _, bit in BUTTON_FIELDS:
+                setattr(legacy, attribute, bool(start_mask & bit))
+            legacy_run_command(legacy, cmd)
+            bot.buttn = Buttons()
+            bot.buttn.mask = int(start_mask)
+            bot.run_command([cmd], None)
+            matches &= Buttons(legacy.object_to_dict()).mask == bot.buttn.mask
+
+    legacy = LegacyButtons()
+    start = time.perf_counter()
+    for cmd in commands:
+        legacy_run_command(legacy, cmd)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for cmd in commands:
+        bot.run_command([cmd], None)
+    compiled_time = time.perf_counter() - start
+
+    print(f"Same buttons as the original for every command: {matches}")
+    print(f"String parsing:   {rows / legacy_time:10.0f} commands/s ({legacy_time / rows * 1e6:.2f}us each)")
+    print(f"Compiled table:   {rows / compiled_time:10.0f} commands/s ({compiled_time / rows * 1e6:.2f}us each)")
+    print(f"Speedup: {legacy_time / compiled_time:.1f}x")
+
+class PerFrameCSVWriter:
+    """The original collector write path: open the CSV and build a DictWriter for every row"""
+
+    def __init__(self, path, headers):
+        self.path = path
+        self.headers = headers
+        self.rows_written = 0
+
+    def write_row(self, row):
+        with open(self.path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.headers)
+            writer.writerow(dict(zip(self.headers, row)))
+        self.rows_written += 1
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+def time_collector(collector, states, commands):
+    """Frames/second of collect_frame_data (including the final flush) and per-call latencies"""
+    call_times = []
+    start = time.perf_counter()
+    for state, command in zip(states, commands):
+        call_start = time.perf_counter()
+        collector.collect_frame_data(state, command)
+        call_times.append(time.perf_counter() - call_start)
+    collector.close()
+    return len(states) / (time.perf_counter() - start), call_times
+
+def benchmark_collector(rows):
+    """Frames/second of the per-frame CSV writer versus the buffered writer"""
+    states = synthetic_game_states(rows)
+    commands = [BENCH_COMMANDS[i // 4 % len(BENCH_COMMANDS)] for i in range(rows)]
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = GameDataCollector(csv_file='legacy.csv', data_dir=tmp)
+        legacy.writer.close()
+        legacy.writer = PerFrameCSVWriter(legacy.csv_file, legacy.headers)
+        legacy_fps, legacy_times = time_collector(legacy, states, commands)
+
+        buffered = GameDataCollector(csv_file='buffered.csv', data_dir=tmp)
+        buffered_fps, buffered_times = time_collector(buffered, states, commands)
+
+        background = GameDataCollector(csv_file='background.csv', data_dir=tmp, background=True)
+        background_fps, background_times = time_collector(background, states, commands)
+
+        with open(legacy.csv_file) as f1, open(buffered.csv_file) as f2, open(background.csv_file) as f3:
+            expected = f1.read()
+            identical = expected == f2.read() == f3.read()
+    print(f"Output files identical: {identical}")
+    print(f"Per-frame writer:  {legacy_fps:10.0f} frames/s  {latency_summary(legacy_times)}")
+    print(f"Buffered writer:   {buffered_fps:10.0f} frames/s  {latency_summary(buffered_times)}")
+    print(f"Background writer: {background_fps:10.0f} frames/s  {latency_summary(background_times)}")
+    print(f"Background queue: {background.queue_metrics()}")
+
+def benchmark_simulator(rows):
+    """Synthetic data generation: the per-frame generator versus the NumPy batch simulator"""
+    import random
+    from generate_game_data import _simulate_match, simulate_matches
+
+    start = time.perf_counter()
+    scalar = pd.DataFrame(list(_simulate_match(random.Random(0), rows)))
+    scalar_time = time.perf_counter() - start
+    print(f"Per-frame generator ({rows} frames):  {rows / scalar_time:12.0f} frames/s")
+
+    match_frames = 1000
+    for n_matches in (64, 1024, 4096):
+        start = time.perf_counter()
+        columns = simulate_matches(np.random.default_rng(0), n_matches, match_frames)
+        vector_time = time.perf_counter() - start
+        n = n_matches * match_frames
+        print(f"Batch simulator ({n_matches:4d} matches x {match_frames}): {n / vector_time:12.0f} frames/s "
+              f"({scalar_time / rows / (vector_time / n):.0f}x)")
+    vector = pd.DataFrame(columns)
+    print(f"Same columns: {list(scalar.columns) == list(vector.columns)}, "
+          f"button press rates (per-frame / batch): "
+          + ", ".join(f"{name} {scalar[name].mean():.3f}/{vector[name].mean():.3f}"
+                      for name in ('p1_up', 'p1_down', 'p1_right', 'p1_left', 'p1_R')))
+
+def benchmark_storage(rows):
+    """Write and read throughput of the CSV format versus the columnar frame store"""
+    df = synthetic_training_frame(rows)
+    headers = list(df.columns)
+    records = list(df.itertuples(index=False, name=None))
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = f"{tmp}/frames.csv"
+        store_path = f"{tmp}/frames.frames"
+
+        start = time.perf_counter()
+        writer = BufferedCSVWriter(csv_path, headers)
+        for record in records:
+            writer.write_row(record)
+        writer.close()
+        csv_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        writer = FrameStoreWriter(store_path, headers)
+        for record in records:
+            writer.write_row(record)
+        writer.close()
+        store_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        from_csv = pd.read_csv(csv_path)
+        csv_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        from_store = FrameStore(store_path).to_dataframe()
+        store_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store = FrameStore(store_path)
+        for name in store.columns:
+            store.column(name).sum()
+        mmap_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        convert_csv(csv_path, f"{tmp}/converted.frames")
+        convert_time = time.perf_counter() - start
+
+        # Written back out as CSV, the frame store contents must match the original file
+        with open(csv_path) as f:
+            same = from_store.to_csv(index=False) == f.read()
+        csv_size = os.path.getsize(csv_path)
+        store_size = sum(os.path.getsize(f"{store_path}/{name}") for name in os.listdir(store_path))
+
+    print(f"Frame store matches CSV: {same}")
+    print(f"Size: CSV {csv_size / 1e6:.1f} MB, frame store {store_size / 1e6:.1f} MB")
+    print(f"Write (row by row): CSV {rows / csv_write:10.0f} rows/s, frame store {rows / store_write:10.0f} rows/s")
+    print(f"Read to DataFrame:  CSV {rows / csv_read:10.0f} rows/s, frame store {rows / store_read:10.0f} rows/s")
+    print(f"Memory-mapped column scan: {rows / mmap_read:10.0f} rows/s")
+    print(f"CSV -> frame store conversion: {rows / convert_time:10.0f} rows/s")
+
+TRAINING_SCRIPT = """
+import sys, time
+sys.path.insert(0, {repo!r})
+from ml_model import GameMLP, peak_rss_mb
+model = GameMLP()
+model.model.set_params(max_iter=5, verbose=False)
+start = time.perf_counter()
+if {stream!r}:
+    model.train_streaming({data!r}, chunk_size=20000, epochs=1)
+else:
+    model.train({data!r})
+print('RESULT', time.perf_counter() - start, peak_rss_mb())
+"""
+
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {repo!r})
+from bot import Bot
+bot = Bot()
+elapsed = time.perf_counter() - start
+heavy = [name for name in ('pandas', 'sklearn', 'scipy', 'joblib') if name in sys.modules]
+print('RESULT', elapsed, ','.join(heavy) or '-')
+"""
+
+def benchmark_startup(rows):
+    """Bot() startup time loading the compact .npz export versus the joblib files"""
+    from ml_model import MODEL_EXPORT
+    repo = os.path.dirname(os.path.abspath(__file__))
+    model = trained_bench_model(rows=min(rows, 5000))
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            model.save_model()
+        finally:
+            os.chdir(cwd)
+        export_size = os.path.getsize(os.path.join(tmp, MODEL_EXPORT))
+        joblib_size = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp)
+                          if name.endswith('.joblib'))
+        print(f"Model files: {MODEL_EXPORT} {export_size / 1024:.0f} KB, joblib files {joblib_size / 1024:.0f} KB")
+
+        script = STARTUP_SCRIPT.format(repo=repo)
+        for label in ("compact .npz", "joblib"):
+            if label == "joblib":
+                os.remove(os.path.join(tmp, MODEL_EXPORT))
+            times = []
+            wall = []
+            for _ in range(5):
+                # A fresh interpreter each time, like a restarted worker
+                start = time.perf_counter()
+                output = subprocess.run([sys.executable, '-c', script], cwd=tmp, capture_output=True,
+                                        text=True, check=True).stdout
+                wall.append(time.perf_counter() - start)
+                _, seconds, heavy = output.strip().splitlines()[-1].split()
+                times.append(float(seconds))
+            print(f"{label:13s} imports+Bot(): median {np.median(times) * 1e3:7.1f}ms, "
+                  f"process wall {np.median(wall) * 1e3:7.1f}ms, heavy modules loaded: {heavy}")
+
+def benchmark_training_memory(rows):
+    """Peak RSS of full in-memory training versus streaming partial_fit training"""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = f"{tmp}/frames.frames"
+        writer = FrameStoreWriter(store_path, list(synthetic_training_frame(1).columns))
+        for start in range(0, rows, 100000):
+            writer.append_columns(synthetic_training_frame(min(100000, rows - start), seed=start))
+        writer.close()
+
+        for label, stream in [("Full train()", False), ("train_streaming()", True)]:
+            script = TRAINING_SCRIPT.format(repo=repo, stream=stream, data=store_path)
+            # Each mode runs in its own process so peak RSS isn't shared; cwd keeps joblib files in tmp
+            output = subprocess.run([sys.executable, '-c', script], cwd=tmp, capture_output=True,
+                                    text=True, check=True).stdout
+            _, seconds, rss = output.strip().splitlines()[-1].split()
+            print(f"{label:18s} {rows} rows: {float(seconds):7.1f}s, peak RSS {float(rss):8.1f} MB")
+
+def benchmark_batching(rows):
+    """Cross-session micro-batching: throughput and latency for several batch windows and sizes"""
+    import asyncio
+    from batching import InferenceBatcher
+
+    model = trained_bench_model()
+    engine = model.engine
+    n_sessions = 32
+    per_session = max(rows // n_sessions, 1)
+    states = synthetic_game_states(n_sessions * per_session)
+    history = [[BENCH_COMMANDS[i % 7], BENCH_COMMANDS[i % 5], None] for i in range(len(states))]
+
+    frames = list(zip(states[:256], history[:256]))
+    batched = engine.forward_batch(engine.batch_features(frames))
+    single = np.array([engine.predict_proba(state, prev).copy() for state, prev in frames])
+    print(f"Max |batched - single-frame|: {np.abs(batched - single).max():.2e}")
+
+    async def run_sessions(predict, fps=None, frames_per_session=per_session):
+        latencies = []
+
+        async def session(i):
+            # Sessions start at staggered offsets within a frame, like independent emulators
+            if fps:
+                await asyncio.sleep(i / n_sessions / fps)
+            for j in range(i * per_session, i * per_session + frames_per_session):
+                start = time.perf_counter()
+                await predict(states[j], history[j])
+                latencies.append(time.perf_counter() - start)
+                if fps:
+                    await asyncio.sleep(max(1 / fps - (time.perf_counter() - start), 0))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(session(i) for i in range(n_sessions)))
+        return time.perf_counter() - start, latencies
+
+    async def unbatched(game_state, prev_commands):
+        # Yield like a session waiting on its socket would
+        await asyncio.sleep(0)
+        return model.predict(game_state, prev_commands)
+
+    print(f"{n_sessions} sessions, {per_session} frames each")
+    elapsed, latencies = asyncio.run(run_sessions(unbatched))
+    print(f"Unbatched:                 {len(latencies) / elapsed:8.0f} predictions/s  {latency_summary(latencies)}")
+    for window, max_batch in [(0, 8), (0, 32), (0.0005, 32), (0.002, 32), (0.002, 64)]:
+        batcher = InferenceBatcher(model, window, max_batch)
+        elapsed, latencies = asyncio.run(run_sessions(batcher.predict))
+        stats = batcher.stats()
+        print(f"window {window * 1e3:4.1f}ms max {max_batch:3d}: {len(latencies) / elapsed:8.0f} predictions/s  "
+              f"{latency_summary(latencies)}  mean batch {stats['mean_batch']:5.1f}")
+
+    paced_frames = min(per_session, 120)
+    print(f"\n{n_sessions} sessions paced at 60 fps, {paced_frames} frames each")
+    elapsed, latencies = asyncio.run(run_sessions(unbatched, 60, paced_frames))
+    print(f"Unbatched:                 {latency_summary(latencies)}")
+    for window, max_batch in [(0, 32), (0.001, 32), (0.004, 32)]:
+        batcher = InferenceBatcher(model, window, max_batch)
+        elapsed, latencies = asyncio.run(run_sessions(batcher.predict, 60, paced_frames))
+        print(f"window {window * 1e3:4.1f}ms max {max_batch:3d}: {latency_summary(latencies)}  "
+              f"mean batch {batcher.stats()['mean_batch']:5.1f}")
+
+def run_protocol_session(model, framing, chunking, fps, frames, scheduler):
+    """Serve one fake emulator session with the controller game loop; returns (emulator stats, reader)"""
+    import socket
+    import threading
+    from bot import Bot
+    from controller import game_loop
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+    with tempfile.TemporaryDirectory() as tmp:
+        collector = GameDataCollector(data_dir=tmp)
+        result = {}
+
+        def serve():
+            conn, _ = server.accept()
+            result['reader'] = game_loop(conn, Bot(ml_model=model), collector, framing, scheduler)
+            conn.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        stats = FakeEmulator(port=port, framing=framing, fps=fps, frames=frames, chunking=chunking).run()
+        thread.join()
+        collector.close()
+    server.close()
+    return stats, result['reader']
+
+def benchmark_protocol(rows):
+    """Run the controller game loop against the fake emulator with each framing and chunking"""
+    model = trained_bench_model()
+    print("Unthrottled emulator (the loop answers the newest state and skips the rest):")
+    for framing in ('json', 'newline', 'length'):
+        for chunking in (None, 'split', 'coalesce'):
+            stats, reader = run_protocol_session(model, framing, chunking, 0, rows, FrameScheduler())
+            print(f"{framing:8s} {str(chunking):9s} sent {stats['frames_sent']:6d} at {stats['send_fps']:9.0f} fps, "
+                  f"parsed {reader.messages_received:6d}, skipped stale {reader.messages_skipped:6d}, "
+                  f"decode errors {reader.decoder.decode_errors}, replies {stats['replies']}")
+
+    fps = 600
+    frames = min(rows, 3000)
+    print(f"\nEmulator paced at {fps} fps ({frames} frames):")
+    scheduler = FrameScheduler()
+    stats, reader = run_protocol_session(model, 'json', None, fps, frames, scheduler)
+    print(f"Replies: {stats['replies']} of {frames}, skipped stale {reader.messages_skipped}")
+    print(scheduler.report())
+
+def run_fake_client(port, frames, seed):
+    """One fake emulator session at 60 fps (run in a worker process)"""
+    return FakeEmulator(port=port, fps=60, frames=frames, seed=seed).run()
+
+def benchmark_server(rows):
+    """Load test: N fake emulators at 60 fps against one asyncio server sharing a model"""
+    from concurrent.futures import ProcessPoolExecutor
+    from server import BotServer
+
+    model = trained_bench_model()
+    frames = min(rows, 600)
+    for n_clients in (1, 4, 16, 32):
+        with tempfile.TemporaryDirectory() as tmp:
+            server = BotServer(model, port=0, data_dir=tmp)
+            port = server.start_in_thread()
+            # Clients run in their own processes so they don't compete with the server for the GIL
+            with ProcessPoolExecutor(n_clients) as pool:
+                start = time.perf_counter()
+                results = list(pool.map(run_fake_client, [port] * n_clients, [frames] * n_clients,
+                                        range(n_clients)))
+                elapsed = time.perf_counter() - start
+            server.stop()
+            server.join()
+            rows_collected = sum(len(pd.read_csv(os.path.join(tmp, name)))
+                                 for name in os.listdir(tmp) if name.endswith('.csv'))
+        sent = sum(result['frames_sent'] for result in results)
+        replies = sum(result['replies'] for result in results)
+        print(f"{n_clients:3d} clients: {sent} states sent, {replies} replies ({replies / sent:.1%}), "
+              f"{server.frames / elapsed:7.0f} frames/s served, {rows_collected} rows collected")
+
+def benchmark_feature_cache(rows):
+    """Preparing training features: parsing the CSV every time versus the feature cache"""
+    from feature_cache import FeatureCache
+    from frame_store import load_frames
+    df = synthetic_training_frame(rows)
+    tail = rows // 10
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'frames.csv')
+        df.iloc[:rows - tail].to_csv(path, index=False)
+
+        start = time.perf_counter()
+        frames = load_frames(path)
+        command_mapping = {cmd: idx for idx, cmd in enumerate(sorted(set(frames['current_command'])))}
+        numeric = build_numeric_block(frames)
+        build_history_indices(frames, command_mapping)
+        GameMLP().scaler.fit(numeric)
+        parse_time = time.perf_counter() - start
+
+        timings = []
+        for label in ("cache build", "unchanged data", f"{tail} rows appended"):
+            if label.endswith("appended"):
+                df.iloc[rows - tail:].to_csv(path, mode='a', header=False, index=False)
+            cache = FeatureCache(path)
+            start = time.perf_counter()
+            numeric, indices, y, command_mapping, scaler = cache.load_blocks()
+            timings.append((label, time.perf_counter() - start, cache.rows_parsed))
+    print(f"Parse CSV + build features + fit scaler: {parse_time * 1e3:8.1f}ms ({rows - tail} rows)")
+    for label, seconds, parsed in timings:
+        print(f"FeatureCache.load_blocks, {label:20s} {seconds * 1e3:8.1f}ms ({parsed} rows parsed)")
+
+def benchmark_quantization(rows):
+    """float64 / float32 / int8 engines: parity with predict_proba, latency and size"""
+    from quantize import compare_precisions, print_comparison
+    model = trained_bench_model(rows=min(rows, 5000), max_iter=50)
+    # Held out: a different seed than the training frames
+    X = build_feature_matrix(synthetic_training_frame(min(rows, 20000), seed=1), model.command_mapping)
+    print_comparison(compare_precisions(model, X))
+
+def matrix_bytes(X):
+    """Memory held by a dense array or a CSR matrix"""
+    if hasattr(X, 'indptr'):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+def benchmark_history_encoding(rows):
+    """One-hot versus index-encoded command history: training matrix size, fit time and per-frame latency"""
+    from sklearn.neural_network import MLPClassifier
+    from ml_model import one_hot_history, sparse_feature_matrix
+    results = []
+    # The bot's own commands, and a larger vocabulary (e.g. one entry per special move and direction)
+    for commands in (BENCH_COMMANDS, [f"cmd{i}" for i in range(200)]):
+        df = synthetic_training_frame(rows, commands=commands)
+        command_mapping = {cmd: idx for idx, cmd in enumerate(sorted(set(df['current_command'])))}
+        numeric = build_numeric_block(df)
+        indices = build_history_indices(df, command_mapping)
+        y = df['current_command'].map(command_mapping).to_numpy()
+        numeric = (numeric - numeric.mean(axis=0)) / np.where(numeric.std(axis=0) > 0, numeric.std(axis=0), 1.0)
+        matrices = {
+            'dense': np.hstack([numeric] + one_hot_history(indices, len(command_mapping))),
+            'sparse': sparse_feature_matrix(numeric, indices, len(command_mapping)),
+        }
+        fit_seconds = {}
+        for label, X in matrices.items():
+            model = MLPClassifier(hidden_layer_sizes=(64, 32), max_iter=5, random_state=42)
+            start = time.perf_counter()
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                model.fit(X, y)
+            fit_seconds[label] = time.perf_counter() - start
+
+        engine = trained_bench_model(hidden_layer_sizes=(64, 32), commands=commands).engine
+        states = synthetic_game_states(2000)
+        history = [[commands[(i + k) % len(commands)] for k in range(3)] for i in range(len(states))]
+        frame_us = {}
+        for label, use_embeddings in (('dense', False), ('embeddings', True)):
+            engine.use_embeddings = use_embeddings
+            times = []
+            for state, prev_commands in zip(states, history):
+                start = time.perf_counter()
+                engine.predict_proba(state, prev_commands)
+                times.append(time.perf_counter() - start)
+            frame_us[label] = float(np.percentile(np.array(times) * 1e6, 50))
+
+        result = {
+            'commands': len(command_mapping),
+            'features': matrices['dense'].shape[1],
+            'dense_mb': matrix_bytes(matrices['dense']) / 1e6,
+            'sparse_mb': matrix_bytes(matrices['sparse']) / 1e6,
+            'dense_fit_s': fit_seconds['dense'],
+            'sparse_fit_s': fit_seconds['sparse'],
+            'dense_frame_p50_us': frame_us['dense'],
+            'embedding_frame_p50_us': frame_us['embeddings'],
+        }
+        results.append(result)
+        print(f"{result['commands']} commands ({result['features']} features), {rows} rows:")
+        print(f"  training matrix   one-hot {result['dense_mb']:8.1f} MB  sparse {result['sparse_mb']:8.1f} MB")
+        print(f"  fit (5 epochs)    one-hot {result['dense_fit_s']:8.2f} s   sparse {result['sparse_fit_s']:8.2f} s")
+        print(f"  frame p50         one-hot {result['dense_frame_p50_us']:8.1f} us  "
+              f"embeddings {result['embedding_frame_p50_us']:8.1f} us")
+    return results
+
+def benchmark_pipeline(rows):
+    """Per-stage latency, allocations and fps of the whole bot pipeline (see profiler.py)"""
+    from bot import Bot
+    from profiler import profile_pipeline, synthetic_messages, format_results
+    results = profile_pipeline(synthetic_messages(rows), Bot(ml_model=trained_bench_model()))
+    print(format_results(results))
+    return results
+
+BENCHMARKS = {
+    'batching': benchmark_batching,
+    'collector': benchmark_collector,
+    'commands': benchmark_commands,
+    'features': benchmark_features,
+    'inference': benchmark_inference,
+    'objects': benchmark_objects,
+    'startup': benchmark_startup,
+    'storage': benchmark_storage,
+    'training_memory': benchmark_training_memory,
+    'protocol': benchmark_protocol,
+    'server': benchmark_server,
+    'simulator': benchmark_simulator,
+    'pipeline': benchmark_pipeline,
+    'feature_cache': benchmark_feature_cache,
+    'quantization': benchmark_quantization,
+    'history_encoding': benchmark_history_encoding,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run bot performance benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--rows', type=int, default=20000, help="Number of rows/frames to run")
+    parser.add_argument('--json', default=None,
+                        help="Write the results to this JSON file (benchmarks that return results)")
+    args = parser.parse_args()
+    results = BENCHMARKS[args.benchmark](args.rows)
+    if args.json and results is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
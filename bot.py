@@ -1,23 +1,64 @@
 from command import Command
 import numpy as np
-from buttons import Buttons
+from buttons import Buttons, BUTTON_BITS, ALL_BUTTONS
 # from data_collector import GameDataCollector
 from ml_model import GameMLP
 import csv
 import os
+import threading
 from datetime import datetime
 
+# Buttons a command string can refer to
+COMMAND_BUTTONS = {
+    "v": BUTTON_BITS['down'],
+    "<": BUTTON_BITS['left'],
+    ">": BUTTON_BITS['right'],
+    "^": BUTTON_BITS['up'],
+    "A": BUTTON_BITS['A'],
+    "B": BUTTON_BITS['B'],
+    "Y": BUTTON_BITS['Y'],
+    "R": BUTTON_BITS['R'],
+    "L": BUTTON_BITS['L'],
+}
+COMMAND_BUTTONS_MASK = sum(COMMAND_BUTTONS.values())
+
+def compile_command(cmd):
+    """Compile a command string like "v+>+!Y" into (keep_mask, press_mask) for Buttons.apply.
+
+    Executing a command releases every command button, then applies the
+    "+"-separated tokens in order: "X" presses a button and "!X" releases it.
+    Unknown tokens (e.g. "neutral") are ignored.
+    """
+    keep_mask = ALL_BUTTONS & ~COMMAND_BUTTONS_MASK
+    press_mask = 0
+    for token in cmd.split("+"):
+        if token.startswith("!"):
+            bit = COMMAND_BUTTONS.get(token[1:], 0)
+            keep_mask &= ~bit
+            press_mask &= ~bit
+        else:
+            press_mask |= COMMAND_BUTTONS.get(token, 0)
+    return keep_mask, press_mask
+
+def compile_command_table(commands):
+    """Precompiled masks for every command string in commands"""
+    return {cmd: compile_command(cmd) for cmd in commands}
+
 class Bot:
 
-    def __init__(self):
-        # Initialize ML model
-        self.ml_model = GameMLP()
-        if not self.ml_model.load_model():
-            # Train the model if no trained model exists
-            print("No trained model found. Training new model...")
-            if not self.ml_model.train():
-                raise Exception("Failed to train ML model. Please ensure training data exists.")
-            print("Model trained successfully.")
+    def __init__(self, ml_model=None):
+        # Initialize ML model (or share one that is already loaded)
+        if ml_model is None:
+            ml_model = GameMLP()
+            if not ml_model.load_model():
+                # Train the model if no trained model exists
+                print("No trained model found. Training new model...")
+                if not ml_model.train():
+                    raise Exception("Failed to train ML model. Please ensure training data exists.")
+                print("Model trained successfully.")
+        self.ml_model = ml_model
+        # Button masks for every command the model can predict (others are compiled on first use)
+        self.command_table = compile_command_table(ml_model.command_mapping)
         
         # Initialize data collector
         # self.data_collector = GameDataCollector()
@@ -32,27 +73,57 @@ class Bot:
         self.my_command = Command()
         self.buttn = Buttons()
         self.remaining_code = []
+        
+        # Model handed over by a background thread, picked up at the start of the next frame
+        self._pending_model = None
+        self._swap_lock = threading.Lock()
+
+    def swap_model(self, ml_model):
+        """Replace the ML model between frames (safe to call from another thread)"""
+        with self._swap_lock:
+            self._pending_model = ml_model
+
+    def apply_pending_model(self):
+        """Switch to a model handed over with swap_model, if any (called at the start of a frame)"""
+        if self._pending_model is None:
+            return
+        with self._swap_lock:
+            self.ml_model, self._pending_model = self._pending_model, None
+        self.command_table.update(compile_command_table(self.ml_model.command_mapping))
+        if self.ml_model.engine is not None:
+            # Telemetry may be shared with the previous model; name its indices after this one from now on
+            self.ml_model.telemetry.commands = self.ml_model.engine.commands
 
     def fight(self, current_game_state, player):
+        self.apply_pending_model()
+            
         if player == "1":
             # Always use ML predictions
-            prev_commands = [self.prev_command, self.prev2_command, self.prev3_command]
-            predicted_command = self.ml_model.predict(current_game_state, prev_commands)
-            self.run_command([predicted_command], current_game_state.player1)
-            
-            # Update command history
-            self.prev3_command = self.prev2_command
-            self.prev2_command = self.prev_command
-            self.prev_command = self.current_command
-            self.current_command = self._get_current_command()
-            
-            # Save game state data
-            # self.data_collector.collect_frame_data(current_game_state, self.current_command)
-            
-            self.my_command.player_buttons = self.buttn
+            predicted_command = self.ml_model.predict(current_game_state, self.command_history())
+            self.apply_prediction(current_game_state, predicted_command)
             
         return self.my_command
 
+    def command_history(self):
+        """Previous commands the model conditions on, most recent first"""
+        return [self.prev_command, self.prev2_command, self.prev3_command]
+
+    def apply_prediction(self, current_game_state, predicted_command):
+        """Execute a predicted command for player 1 (the part of fight after the model call)"""
+        self.run_command([predicted_command], current_game_state.player1)
+        
+        # Update command history
+        self.prev3_command = self.prev2_command
+        self.prev2_command = self.prev_command
+        self.prev_command = self.current_command
+        self.current_command = self._get_current_command()
+        
+        # Save game state data
+        # self.data_collector.collect_frame_data(current_game_state, self.current_command)
+        
+        self.my_command.player_buttons = self.buttn
+        return self.my_command
+
     def _get_current_command(self):
         """Helper method to get the current command as a string"""
         if not self.remaining_code:
@@ -66,69 +137,10 @@ class Bot:
         if len(self.remaining_code) > 0:
             cmd = self.remaining_code[0]
             
-            # First release all buttons
-            self._release_button("v")
-            self._release_button("<")
-            self._release_button(">")
-            self._release_button("^")
-            self._release_button("A")
-            self._release_button("B")
-            self._release_button("Y")
-            self._release_button("R")
-            self._release_button("L")
-            
-            # Then handle the new command
-            if "+" in cmd:
-                buttons = cmd.split("+")
-                for btn in buttons:
-                    if btn.startswith("!"):
-                        self._release_button(btn[1:])
-                    else:
-                        self._press_button(btn)
-            else:
-                if cmd.startswith("!"):
-                    self._release_button(cmd[1:])
-                else:
-                    self._press_button(cmd)
+            # Release the command buttons and press the new ones in one mask operation
+            masks = self.command_table.get(cmd)
+            if masks is None:
+                masks = self.command_table[cmd] = compile_command(cmd)
+            self.buttn.apply(*masks)
                     
             self.remaining_code = self.remaining_code[1:]
-            
-    def _press_button(self, btn):
-        if btn == "v":
-            self.buttn.down = True
-        elif btn == "<":
-            self.buttn.left = True
-        elif btn == ">":
-            self.buttn.right = True
-        elif btn == "^":
-            self.buttn.up = True
-        elif btn == "A":
-            self.buttn.A = True
-        elif btn == "B":
-            self.buttn.B = True
-        elif btn == "Y":
-            self.buttn.Y = True
-        elif btn == "R":
-            self.buttn.R = True
-        elif btn == "L":
-            self.buttn.L = True
-            
-    def _release_button(self, btn):
-        if btn == "v":
-            self.buttn.down = False
-        elif btn == "<":
-            self.buttn.left = False
-        elif btn == ">":
-            self.buttn.right = False
-        elif btn == "^":
-            self.buttn.up = False
-        elif btn == "A":
-            self.buttn.A = False
-        elif btn == "B":
-            self.buttn.B = False
-        elif btn == "Y":
-            self.buttn.Y = False
-        elif btn == "R":
-            self.buttn.R = False
-        elif btn == "L":
-            self.buttn.L = False
@@ -1,5 +1,38 @@
+# Button attribute name, name in the game's JSON, bit in the button mask
+BUTTON_FIELDS = (
+    ('up', 'Up', 1 << 0),
+    ('down', 'Down', 1 << 1),
+    ('right', 'Right', 1 << 2),
+    ('left', 'Left', 1 << 3),
+    ('select', 'Select', 1 << 4),
+    ('start', 'Start', 1 << 5),
+    ('Y', 'Y', 1 << 6),
+    ('B', 'B', 1 << 7),
+    ('X', 'X', 1 << 8),
+    ('A', 'A', 1 << 9),
+    ('L', 'L', 1 << 10),
+    ('R', 'R', 1 << 11),
+)
+BUTTON_BITS = {attribute: bit for attribute, _, bit in BUTTON_FIELDS}
+ALL_BUTTONS = (1 << len(BUTTON_FIELDS)) - 1
+
+def _button_property(bit):
+
+    def get(self):
+        return bool(self.mask & bit)
+
+    def set(self, pressed):
+        if pressed:
+            self.mask |= bit
+        else:
+            self.mask &= ~bit
+
+    return property(get, set)
 
 class Buttons:
+    # The 12 button states are kept as one bitmask; up, down, ..., R are properties over it
+
+    __slots__ = ('mask',)
 
     def __init__(self, buttons_dict=None):
 
@@ -9,49 +42,25 @@ class Buttons:
             self.init_buttons()
 
     def init_buttons(self):
-        self.up = False
-        self.down = False
-        self.right = False
-        self.left = False
-        self.select = False
-        self.start = False
-        self.Y = False
-        self.B = False
-        self.X = False
-        self.A = False
-        self.L = False
-        self.R = False
+        self.mask = 0
 
     def dict_to_object(self, buttons_dict):
 
-        self.up = buttons_dict['Up']
-        self.down = buttons_dict['Down']
-        self.right = buttons_dict['Right']
-        self.left = buttons_dict['Left']
-        self.select = buttons_dict['Select']
-        self.start = buttons_dict['Start']
-        self.Y = buttons_dict['Y']
-        self.B = buttons_dict['B']
-        self.X = buttons_dict['X']
-        self.A = buttons_dict['A']
-        self.L = buttons_dict['L']
-        self.R = buttons_dict['R']
+        mask = 0
+        for _, key, bit in BUTTON_FIELDS:
+            if buttons_dict[key]:
+                mask |= bit
+        self.mask = mask
+
+    def apply(self, keep_mask, press_mask):
+        # Release every button not in keep_mask, then press press_mask
+        self.mask = (self.mask & keep_mask) | press_mask
 
     def object_to_dict(self):
 
-        buttons_dict = {}
-
-        buttons_dict['Up'] = self.up
-        buttons_dict['Down'] = self.down
-        buttons_dict['Right'] = self.right
-        buttons_dict['Left'] = self.left
-        buttons_dict['Select'] = self.select
-        buttons_dict['Start'] = self.start
-        buttons_dict['Y'] = self.Y
-        buttons_dict['B'] = self.B
-        buttons_dict['X'] = self.X
-        buttons_dict['A'] = self.A
-        buttons_dict['L'] = self.L
-        buttons_dict['R'] = self.R
-
-        return buttons_dict
\ No newline at end of file
+        mask = self.mask
+        return {key: bool(mask & bit) for _, key, bit in BUTTON_FIELDS}
+
+for _attribute, _, _bit in BUTTON_FIELDS:
+    setattr(Buttons, _attribute, _button_property(_bit))
+del _attribute, _bit
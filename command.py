@@ -1,5 +1,11 @@
+import json
 from buttons import Buttons
 
+# Encoded commands keyed by (p1 mask, p2 mask, type, player count, save game path);
+# the bot only ever produces a handful of button combinations
+_encoded_commands = {}
+MAX_CACHED_COMMANDS = 4096
+
 class Command:
 
     def __init__(self):
@@ -20,4 +26,16 @@ class Command:
         command_dict['player_count'] = self.__player_count
         command_dict['savegamepath'] = self.save_game_path
 
-        return command_dict
\ No newline at end of file
+        return command_dict
+
+    def to_bytes(self):
+        """Encode as JSON bytes, identical to json.dumps(object_to_dict()).encode() but cached per button state"""
+        key = (self.player_buttons.mask, self.player2_buttons.mask, self.type,
+               self.__player_count, self.save_game_path)
+        encoded = _encoded_commands.get(key)
+        if encoded is None:
+            encoded = json.dumps(self.object_to_dict()).encode()
+            if len(_encoded_commands) >= MAX_CACHED_COMMANDS:
+                _encoded_commands.clear()
+            _encoded_commands[key] = encoded
+        return encoded
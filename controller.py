@@ -1,11 +1,14 @@
 import socket
-import json
 from game_state import GameState
 from bot import Bot
 from data_collector import GameDataCollector
+from telemetry import TRACE
+from protocol import FRAMINGS, FrameReader, encode_message
+from scheduler import FrameScheduler, RECV, PARSE, PREDICT, COLLECT, SEND
+import weakref
+import argparse
 import sys
-import os
-import time
+import signal
 
 def connect(port):
     #For making a connection with the game
@@ -17,55 +20,51 @@ def connect(port):
     print("Connected to game!")
     return client_socket
 
-def send(client_socket, command):
+# One persistent reader per socket so bytes of a partially received message aren't lost between calls
+_readers = weakref.WeakKeyDictionary()
+
+def send(client_socket, command, framing='json'):
     #This function will send your updated command to Bizhawk so that game reacts according to your command.
-    command_dict = command.object_to_dict()
-    pay_load = json.dumps(command_dict).encode()
-    client_socket.sendall(pay_load)
+    pay_load = command.to_bytes()
+    client_socket.sendall(encode_message(pay_load, framing))
 
-def receive(client_socket):
-    #receive the game state and return game state
-    pay_load = client_socket.recv(4096)
-    input_dict = json.loads(pay_load.decode())
+def receive(client_socket, framing='json'):
+    #receive the newest complete game state and return game state (None if the game disconnected)
+    reader = _readers.get(client_socket)
+    if reader is None:
+        reader = _readers[client_socket] = FrameReader(client_socket, framing)
+    input_dict = reader.read_latest()
+    if input_dict is None:
+        return None
     game_state = GameState(input_dict)
     return game_state
 
-def main():
-    # Initialize connection
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.bind(('localhost', 9999))
-    sock.listen(1)
-    
-    # Initialize bot and data collector
-    bot = Bot()
-    data_collector = GameDataCollector()
-    
-    # Wait for game connection
-    print("Waiting for game connection on port 9999...")
-    conn, addr = sock.accept()
-    print("Connected to game!")
-    
-    # Start game loop
-    print("Starting game loop...")
-    print("Waiting for game state...")
-    
+def game_loop(conn, bot, data_collector, framing='json', scheduler=None, recorder=None):
+    """Receive game states, send the bot's commands and collect data until the game disconnects"""
+    reader = FrameReader(conn, framing, recorder=recorder)
+    # Paced by the emulator's frames unless the scheduler has a tick rate
+    scheduler = scheduler or FrameScheduler()
     frame_count = 0
-    last_size = 0
+    last_rows = 0
+    writer_error_reported = False
     
     while True:
-        # Receive game state
-        data = conn.recv(1024)
-        if not data:
+        scheduler.begin_frame()
+        # Receive the newest game state; states that queued up while we were busy are stale and skipped
+        input_dict = reader.read_latest(drain=True)
+        if input_dict is None:
             break
+        scheduler.mark(RECV, idle=reader.last_wait)
             
         # Parse game state
-        game_state = GameState(json.loads(data.decode()))
+        game_state = GameState(input_dict)
+        scheduler.mark(PARSE)
+        
+        # Get bot command (a neutral command when the round hasn't started)
+        command = bot.fight(game_state, "1")
+        scheduler.mark(PREDICT)
         
-        # Get bot command
         if game_state.has_round_started and not game_state.is_round_over:
-            # Get bot command for player 1
-            command = bot.fight(game_state, "1")
-            
             # Get current command for data collection
             current_command = bot._get_current_command()
             
@@ -75,24 +74,117 @@ def main():
             # Update frame count and print progress
             frame_count += 1
             if frame_count % 100 == 0:
-                current_size = os.path.getsize(data_collector.csv_file)
-                if current_size != last_size:
+                metrics = data_collector.queue_metrics()
+                if metrics is not None and metrics['error'] is not None and not writer_error_reported:
+                    # Rows are no longer written, so the progress report below stops; say why once
+                    print(f"Data collection stopped, writer failed: {metrics['error']}")
+                    writer_error_reported = True
+                rows_written = data_collector.rows_written
+                if rows_written != last_rows:
                     print(f"Collected data for frame {frame_count}")
-                    print(f"CSV file size: {current_size} bytes")
-                    last_size = current_size
-        else:
-            # Send neutral command when round hasn't started
-            command = bot.fight(game_state, "1")  # This will return a neutral command
+                    print(f"Rows written: {rows_written}")
+                    if metrics is not None:
+                        print(f"Writer queue depth: {metrics['queue_depth']} (max {metrics['max_queue_depth']}, dropped {metrics['dropped']}, lost {metrics['lost']})")
+                    print(f"Stale states skipped: {reader.messages_skipped}, decode errors: {reader.decoder.decode_errors}, "
+                          f"budget overruns: {scheduler.overruns}")
+                    last_rows = rows_written
+        scheduler.mark(COLLECT)
         
         # Always send a command
-        conn.sendall(json.dumps(command.object_to_dict()).encode())
+        conn.sendall(encode_message(command.to_bytes(), framing))
+        scheduler.mark(SEND)
         
-        # Small delay to prevent overwhelming the game
-        time.sleep(0.01)
+        # Sleeps until the next tick when a tick rate is set, otherwise returns straight away
+        scheduler.end_frame()
+    return reader
+
+def main(online_learning=False, framing='json', tick_rate=None, registry_dir=None, watch=False,
+         record_path=None):
+    # Initialize connection
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('localhost', 9999))
+    sock.listen(1)
+    
+    # Exit through the normal shutdown path on SIGTERM so buffered rows are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    # Initialize bot and data collector
+    registry = None
+    ml_model = None
+    if registry_dir is not None:
+        # Imported here so a plain run doesn't need the registry
+        from model_registry import ModelRegistry, RegistryWatcher
+        registry = ModelRegistry(registry_dir)
+        ml_model = registry.load()
+        if ml_model is not None:
+            print(f"Loaded model {ml_model.version} from {registry_dir}")
+    bot = Bot(ml_model=ml_model)
+    # Hot-swap to new versions promoted in the registry while the game runs
+    watcher = None
+    if registry is not None and watch:
+        # Online learning trains the swapped-in model further, so it needs the full scikit-learn model
+        watcher = RegistryWatcher(registry, bot, version=bot.ml_model.version,
+                                  compact=not online_learning).start()
+    # Rows are written by a background thread so disk stalls don't delay the game loop
+    data_collector = GameDataCollector(background=True)
+    
+    # Optionally keep training on the frames collected during play
+    trainer = None
+    if online_learning:
+        # Imported here because training pulls in pandas and scikit-learn
+        from online_learning import OnlineTrainer
+        trainer = OnlineTrainer(bot, data_collector.headers, registry=registry)
+        data_collector.add_listener(trainer.on_frame)
+    
+    # Prediction debug output (BOT_TELEMETRY=trace) is printed in the background
+    telemetry = bot.ml_model.telemetry
+    if telemetry.level >= TRACE:
+        telemetry.start_flusher()
+    
+    # Wait for game connection
+    print("Waiting for game connection on port 9999...")
+    conn, addr = sock.accept()
+    print("Connected to game!")
+    
+    # Start game loop
+    print("Starting game loop...")
+    print("Waiting for game state...")
+    # Optionally capture the raw incoming stream for offline replay (replay.py)
+    recorder = None
+    if record_path is not None:
+        from replay import SessionRecorder
+        recorder = SessionRecorder(record_path, framing)
+    scheduler = FrameScheduler(tick_rate)
+    game_loop(conn, bot, data_collector, framing, scheduler, recorder)
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded {recorder.chunks} chunks ({recorder.bytes_recorded} bytes) to {record_path}")
+    print(scheduler.report())
     
-    # Clean up
+    # Clean up (the collector also flushes at exit if the loop crashes)
+    data_collector.close()
+    telemetry.stop_flusher()
+    if trainer is not None:
+        trainer.stop()
+    if watcher is not None:
+        watcher.stop()
     conn.close()
     sock.close()
 
 if __name__ == '__main__':
-   main()
+    parser = argparse.ArgumentParser(description="Run the bot against BizHawk")
+    parser.add_argument('--online', action='store_true',
+                        help="Update the model with partial_fit on frames collected during play")
+    parser.add_argument('--framing', choices=FRAMINGS, default='json',
+                        help="Message framing used by the game script (default: back-to-back JSON)")
+    parser.add_argument('--tick-rate', type=float, default=None,
+                        help="Answer at most this many times per second (default: once per game state received)")
+    parser.add_argument('--registry', default=None,
+                        help="Load the current model version from this model registry directory")
+    parser.add_argument('--watch', action='store_true',
+                        help="Switch to new model versions promoted in the registry without reconnecting")
+    parser.add_argument('--record', default=None,
+                        help="Record the incoming game-state stream to this log for replay.py (.gz to compress)")
+    args = parser.parse_args()
+    main(online_learning=args.online, framing=args.framing, tick_rate=args.tick_rate,
+         registry_dir=args.registry, watch=args.watch, record_path=args.record)
@@ -1,97 +1,343 @@
-import csv
-import os
-from datetime import datetime
-
-class GameDataCollector:
-    def __init__(self, csv_file="training_data.csv"):
-        # Get absolute path for the CSV file
-        self.data_dir = 'training_data'
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
-            
-        # Use a single CSV file
-        self.csv_file = os.path.join(self.data_dir, 'training_data.csv')
-        
-        self.headers = [
-            'timer', 'player1_x', 'player1_y', 'player1_health', 'player1_prev_health',
-            'player2_x', 'player2_y', 'player2_health', 'player2_prev_health',
-            'distance', 'relative_x', 'relative_y',
-            'current_command', 'prev_command', 'prev2_command', 'prev3_command',
-            'damage_dealt', 'damage_taken', 'command_duration'
-        ]
-        
-        # Initialize tracking variables
-        self.prev_p1_health = 100
-        self.prev_p2_health = 100
-        self.prev_command = None
-        self.prev2_command = None
-        self.prev3_command = None
-        self.command_start_time = None
-        self.current_command = None
-        
-        # Create file with headers only if it doesn't exist
-        if not os.path.exists(self.csv_file):
-            with open(self.csv_file, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=self.headers)
-                writer.writeheader()
-
-    def collect_frame_data(self, game_state, current_command):
-        """Collect data from a single frame of the game state"""
-        # Only record if both players have health > 0
-        if game_state.player1.health <= 0 or game_state.player2.health <= 0:
-            return
-            
-        # Calculate distances and relative positions
-        distance = ((game_state.player1.x_coord - game_state.player2.x_coord) ** 2 + 
-                   (game_state.player1.y_coord - game_state.player2.y_coord) ** 2) ** 0.5
-        relative_x = game_state.player2.x_coord - game_state.player1.x_coord
-        relative_y = game_state.player2.y_coord - game_state.player1.y_coord
-        
-        # Calculate damage dealt and taken
-        damage_dealt = self.prev_p2_health - game_state.player2.health
-        damage_taken = self.prev_p1_health - game_state.player1.health
-        
-        # Calculate command duration
-        command_duration = 0
-        if self.command_start_time is not None:
-            command_duration = game_state.timer - self.command_start_time
-            
-        # Update command history
-        if current_command != self.current_command:
-            self.prev3_command = self.prev2_command
-            self.prev2_command = self.prev_command
-            self.prev_command = self.current_command
-            self.current_command = current_command
-            self.command_start_time = game_state.timer
-            
-        # Prepare row data
-        row = {
-            'timer': game_state.timer,
-            'player1_x': game_state.player1.x_coord,
-            'player1_y': game_state.player1.y_coord,
-            'player1_health': game_state.player1.health,
-            'player1_prev_health': self.prev_p1_health,
-            'player2_x': game_state.player2.x_coord,
-            'player2_y': game_state.player2.y_coord,
-            'player2_health': game_state.player2.health,
-            'player2_prev_health': self.prev_p2_health,
-            'distance': distance,
-            'relative_x': relative_x,
-            'relative_y': relative_y,
-            'current_command': current_command,
-            'prev_command': self.prev_command,
-            'prev2_command': self.prev2_command,
-            'prev3_command': self.prev3_command,
-            'damage_dealt': damage_dealt,
-            'damage_taken': damage_taken,
-            'command_duration': command_duration
-        }
-        
-        # Append to CSV
-        with open(self.csv_file, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=self.headers)
-            writer.writerow(row)
-            
-        # Update previous health values
-        self.prev_p1_health = game_state.player1.health
-        self.prev_p2_health = game_state.player2.health 
\ No newline at end of file
+import atexit
+import csv
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from frame_store import FrameStoreWriter
+
+class BufferedCSVWriter:
+    """Append rows to a CSV file, keeping it open and writing in batches.
+
+    Rows are flushed once flush_rows are pending or flush_interval seconds have
+    passed since the last flush. close() (also registered with atexit) writes
+    the last partial batch, so only a hard kill can lose buffered rows.
+    """
+
+    def __init__(self, path, headers, flush_rows=256, flush_interval=1.0, fsync=False):
+        self.path = path
+        self.headers = headers
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rows_written = 0
+
+        # Write the header only if the file doesn't exist yet
+        new_file = not os.path.exists(path)
+        self._file = open(path, 'a', newline='')
+        self._writer = csv.writer(self._file)
+        if new_file:
+            self._writer.writerow(headers)
+            self._file.flush()
+
+        self._pending = []
+        self._last_flush = time.monotonic()
+        atexit.register(self.close)
+
+    def write_row(self, row):
+        """Queue one row (a sequence in header order) and flush if the batch is due"""
+        self._pending.append(row)
+        if len(self._pending) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write all pending rows to disk"""
+        if self._file is None:
+            return
+        if self._pending:
+            self._writer.writerows(self._pending)
+            self.rows_written += len(self._pending)
+            self._pending = []
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush the last partial batch and close the file"""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        atexit.unregister(self.close)
+
+# What BackgroundRowWriter does when its queue is full
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop')
+
+class BackgroundRowWriter:
+    """Hand rows to a dedicated writer thread through a bounded queue.
+
+    write_row() only appends to the queue, so disk stalls never reach the game
+    loop. When the queue is full the overflow policy decides what happens:
+    'block' waits for space, 'drop_oldest' discards the oldest queued row and
+    'drop' discards the new row. Dropped rows are counted in metrics().
+
+    Rows written after close(), or after the writer thread has died (error
+    holds the exception that stopped it), are discarded and counted as lost
+    instead of queued; flush() then raises rather than waiting.
+    """
+
+    def __init__(self, writer, max_queue=4096, overflow='block'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.writer = writer
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.enqueued = 0
+        self.dropped = 0
+        self.lost = 0
+        self.max_queue_depth = 0
+        self.error = None
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._flush_requested = 0
+        self._flush_done = 0
+        self._thread = threading.Thread(target=self._run, name="collector-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def rows_written(self):
+        return self.writer.rows_written
+
+    def _accepting(self):
+        return not self._closing and self.error is None and self._thread.is_alive()
+
+    def write_row(self, row):
+        """Queue one row for the writer thread"""
+        with self._cond:
+            if not self._accepting():
+                self.lost += 1
+                return
+            if len(self._queue) >= self.max_queue:
+                if self.overflow == 'block':
+                    while len(self._queue) >= self.max_queue and self._accepting():
+                        # The timeout re-checks the thread in case it died without notifying
+                        self._cond.wait(timeout=self.writer.flush_interval)
+                    if not self._accepting():
+                        self.lost += 1
+                        return
+                elif self.overflow == 'drop_oldest':
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    self.dropped += 1
+                    return
+            self._queue.append(row)
+            self.enqueued += 1
+            if len(self._queue) > self.max_queue_depth:
+                self.max_queue_depth = len(self._queue)
+            self._cond.notify_all()
+
+    def _run(self):
+        try:
+            self._write_loop()
+        except Exception as e:
+            self._fail(e)
+        finally:
+            # Also after a failure: writes the rows the wrapped writer still buffers and closes its file
+            try:
+                self.writer.close()
+            except Exception as e:
+                self._fail(e)
+
+    def _fail(self, error):
+        """Stop accepting rows after the writer failed; the first error is kept (see metrics())"""
+        with self._cond:
+            if self.error is None:
+                self.error = error
+            self.lost += len(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing and self._flush_requested == self._flush_done:
+                    # Wake up periodically so the writer's time-based flush still happens when idle
+                    if not self._cond.wait(timeout=self.writer.flush_interval):
+                        break
+                batch = list(self._queue)
+                self._queue.clear()
+                flush_to = self._flush_requested
+                closing = self._closing
+                self._cond.notify_all()
+
+            for row in batch:
+                self.writer.write_row(row)
+            if not batch or flush_to != self._flush_done or closing:
+                self.writer.flush()
+
+            with self._cond:
+                self._flush_done = flush_to
+                self._cond.notify_all()
+                if closing and not self._queue:
+                    break
+
+    def flush(self):
+        """Wait until every queued row has been written and flushed to disk"""
+        with self._cond:
+            self._flush_requested += 1
+            target = self._flush_requested
+            self._cond.notify_all()
+            while self._flush_done < target and self._thread.is_alive():
+                self._cond.wait(timeout=self.writer.flush_interval)
+            if self.error is not None:
+                raise RuntimeError("The collector writer thread failed") from self.error
+
+    def close(self):
+        """Drain the queue, flush and stop the writer thread"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def metrics(self):
+        """Queue depth and drop counters"""
+        return {
+            'queue_depth': len(self._queue),
+            'max_queue_depth': self.max_queue_depth,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'lost': self.lost,
+            'error': None if self.error is None else repr(self.error),
+            'rows_written': self.writer.rows_written,
+        }
+
+# Columns of every collected frame, in order
+COLLECTOR_HEADERS = [
+    'timer', 'player1_x', 'player1_y', 'player1_health', 'player1_prev_health',
+    'player2_x', 'player2_y', 'player2_health', 'player2_prev_health',
+    'distance', 'relative_x', 'relative_y',
+    'current_command', 'prev_command', 'prev2_command', 'prev3_command',
+    'damage_dealt', 'damage_taken', 'command_duration'
+]
+
+class GameDataCollector:
+    def __init__(self, csv_file="training_data.csv", data_dir='training_data',
+                 flush_rows=256, flush_interval=1.0, fsync=False,
+                 background=False, max_queue=4096, overflow='block', storage='csv'):
+        # Get absolute path for the CSV file
+        self.data_dir = data_dir
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+            
+        # Use a single CSV file
+        self.csv_file = os.path.join(self.data_dir, csv_file)
+        
+        self.headers = list(COLLECTOR_HEADERS)
+        
+        # Initialize tracking variables
+        self.prev_p1_health = 100
+        self.prev_p2_health = 100
+        self.prev_command = None
+        self.prev2_command = None
+        self.prev3_command = None
+        self.command_start_time = None
+        self.current_command = None
+        
+        # Callables that receive every collected row (e.g. OnlineTrainer.on_frame)
+        self.listeners = []
+        
+        if storage == 'columnar':
+            # Typed column files with dictionary-encoded commands (see frame_store.py)
+            self.csv_file = os.path.splitext(self.csv_file)[0] + '.frames'
+            self.writer = FrameStoreWriter(self.csv_file, self.headers, flush_rows=flush_rows,
+                                           flush_interval=flush_interval, fsync=fsync)
+        else:
+            # Keep the CSV open and write rows in batches (creates the file with headers if needed)
+            self.writer = BufferedCSVWriter(self.csv_file, self.headers, flush_rows=flush_rows,
+                                            flush_interval=flush_interval, fsync=fsync)
+        
+        # In background mode collect_frame_data only enqueues rows for a writer thread
+        if background:
+            self.writer = BackgroundRowWriter(self.writer, max_queue=max_queue, overflow=overflow)
+
+    @property
+    def rows_written(self):
+        """Number of rows written to disk so far"""
+        return self.writer.rows_written
+
+    def add_listener(self, listener):
+        """Call listener(row) with every row collected from now on"""
+        self.listeners.append(listener)
+
+    def queue_metrics(self):
+        """Queue depth and drop counters of the background writer (None when writing inline)"""
+        if isinstance(self.writer, BackgroundRowWriter):
+            return self.writer.metrics()
+        return None
+
+    def collect_frame_data(self, game_state, current_command):
+        """Collect data from a single frame of the game state"""
+        # Only record if both players have health > 0
+        if game_state.player1.health <= 0 or game_state.player2.health <= 0:
+            return
+            
+        # Calculate distances and relative positions
+        distance = ((game_state.player1.x_coord - game_state.player2.x_coord) ** 2 + 
+                   (game_state.player1.y_coord - game_state.player2.y_coord) ** 2) ** 0.5
+        relative_x = game_state.player2.x_coord - game_state.player1.x_coord
+        relative_y = game_state.player2.y_coord - game_state.player1.y_coord
+        
+        # Calculate damage dealt and taken
+        damage_dealt = self.prev_p2_health - game_state.player2.health
+        damage_taken = self.prev_p1_health - game_state.player1.health
+        
+        # Calculate command duration
+        command_duration = 0
+        if self.command_start_time is not None:
+            command_duration = game_state.timer - self.command_start_time
+            
+        # Update command history
+        if current_command != self.current_command:
+            self.prev3_command = self.prev2_command
+            self.prev2_command = self.prev_command
+            self.prev_command = self.current_command
+            self.current_command = current_command
+            self.command_start_time = game_state.timer
+            
+        # Prepare row data (in header order)
+        row = (
+            game_state.timer,
+            game_state.player1.x_coord,
+            game_state.player1.y_coord,
+            game_state.player1.health,
+            self.prev_p1_health,
+            game_state.player2.x_coord,
+            game_state.player2.y_coord,
+            game_state.player2.health,
+            self.prev_p2_health,
+            distance,
+            relative_x,
+            relative_y,
+            current_command,
+            self.prev_command,
+            self.prev2_command,
+            self.prev3_command,
+            damage_dealt,
+            damage_taken,
+            command_duration
+        )
+        
+        # Append to CSV
+        self.writer.write_row(row)
+        for listener in self.listeners:
+            listener(row)
+            
+        # Update previous health values
+        self.prev_p1_health = game_state.player1.health
+        self.prev_p2_health = game_state.player2.health
+
+    def flush(self):
+        """Write any buffered rows to disk"""
+        self.writer.flush()
+
+    def close(self):
+        """Flush buffered rows and close the CSV file"""
+        self.writer.close()
\ No newline at end of file
@@ -0,0 +1,126 @@
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+from protocol import FRAMINGS, FrameReader, encode_message
+
+BUTTON_NAMES = ['Up', 'Down', 'Right', 'Left', 'Select', 'Start', 'Y', 'B', 'X', 'A', 'L', 'R']
+
+def synthetic_state_dict(rng, round_started=True):
+    """Build one game state dict in the format BizHawk sends (rng: numpy Generator or random.Random)"""
+    randint = rng.integers if hasattr(rng, 'integers') else lambda low, high: rng.randrange(low, high)
+
+    def player(character, x):
+        return {
+            'character': character,
+            'health': int(randint(1, 177)),
+            'x': x,
+            'y': int(randint(150, 200)),
+            'jumping': False,
+            'crouching': False,
+            'buttons': {name: False for name in BUTTON_NAMES},
+            'in_move': False,
+            'move': 0,
+        }
+    return {
+        'p1': player(0, int(randint(0, 400))),
+        'p2': player(7, int(randint(0, 400))),
+        'timer': int(randint(0, 100)),
+        'result': 0,
+        'round_started': round_started,
+        'round_over': False,
+    }
+
+class FakeEmulator:
+    """Stand-in for the BizHawk script: connects to the bot and streams synthetic game states.
+
+    fps=0 sends as fast as possible. chunking='split' cuts the byte stream at
+    random points and 'coalesce' packs several states into one send, which
+    reproduces the TCP splitting/coalescing the bot has to cope with.
+    """
+
+    def __init__(self, host='127.0.0.1', port=9999, framing='json', fps=60.0, frames=1000,
+                 chunking=None, seed=0):
+        self.host = host
+        self.port = port
+        self.framing = framing
+        self.fps = fps
+        self.frames = frames
+        self.chunking = chunking
+        self.rng = random.Random(seed)
+        self.replies = 0
+
+    def _payloads(self):
+        return [encode_message(json.dumps(synthetic_state_dict(self.rng)).encode(), self.framing)
+                for _ in range(self.frames)]
+
+    def _receive_replies(self, sock):
+        # Replies are command messages, not game states
+        reader = FrameReader(sock, self.framing, required_keys=())
+        while reader.read_all() is not None:
+            self.replies = reader.messages_received
+
+    def run(self):
+        """Stream all frames and return throughput statistics"""
+        payloads = self._payloads()
+        sock = socket.create_connection((self.host, self.port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        receiver = threading.Thread(target=self._receive_replies, args=(sock,), daemon=True)
+        receiver.start()
+
+        start = time.perf_counter()
+        if self.chunking == 'coalesce':
+            for i in range(0, len(payloads), 8):
+                sock.sendall(b''.join(payloads[i:i + 8]))
+                self._pace(start, i + 8)
+        elif self.chunking == 'split':
+            stream = b''.join(payloads)
+            pos = 0
+            sent_frames = 0
+            while pos < len(stream):
+                size = self.rng.randint(1, 600)
+                sock.sendall(stream[pos:pos + size])
+                pos += size
+                sent_frames = pos * len(payloads) // len(stream)
+                self._pace(start, sent_frames)
+        else:
+            for i, payload in enumerate(payloads):
+                sock.sendall(payload)
+                self._pace(start, i + 1)
+        elapsed = time.perf_counter() - start
+
+        # Let the bot answer what is still in flight, then hang up
+        time.sleep(0.2)
+        try:
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            # The bot already closed the connection
+            pass
+        receiver.join(timeout=5)
+        sock.close()
+        return {
+            'frames_sent': self.frames,
+            'replies': self.replies,
+            'send_seconds': elapsed,
+            'send_fps': self.frames / elapsed if elapsed else float('inf'),
+        }
+
+    def _pace(self, start, frames_sent):
+        if self.fps:
+            delay = start + frames_sent / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive a running bot (python controller.py) with synthetic game states")
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--framing', choices=FRAMINGS, default='json')
+    parser.add_argument('--fps', type=float, default=60.0, help="Frames per second (0 = as fast as possible)")
+    parser.add_argument('--frames', type=int, default=1000)
+    parser.add_argument('--chunking', choices=['split', 'coalesce'], default=None)
+    args = parser.parse_args()
+    emulator = FakeEmulator(port=args.port, framing=args.framing, fps=args.fps,
+                            frames=args.frames, chunking=args.chunking)
+    print(emulator.run())
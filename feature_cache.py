@@ -0,0 +1,270 @@
+import hashlib
+import io
+import json
+import os
+import numpy as np
+from frame_store import FrameStore, is_frame_store
+from ml_model import HISTORY_COLUMNS, build_numeric_block, one_hot_history
+
+# Training features cached next to the data, so retraining on unchanged (or
+# only appended-to) data skips parsing it again.
+#
+# The cache directory holds raw little-endian arrays that are only ever
+# appended to and are memory-mapped when read:
+#   numeric.f64  - the numeric feature block (build_numeric_block), one row per frame
+#   history.i32  - prev/prev2/prev3 command codes into the cache's vocabulary (-1 = none)
+#   labels.i32   - current_command codes
+# plus meta.json with the row count, the vocabulary (in first-seen order), the
+# running mean and sum of squared deviations (M2) per numeric column the scaler
+# statistics come from, and the fingerprint of the
+# data covered so far. Commands are stored as codes rather than one-hot
+# columns because the command mapping (and so the one-hot layout) changes
+# whenever new data brings a new command.
+
+CACHE_VERSION = 2
+META_FILE = 'meta.json'
+# Bytes hashed at the start of the data and just before the cached end, to detect rewrites
+FINGERPRINT_BYTES = 1 << 16
+
+def default_cache_dir(data_path):
+    return data_path.rstrip(os.sep) + '.features'
+
+def _hash_range(path, start, stop):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        digest.update(f.read(stop - start))
+    return digest.hexdigest()
+
+def _csv_fingerprint(path, covered):
+    return {
+        'head': _hash_range(path, 0, min(FINGERPRINT_BYTES, covered)),
+        'tail': _hash_range(path, max(0, covered - FINGERPRINT_BYTES), covered),
+    }
+
+def _merge_moments(n_rows, mean, m2, numeric):
+    """Per-column mean and M2 of n_rows rows summarized by (mean, m2) plus the rows of numeric.
+
+    Chan et al.'s pairwise update: unlike sums of squares it doesn't cancel
+    catastrophically on columns whose mean is large next to their spread.
+    """
+    chunk_mean = numeric.mean(axis=0)
+    chunk_m2 = np.square(numeric - chunk_mean).sum(axis=0)
+    if mean is None:
+        return chunk_mean, chunk_m2
+    mean = np.array(mean)
+    n_new = len(numeric)
+    total = n_rows + n_new
+    delta = chunk_mean - mean
+    return mean + delta * (n_new / total), np.array(m2) + chunk_m2 + delta ** 2 * (n_rows * n_new / total)
+
+class FeatureCache:
+    """Training feature matrix, labels and command mapping cached for one data file.
+
+    load_blocks() returns exactly what GameMLP.train builds from the data. On the
+    first call the whole file is parsed; afterwards only rows appended since
+    the last call are. A CSV counts as unchanged (or only appended to) when
+    its first and last cached bytes still hash the same and its mtime hasn't
+    changed without growing; a frame store is append-only, so its row count
+    is enough. Anything else rebuilds the cache from scratch.
+    """
+
+    def __init__(self, data_path, cache_dir=None):
+        self.data_path = data_path
+        self.cache_dir = cache_dir or default_cache_dir(data_path)
+        self.kind = 'frames' if is_frame_store(data_path) else 'csv'
+        self.meta = None
+        self.rows_parsed = 0
+
+    def _array_path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.cache_dir, META_FILE)) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if meta.get('version') != CACHE_VERSION or meta.get('kind') != self.kind:
+            return None
+        return meta
+
+    def _write_meta(self):
+        # Arrays are written before meta.json, which is replaced atomically, so a crash
+        # mid-update leaves extra bytes past the recorded row count and nothing else
+        tmp = os.path.join(self.cache_dir, META_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, os.path.join(self.cache_dir, META_FILE))
+
+    def _empty_meta(self):
+        return {
+            'version': CACHE_VERSION,
+            'kind': self.kind,
+            'rows': 0,
+            'covered': 0,
+            'mtime': None,
+            'fingerprint': None,
+            'vocab': [],
+            'numeric_mean': None,
+            'numeric_m2': None,
+        }
+
+    def _is_extension(self, meta):
+        """True if the data is what the cache covers, possibly with rows appended"""
+        if self.kind == 'frames':
+            return FrameStore(self.data_path).n_rows >= meta['covered']
+        size = os.path.getsize(self.data_path)
+        if size < meta['covered']:
+            return False
+        if size == meta['covered'] and os.path.getmtime(self.data_path) != meta['mtime']:
+            return False
+        return _csv_fingerprint(self.data_path, meta['covered']) == meta['fingerprint']
+
+    def _read_new_rows(self, covered):
+        """(DataFrame of rows after covered, new covered position)"""
+        import pandas as pd
+        if self.kind == 'frames':
+            store = FrameStore(self.data_path)
+            return store.to_dataframe(start=covered), store.n_rows
+
+        with open(self.data_path, 'rb') as f:
+            header = f.readline()
+            start = max(covered, f.tell())
+            f.seek(start)
+            data = f.read()
+        # Leave a partly written last line (a collector may be appending) for next time
+        end = data.rfind(b'\n') + 1
+        names = header.decode().strip().split(',')
+        df = pd.read_csv(io.BytesIO(data[:end]), header=None, names=names)
+        return df, start + end
+
+    def _encode(self, series, codes):
+        """Command codes of a column, adding commands not seen before to the vocabulary"""
+        vocab = self.meta['vocab']
+        missing = series.isna().to_numpy()
+        encoded = np.full(len(series), -1, dtype=np.int32)
+        values = series.to_numpy(dtype=object)[~missing]
+        if len(values):
+            uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+            lookup = np.empty(len(uniques), dtype=np.int32)
+            for i, value in enumerate(uniques):
+                if value not in codes:
+                    codes[value] = len(vocab)
+                    vocab.append(value)
+                lookup[i] = codes[value]
+            encoded[~missing] = lookup[inverse]
+        return encoded
+
+    def update(self):
+        """Bring the cache up to date with the data; returns the number of rows parsed"""
+        meta = self._read_meta()
+        if meta is None or not self._is_extension(meta):
+            meta = self._empty_meta()
+        self.meta = meta
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        df, covered = self._read_new_rows(meta['covered'])
+        n_new = len(df)
+        arrays = {'numeric.f64': None, 'history.i32': None, 'labels.i32': None}
+        if n_new:
+            numeric = build_numeric_block(df)
+            codes = {cmd: code for code, cmd in enumerate(meta['vocab'])}
+            history = np.stack([self._encode(df[column], codes) for column in HISTORY_COLUMNS], axis=1)
+            labels = self._encode(df['current_command'], codes)
+            arrays = {'numeric.f64': numeric, 'history.i32': history, 'labels.i32': labels}
+        for name, array in arrays.items():
+            path = self._array_path(name)
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                # Drop anything past the recorded rows (left by an interrupted update) before appending
+                f.truncate(meta['rows'] * self._row_bytes(name, meta))
+                f.seek(0, os.SEEK_END)
+                if array is not None:
+                    f.write(np.ascontiguousarray(array, dtype=self._dtype(name)).tobytes())
+
+        if n_new:
+            mean, m2 = _merge_moments(meta['rows'], meta['numeric_mean'], meta['numeric_m2'], numeric)
+            meta['numeric_mean'] = mean.tolist()
+            meta['numeric_m2'] = m2.tolist()
+            meta['n_numeric'] = numeric.shape[1]
+        meta['rows'] += n_new
+        meta['covered'] = covered
+        if self.kind == 'csv':
+            meta['mtime'] = os.path.getmtime(self.data_path)
+            meta['fingerprint'] = _csv_fingerprint(self.data_path, covered)
+        self._write_meta()
+        self.rows_parsed = n_new
+        return n_new
+
+    @staticmethod
+    def _dtype(name):
+        return np.dtype('<f8') if name.endswith('.f64') else np.dtype('<i4')
+
+    def _row_bytes(self, name, meta):
+        if name == 'numeric.f64':
+            return 8 * meta.get('n_numeric', 0)
+        if name == 'history.i32':
+            return 4 * len(HISTORY_COLUMNS)
+        return 4
+
+    def arrays(self):
+        """Memory-mapped (read-only) numeric block, history codes and label codes"""
+        meta = self.meta
+        rows = meta['rows']
+        if rows == 0:
+            return np.empty((0, 0)), np.empty((0, len(HISTORY_COLUMNS)), dtype=np.int32), np.empty(0, dtype=np.int32)
+        numeric = np.memmap(self._array_path('numeric.f64'), dtype='<f8', mode='r', shape=(rows, meta['n_numeric']))
+        history = np.memmap(self._array_path('history.i32'), dtype='<i4', mode='r',
+                            shape=(rows, len(HISTORY_COLUMNS)))
+        labels = np.memmap(self._array_path('labels.i32'), dtype='<i4', mode='r', shape=(rows,))
+        return numeric, history, labels
+
+    def load_blocks(self):
+        """Update the cache, then return (numeric, indices, y, command_mapping, scaler) for GameMLP.train.
+
+        numeric is the unscaled numeric block and indices the prev/prev2/prev3
+        command indices into command_mapping (-1 = none), which together hold
+        what build_feature_matrix would expand into one-hot columns. scaler is a
+        StandardScaler for the numeric block, fitted from the cached sums, so
+        the caller doesn't need another pass over the data to fit it.
+        """
+        self.update()
+        numeric, history, labels = self.arrays()
+        vocab = self.meta['vocab']
+        # Like GameMLP.train: the mapping is every command that appears as a label, sorted
+        present = np.unique(labels)
+        commands = sorted(vocab[code] for code in present)
+        command_mapping = {cmd: idx for idx, cmd in enumerate(commands)}
+
+        # Cache codes -> mapping indices (-1 for commands that never appear as a label)
+        to_index = np.full(len(vocab) + 1, -1, dtype=np.int64)
+        for code, cmd in enumerate(vocab):
+            to_index[code] = command_mapping.get(cmd, -1)
+        # Code -1 indexes the trailing -1
+        indices = to_index[history]
+        y = to_index[labels]
+        return numeric, indices, y, command_mapping, self._scaler()
+
+    def load(self):
+        """Like load_blocks, but with the history expanded: (X, y, command_mapping, scaler).
+
+        X is the unscaled feature matrix build_feature_matrix would produce;
+        scaler covers its numeric columns.
+        """
+        numeric, indices, y, command_mapping, scaler = self.load_blocks()
+        X = np.hstack([numeric] + one_hot_history(indices, len(command_mapping)))
+        return X, y, command_mapping, scaler
+
+    def _scaler(self):
+        from sklearn.preprocessing import StandardScaler
+        rows = self.meta['rows']
+        scaler = StandardScaler()
+        scaler.mean_ = np.array(self.meta['numeric_mean'])
+        scaler.var_ = np.array(self.meta['numeric_m2']) / rows
+        # Constant columns are left unscaled, as StandardScaler.fit does
+        scale = np.sqrt(scaler.var_)
+        scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+        scaler.scale_ = scale
+        scaler.n_samples_seen_ = rows
+        scaler.n_features_in_ = len(scale)
+        return scaler
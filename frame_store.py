@@ -0,0 +1,302 @@
+import atexit
+import json
+import os
+import sys
+import time
+import numpy as np
+
+# Columnar storage for collected frames.
+#
+# A frame store is a directory holding one raw little-endian file per column
+# (<column>.bin) plus meta.json with the column dtypes and the command
+# dictionary. Command columns are stored as int16 codes into that dictionary
+# (-1 for "no command"), numeric columns as int32 or float64 (values that an
+# int32 column can't hold exactly are rejected, never truncated). Columns are only
+# ever appended to, so readers memory-map them and use the shortest column as
+# the row count (a crash mid-flush can leave one column a batch ahead).
+
+META_FILE = 'meta.json'
+COMMAND_COLUMNS = ('current_command', 'prev_command', 'prev2_command', 'prev3_command')
+FLOAT_COLUMNS = ('distance',)
+NO_COMMAND = -1
+
+INT32_RANGE = (np.iinfo(np.int32).min, np.iinfo(np.int32).max)
+
+def column_dtype(name):
+    """Storage dtype of a collector column"""
+    if name in COMMAND_COLUMNS:
+        return np.dtype('<i2')
+    if name in FLOAT_COLUMNS:
+        return np.dtype('<f8')
+    return np.dtype('<i4')
+
+def _fits_int32(values):
+    """True if every value of a numeric array is a whole number in int32 range (no NaN)"""
+    if values.dtype.kind == 'b':
+        return True
+    if values.dtype.kind in 'iu':
+        return not len(values) or (values.min() >= INT32_RANGE[0] and values.max() <= INT32_RANGE[1])
+    with np.errstate(invalid='ignore'):
+        return bool(np.all((values == np.round(values)) & (values >= INT32_RANGE[0]) & (values <= INT32_RANGE[1])))
+
+def _numeric_array(name, values, dtype):
+    """values as an array of a numeric column's storage dtype; raises instead of losing precision"""
+    array = np.asarray(values)
+    if array.dtype == object:
+        # Rows from the collector; None (a missing value) becomes NaN
+        array = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    if dtype.kind == 'i' and not _fits_int32(array):
+        raise ValueError(f"Column {name} has values an {dtype.name} column can't store exactly (fractions, "
+                         f"missing or out of range); create the store with dtypes={{{name!r}: '<f8'}}")
+    return array.astype(dtype)
+
+def infer_dtypes(chunks):
+    """Storage dtypes for the numeric columns of an iterable of DataFrames.
+
+    int32 where every value is a whole number in range, float64 otherwise.
+    """
+    fits = {}
+    for chunk in chunks:
+        for name in chunk.columns:
+            if name in COMMAND_COLUMNS:
+                continue
+            values = chunk[name].to_numpy()
+            if values.dtype == object:
+                values = values.astype(np.float64)
+            fits[name] = fits.get(name, True) and _fits_int32(values)
+    return {name: np.dtype('<i4') if fit else np.dtype('<f8') for name, fit in fits.items()}
+
+def is_frame_store(path):
+    """True if path is a frame store directory"""
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+def _write_meta(path, meta):
+    # Write to a temp file and rename so readers never see a half-written meta.json
+    tmp = os.path.join(path, META_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(path, META_FILE))
+
+class FrameStoreWriter:
+    """Append frames to a frame store, buffering rows and writing them column by column.
+
+    Has the same interface as BufferedCSVWriter so GameDataCollector (and its
+    background writer thread) can use either. dtypes ({column: dtype}) overrides
+    column_dtype for a new store; an existing store keeps the dtypes it has.
+    """
+
+    def __init__(self, path, headers, flush_rows=4096, flush_interval=1.0, fsync=False, dtypes=None):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        if is_frame_store(path):
+            with open(os.path.join(path, META_FILE)) as f:
+                self.meta = json.load(f)
+            stored = [column['name'] for column in self.meta['columns']]
+            if stored != list(headers):
+                raise ValueError(f"Frame store {path} has columns {stored}, expected {list(headers)}")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.meta = {
+                'version': 1,
+                'columns': [{'name': name, 'dtype': np.dtype((dtypes or {}).get(name, column_dtype(name))).str}
+                            for name in headers],
+                'commands': [],
+            }
+            _write_meta(path, self.meta)
+
+        self.headers = list(headers)
+        self.dtypes = [np.dtype(column['dtype']) for column in self.meta['columns']]
+        self.command_codes = {cmd: code for code, cmd in enumerate(self.meta['commands'])}
+
+        # Drop any partial batch a crash left in the longer columns so all columns line up
+        self.rows_written = FrameStore(path).n_rows
+        self._files = []
+        for name, dtype in zip(self.headers, self.dtypes):
+            f = open(os.path.join(path, f"{name}.bin"), 'ab')
+            f.truncate(self.rows_written * dtype.itemsize)
+            self._files.append(f)
+        self._pending = []
+        self._last_flush = time.monotonic()
+        atexit.register(self.close)
+
+    def encode_commands(self, values):
+        """Dictionary-encode command strings as int16 codes, growing the dictionary if needed"""
+        codes = np.empty(len(values), dtype='<i2')
+        added = False
+        for i, cmd in enumerate(values):
+            if cmd is None or cmd != cmd:  # None or NaN from pandas
+                codes[i] = NO_COMMAND
+                continue
+            code = self.command_codes.get(cmd)
+            if code is None:
+                code = len(self.meta['commands'])
+                self.meta['commands'].append(cmd)
+                self.command_codes[cmd] = code
+                added = True
+            codes[i] = code
+        if added:
+            # The dictionary must be on disk before any code that refers to it
+            _write_meta(self.path, self.meta)
+        return codes
+
+    def write_row(self, row):
+        """Queue one row (a sequence in header order) and flush if the batch is due"""
+        self._pending.append(row)
+        if len(self._pending) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def append_columns(self, columns):
+        """Append a batch given as {column name: sequence of values} (e.g. a DataFrame).
+
+        Command columns may be pandas Categoricals, which are encoded per category
+        instead of per row.
+        """
+        self.flush()
+        n_rows = len(columns[self.headers[0]])
+        # Convert every column before writing any, so a rejected batch leaves the columns aligned
+        arrays = []
+        for name, dtype in zip(self.headers, self.dtypes):
+            values = columns[name]
+            categorical = getattr(values, 'cat', values)
+            if name in COMMAND_COLUMNS and hasattr(categorical, 'categories'):
+                # Categorical column: encode each category once and remap the codes
+                lookup = np.append(self.encode_commands(list(categorical.categories)), NO_COMMAND)
+                array = lookup[np.asarray(categorical.codes)].astype(dtype)
+            elif name in COMMAND_COLUMNS:
+                array = self.encode_commands(list(values))
+            else:
+                array = _numeric_array(name, values, dtype)
+            arrays.append(array)
+        for array, f in zip(arrays, self._files):
+            f.write(array.tobytes())
+        self.rows_written += n_rows
+        self._sync()
+
+    def flush(self):
+        """Write all pending rows to disk"""
+        if self._files is None:
+            return
+        if self._pending:
+            columns = list(zip(*self._pending))
+            # Convert every column before writing any, so a rejected batch leaves the columns aligned
+            try:
+                arrays = [self.encode_commands(values) if name in COMMAND_COLUMNS
+                          else _numeric_array(name, values, dtype)
+                          for name, dtype, values in zip(self.headers, self.dtypes, columns)]
+            except ValueError:
+                # Drop the rejected rows, or every later flush (and close) would fail on them again
+                self._pending = []
+                raise
+            for array, f in zip(arrays, self._files):
+                f.write(array.tobytes())
+            self.rows_written += len(self._pending)
+            self._pending = []
+        self._sync()
+
+    def _sync(self):
+        for f in self._files:
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush the last partial batch and close the column files"""
+        if self._files is None:
+            return
+        self.flush()
+        for f in self._files:
+            f.close()
+        self._files = None
+        atexit.unregister(self.close)
+
+class FrameStore:
+    """Read-only view of a frame store with memory-mapped columns"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.columns = [column['name'] for column in self.meta['columns']]
+        self.dtypes = {column['name']: np.dtype(column['dtype']) for column in self.meta['columns']}
+        self.commands = list(self.meta['commands'])
+
+        # Row count is the length of the shortest column
+        sizes = []
+        for name in self.columns:
+            file_path = os.path.join(path, f"{name}.bin")
+            size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            sizes.append(size // self.dtypes[name].itemsize)
+        self.n_rows = min(sizes) if sizes else 0
+
+    def __len__(self):
+        return self.n_rows
+
+    def column(self, name, start=0, stop=None):
+        """Memory-mapped (read-only) slice of a column; command columns are int16 codes"""
+        stop = self.n_rows if stop is None else min(stop, self.n_rows)
+        if stop <= start:
+            return np.empty(0, dtype=self.dtypes[name])
+        data = np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=self.dtypes[name],
+                         mode='r', shape=(self.n_rows,))
+        return data[start:stop]
+
+    def decode_commands(self, codes):
+        """Turn int16 command codes back into strings (None for no command)"""
+        lookup = np.array(self.commands + [None], dtype=object)
+        # NO_COMMAND (-1) indexes the trailing None
+        return lookup[codes]
+
+    def to_dataframe(self, columns=None, start=0, stop=None):
+        """Load rows [start, stop) as a DataFrame with the same columns as the CSV"""
+        import pandas as pd
+        data = {}
+        for name in columns or self.columns:
+            values = self.column(name, start, stop)
+            if name in COMMAND_COLUMNS:
+                data[name] = self.decode_commands(values)
+            else:
+                data[name] = np.array(values)
+        return pd.DataFrame(data)
+
+def load_frames(path):
+    """Load training frames from either a CSV file or a frame store directory"""
+    if is_frame_store(path):
+        return FrameStore(path).to_dataframe()
+    import pandas as pd
+    return pd.read_csv(path)
+
+def iter_frame_chunks(path, chunksize=100000, columns=None):
+    """Yield training frames from a CSV file or frame store as DataFrames of at most chunksize rows"""
+    if is_frame_store(path):
+        store = FrameStore(path)
+        for start in range(0, store.n_rows, chunksize):
+            yield store.to_dataframe(columns, start, start + chunksize)
+        return
+    import pandas as pd
+    yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+def convert_csv(csv_path, store_path, chunksize=100000):
+    """Convert a collector CSV file into a frame store.
+
+    Column dtypes come from a first pass over the data: a column is stored as
+    int32 only if every value in it is a whole number, else as float64.
+    """
+    import pandas as pd
+    headers = list(pd.read_csv(csv_path, nrows=0).columns)
+    dtypes = infer_dtypes(pd.read_csv(csv_path, chunksize=chunksize))
+    writer = FrameStoreWriter(store_path, headers, dtypes=dtypes)
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        writer.append_columns(chunk)
+    writer.close()
+    return writer.rows_written
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python frame_store.py <training_data.csv> <output.frames>")
+        sys.exit(1)
+    rows = convert_csv(sys.argv[1], sys.argv[2])
+    print(f"Converted {rows} rows from {sys.argv[1]} into {sys.argv[2]}")
@@ -2,6 +2,8 @@ from player import Player
 
 class GameState:
 
+    __slots__ = ('player1', 'player2', 'timer', 'fight_result', 'has_round_started', 'is_round_over')
+
     def __init__(self, input_dict):
 
         self.dict_to_object(input_dict)
@@ -13,4 +15,4 @@ class GameState:
         self.timer = input_dict['timer']
         self.fight_result = input_dict['result']
         self.has_round_started = input_dict['round_started']
-        self.is_round_over = input_dict['round_over']
\ No newline at end of file
+        self.is_round_over = input_dict['round_over']
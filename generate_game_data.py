@@ -1,218 +1,635 @@
-import pandas as pd
-import numpy as np
-import random
-from datetime import datetime
-
-def generate_game_data(num_frames=1000, output_file='synthetic_game_data.csv'):
-    # Initialize lists to store data
-    data = []
-    
-    # Game state parameters
-    screen_width = 400
-    screen_height = 300
-    max_health = 176
-    min_health = 0
-    timer = 99
-    
-    # Initialize player positions and states
-    p1_x = random.randint(50, 150)
-    p1_y = 192  # Ground level
-    p2_x = random.randint(250, 350)
-    p2_y = 192  # Ground level
-    p1_health = max_health
-    p2_health = max_health
-    
-    # Movement parameters
-    move_speed = 5
-    jump_height = 30
-    jump_duration = 10
-    
-    # State tracking
-    p1_is_jumping = False
-    p1_jump_counter = 0
-    p1_is_crouching = False
-    p1_is_in_move = False
-    p2_is_jumping = False
-    p2_jump_counter = 0
-    p2_is_crouching = False
-    p2_is_in_move = False
-    
-    # Define move sequences from the bot
-    move_sequences = {
-        'approach_right': [">", "-", "!>", "v+>", "-", "!v+!>", "v", "-", "!v", "v+<", "-", "!v+!<", "<+Y", "-", "!<+!Y"],
-        'approach_left': ["<", "-", "!<", "v+<", "-", "!v+!<", "v", "-", "!v", "v+>", "-", "!v+!>", ">+Y", "-", "!>+!Y"],
-        'jump_attack_right': [">+^+B", ">+^+B", "!>+!^+!B"],
-        'jump_attack_left': ["<+^+B", "<+^+B", "!<+!^+!B"],
-        'close_combat': ["v+R", "v+R", "v+R", "!v+!R"],
-        'back_off_right': [">", ">", "!>"],
-        'back_off_left': ["<", "<", "!<"]
-    }
-    
-    current_sequence = []
-    sequence_index = 0
-    sequence_delay = 0
-    
-    # Generate frames
-    for frame in range(num_frames):
-        # Calculate distance between players
-        distance = abs(p1_x - p2_x)
-        diff = p2_x - p1_x
-        
-        # Initialize button states
-        buttons = {
-            'p1_up': False,
-            'p1_down': False,
-            'p1_right': False,
-            'p1_left': False,
-            'p1_Y': False,
-            'p1_B': False,
-            'p1_X': False,
-            'p1_A': False,
-            'p1_L': False,
-            'p1_R': False
-        }
-        
-        # Select and execute move sequences based on distance
-        if len(current_sequence) == 0:
-            if diff > 60:
-                toss = random.randint(0, 2)
-                if toss == 0:
-                    current_sequence = move_sequences['approach_right'].copy()
-                elif toss == 1:
-                    current_sequence = move_sequences['jump_attack_right'].copy()
-                else:
-                    current_sequence = move_sequences['approach_left'].copy()
-            elif diff < -60:
-                toss = random.randint(0, 2)
-                if toss == 0:
-                    current_sequence = move_sequences['approach_left'].copy()
-                elif toss == 1:
-                    current_sequence = move_sequences['jump_attack_left'].copy()
-                else:
-                    current_sequence = move_sequences['approach_right'].copy()
-            else:
-                toss = random.randint(0, 1)
-                if toss == 1:
-                    if diff > 0:
-                        current_sequence = move_sequences['back_off_left'].copy()
-                    else:
-                        current_sequence = move_sequences['back_off_right'].copy()
-                else:
-                    current_sequence = move_sequences['close_combat'].copy()
-        
-        # Execute current move in sequence
-        if len(current_sequence) > 0:
-            current_move = current_sequence[0]
-            
-            # Parse and execute the move
-            if "+" in current_move:
-                parts = current_move.split("+")
-                for part in parts:
-                    if part == "v":
-                        buttons['p1_down'] = True
-                    elif part == "!v":
-                        buttons['p1_down'] = False
-                    elif part == "<":
-                        buttons['p1_left'] = True
-                    elif part == "!<":
-                        buttons['p1_left'] = False
-                    elif part == ">":
-                        buttons['p1_right'] = True
-                    elif part == "!>":
-                        buttons['p1_right'] = False
-                    elif part == "^":
-                        buttons['p1_up'] = True
-                    elif part == "!^":
-                        buttons['p1_up'] = False
-                    elif part == "Y":
-                        buttons['p1_Y'] = True
-                    elif part == "!Y":
-                        buttons['p1_Y'] = False
-                    elif part == "B":
-                        buttons['p1_B'] = True
-                    elif part == "!B":
-                        buttons['p1_B'] = False
-                    elif part == "R":
-                        buttons['p1_R'] = True
-                    elif part == "!R":
-                        buttons['p1_R'] = False
-            else:
-                if current_move == "v":
-                    buttons['p1_down'] = True
-                elif current_move == "!v":
-                    buttons['p1_down'] = False
-                elif current_move == "<":
-                    buttons['p1_left'] = True
-                elif current_move == "!<":
-                    buttons['p1_left'] = False
-                elif current_move == ">":
-                    buttons['p1_right'] = True
-                elif current_move == "!>":
-                    buttons['p1_right'] = False
-                elif current_move == "^":
-                    buttons['p1_up'] = True
-                elif current_move == "!^":
-                    buttons['p1_up'] = False
-            
-            # Update positions based on button presses
-            if buttons['p1_right']:
-                p1_x += move_speed
-            if buttons['p1_left']:
-                p1_x -= move_speed
-            if buttons['p1_up']:
-                p1_y -= jump_height / jump_duration
-            if buttons['p1_down']:
-                p1_y += jump_height / jump_duration
-            
-            # Remove the executed move
-            current_sequence.pop(0)
-        
-        # Random opponent movement
-        p2_x += random.randint(-3, 3)
-        p2_x = max(50, min(screen_width - 50, p2_x))
-        
-        # Calculate movement speeds
-        p1_speed = move_speed if buttons['p1_right'] or buttons['p1_left'] else 0
-        p2_speed = abs(p2_x - (p2_x - random.randint(-3, 3)))
-        
-        # Create row data
-        row = {
-            'p1_id': 0,
-            'p1_health': p1_health,
-            'p1_x': p1_x,
-            'p1_y': p1_y,
-            'p1_is_jumping': buttons['p1_up'],
-            'p1_is_crouching': buttons['p1_down'],
-            'p1_is_in_move': buttons['p1_right'] or buttons['p1_left'],
-            'p1_up': buttons['p1_up'],
-            'p1_down': buttons['p1_down'],
-            'p1_right': buttons['p1_right'],
-            'p1_left': buttons['p1_left'],
-            'p1_Y': buttons['p1_Y'],
-            'p1_B': buttons['p1_B'],
-            'p1_X': buttons['p1_X'],
-            'p1_A': buttons['p1_A'],
-            'p1_L': buttons['p1_L'],
-            'p1_R': buttons['p1_R'],
-            'p2_id': 7,
-            'p2_health': p2_health,
-            'p2_x': p2_x,
-            'p2_y': p2_y,
-            'distance_between_players': distance,
-            'health_difference': p1_health - p2_health,
-            'p1_winning': p1_health > p2_health,
-            'p2_winning': p2_health > p1_health,
-            'time_remaining': timer - (frame // 60),
-            'p1_movement_speed': p1_speed,
-            'p2_movement_speed': p2_speed
-        }
-        
-        data.append(row)
-    
-    # Create DataFrame and save to CSV
-    df = pd.DataFrame(data)
-    df.to_csv(output_file, index=False)
-    print(f"Generated {num_frames} frames of game data and saved to {output_file}")
-
-if __name__ == "__main__":
-    generate_game_data() 
\ No newline at end of file
+import pandas as pd
+import numpy as np
+import random
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# Move sequences from the bot
+MOVE_SEQUENCES = {
+    'approach_right': [">", "-", "!>", "v+>", "-", "!v+!>", "v", "-", "!v", "v+<", "-", "!v+!<", "<+Y", "-", "!<+!Y"],
+    'approach_left': ["<", "-", "!<", "v+<", "-", "!v+!<", "v", "-", "!v", "v+>", "-", "!v+!>", ">+Y", "-", "!>+!Y"],
+    'jump_attack_right': [">+^+B", ">+^+B", "!>+!^+!B"],
+    'jump_attack_left': ["<+^+B", "<+^+B", "!<+!^+!B"],
+    'close_combat': ["v+R", "v+R", "v+R", "!v+!R"],
+    'back_off_right': [">", ">", "!>"],
+    'back_off_left': ["<", "<", "!<"]
+}
+
+# The round timer counts down from 99 to 0, one step per ROUND_TIMER_FRAMES frames, then a new round starts
+ROUND_TIMER_START = 99
+ROUND_TIMER_FRAMES = 60
+ROUND_FRAMES = (ROUND_TIMER_START + 1) * ROUND_TIMER_FRAMES
+# A best-of-three match that goes the distance
+MATCH_FRAMES = 3 * ROUND_FRAMES
+
+def round_timer(frame):
+    """Timer value at a frame (int or array) of a match, restarting at 99 every round"""
+    return ROUND_TIMER_START - (frame % ROUND_FRAMES) // ROUND_TIMER_FRAMES
+
+# Buttons the simulator tracks, as bits of a per-frame button mask
+SIM_BUTTONS = {'^': 1, 'v': 2, '>': 4, '<': 8, 'Y': 16, 'B': 32, 'R': 64}
+
+# Sequence ids for the vectorized simulator (index into SEQUENCE_NAMES)
+SEQUENCE_NAMES = list(MOVE_SEQUENCES)
+SEQ = {name: i for i, name in enumerate(SEQUENCE_NAMES)}
+
+def _compile_move(move):
+    """Buttons held during a move like ">+^+B" as a mask ("-" and "!x" press nothing)"""
+    mask = 0
+    for part in move.split("+"):
+        if part.startswith("!"):
+            mask &= ~SIM_BUTTONS.get(part[1:], 0)
+        else:
+            mask |= SIM_BUTTONS.get(part, 0)
+    return mask
+
+def compile_move_sequences(move_sequences=MOVE_SEQUENCES):
+    """(masks, lengths): one row of button masks per sequence, padded to the longest sequence"""
+    longest = max(len(moves) for moves in move_sequences.values())
+    masks = np.zeros((len(move_sequences), longest), dtype=np.int16)
+    lengths = np.zeros(len(move_sequences), dtype=np.int64)
+    for i, moves in enumerate(move_sequences.values()):
+        masks[i, :len(moves)] = [_compile_move(move) for move in moves]
+        lengths[i] = len(moves)
+    return masks, lengths
+
+SEQUENCE_MASKS, SEQUENCE_LENGTHS = compile_move_sequences()
+
+# Command recorded for each move (as an index into COLLECTOR_COMMANDS); a wait step "-" is "neutral"
+COLLECTOR_COMMANDS = sorted({"neutral"} | {move for moves in MOVE_SEQUENCES.values() for move in moves} - {"-"})
+SEQUENCE_COMMANDS = np.full(SEQUENCE_MASKS.shape, COLLECTOR_COMMANDS.index("neutral"), dtype=np.int16)
+for _i, _moves in enumerate(MOVE_SEQUENCES.values()):
+    SEQUENCE_COMMANDS[_i, :len(_moves)] = [COLLECTOR_COMMANDS.index(move if move != "-" else "neutral")
+                                           for move in _moves]
+# Sequence picked for each toss when the opponent is far right / far left (same order as the scalar code)
+FAR_RIGHT_CHOICES = np.array([SEQ['approach_right'], SEQ['jump_attack_right'], SEQ['approach_left']])
+FAR_LEFT_CHOICES = np.array([SEQ['approach_left'], SEQ['jump_attack_left'], SEQ['approach_right']])
+
+def _simulate_match(rng, num_frames):
+    """Yield one row dict per frame of a simulated match.
+
+    rng is the random module itself or a random.Random instance, so the same
+    simulation serves the sequential generator and seeded parallel shards.
+    """
+    # Game state parameters
+    screen_width = 400
+    screen_height = 300
+    max_health = 176
+    min_health = 0
+    
+    # Initialize player positions and states
+    p1_x = rng.randint(50, 150)
+    p1_y = 192  # Ground level
+    p2_x = rng.randint(250, 350)
+    p2_y = 192  # Ground level
+    p1_health = max_health
+    p2_health = max_health
+    
+    # Movement parameters
+    move_speed = 5
+    jump_height = 30
+    jump_duration = 10
+    
+    # State tracking
+    p1_is_jumping = False
+    p1_jump_counter = 0
+    p1_is_crouching = False
+    p1_is_in_move = False
+    p2_is_jumping = False
+    p2_jump_counter = 0
+    p2_is_crouching = False
+    p2_is_in_move = False
+    
+    # Define move sequences from the bot
+    move_sequences = MOVE_SEQUENCES
+    
+    current_sequence = []
+    sequence_index = 0
+    sequence_delay = 0
+    
+    # Generate frames
+    for frame in range(num_frames):
+        # Calculate distance between players
+        distance = abs(p1_x - p2_x)
+        diff = p2_x - p1_x
+        
+        # Initialize button states
+        buttons = {
+            'p1_up': False,
+            'p1_down': False,
+            'p1_right': False,
+            'p1_left': False,
+            'p1_Y': False,
+            'p1_B': False,
+            'p1_X': False,
+            'p1_A': False,
+            'p1_L': False,
+            'p1_R': False
+        }
+        
+        # Select and execute move sequences based on distance
+        if len(current_sequence) == 0:
+            if diff > 60:
+                toss = rng.randint(0, 2)
+                if toss == 0:
+                    current_sequence = move_sequences['approach_right'].copy()
+                elif toss == 1:
+                    current_sequence = move_sequences['jump_attack_right'].copy()
+                else:
+                    current_sequence = move_sequences['approach_left'].copy()
+            elif diff < -60:
+                toss = rng.randint(0, 2)
+                if toss == 0:
+                    current_sequence = move_sequences['approach_left'].copy()
+                elif toss == 1:
+                    current_sequence = move_sequences['jump_attack_left'].copy()
+                else:
+                    current_sequence = move_sequences['approach_right'].copy()
+            else:
+                toss = rng.randint(0, 1)
+                if toss == 1:
+                    if diff > 0:
+                        current_sequence = move_sequences['back_off_left'].copy()
+                    else:
+                        current_sequence = move_sequences['back_off_right'].copy()
+                else:
+                    current_sequence = move_sequences['close_combat'].copy()
+        
+        # Execute current move in sequence
+        if len(current_sequence) > 0:
+            current_move = current_sequence[0]
+            
+            # Parse and execute the move
+            if "+" in current_move:
+                parts = current_move.split("+")
+                for part in parts:
+                    if part == "v":
+                        buttons['p1_down'] = True
+                    elif part == "!v":
+                        buttons['p1_down'] = False
+                    elif part == "<":
+                        buttons['p1_left'] = True
+                    elif part == "!<":
+                        buttons['p1_left'] = False
+                    elif part == ">":
+                        buttons['p1_right'] = True
+                    elif part == "!>":
+                        buttons['p1_right'] = False
+                    elif part == "^":
+                        buttons['p1_up'] = True
+                    elif part == "!^":
+                        buttons['p1_up'] = False
+                    elif part == "Y":
+                        buttons['p1_Y'] = True
+                    elif part == "!Y":
+                        buttons['p1_Y'] = False
+                    elif part == "B":
+                        buttons['p1_B'] = True
+                    elif part == "!B":
+                        buttons['p1_B'] = False
+                    elif part == "R":
+                        buttons['p1_R'] = True
+                    elif part == "!R":
+                        buttons['p1_R'] = False
+            else:
+                if current_move == "v":
+                    buttons['p1_down'] = True
+                elif current_move == "!v":
+                    buttons['p1_down'] = False
+                elif current_move == "<":
+                    buttons['p1_left'] = True
+                elif current_move == "!<":
+                    buttons['p1_left'] = False
+                elif current_move == ">":
+                    buttons['p1_right'] = True
+                elif current_move == "!>":
+                    buttons['p1_right'] = False
+                elif current_move == "^":
+                    buttons['p1_up'] = True
+                elif current_move == "!^":
+                    buttons['p1_up'] = False
+            
+            # Update positions based on button presses
+            if buttons['p1_right']:
+                p1_x += move_speed
+            if buttons['p1_left']:
+                p1_x -= move_speed
+            if buttons['p1_up']:
+                p1_y -= jump_height / jump_duration
+            if buttons['p1_down']:
+                p1_y += jump_height / jump_duration
+            
+            # Remove the executed move
+            current_sequence.pop(0)
+        
+        # Random opponent movement
+        p2_x += rng.randint(-3, 3)
+        p2_x = max(50, min(screen_width - 50, p2_x))
+        
+        # Calculate movement speeds
+        p1_speed = move_speed if buttons['p1_right'] or buttons['p1_left'] else 0
+        p2_speed = abs(p2_x - (p2_x - rng.randint(-3, 3)))
+        
+        # Create row data
+        row = {
+            'p1_id': 0,
+            'p1_health': p1_health,
+            'p1_x': p1_x,
+            'p1_y': p1_y,
+            'p1_is_jumping': buttons['p1_up'],
+            'p1_is_crouching': buttons['p1_down'],
+            'p1_is_in_move': buttons['p1_right'] or buttons['p1_left'],
+            'p1_up': buttons['p1_up'],
+            'p1_down': buttons['p1_down'],
+            'p1_right': buttons['p1_right'],
+            'p1_left': buttons['p1_left'],
+            'p1_Y': buttons['p1_Y'],
+            'p1_B': buttons['p1_B'],
+            'p1_X': buttons['p1_X'],
+            'p1_A': buttons['p1_A'],
+            'p1_L': buttons['p1_L'],
+            'p1_R': buttons['p1_R'],
+            'p2_id': 7,
+            'p2_health': p2_health,
+            'p2_x': p2_x,
+            'p2_y': p2_y,
+            'distance_between_players': distance,
+            'health_difference': p1_health - p2_health,
+            'p1_winning': p1_health > p2_health,
+            'p2_winning': p2_health > p1_health,
+            'time_remaining': round_timer(frame),
+            'p1_movement_speed': p1_speed,
+            'p2_movement_speed': p2_speed
+        }
+        
+        yield row
+
+def generate_game_data(num_frames=1000, output_file='synthetic_game_data.csv'):
+    # Simulate one match with the global random state
+    data = list(_simulate_match(random, num_frames))
+    
+    # Create DataFrame and save to CSV
+    df = pd.DataFrame(data)
+    df.to_csv(output_file, index=False)
+    print(f"Generated {num_frames} frames of game data and saved to {output_file}")
+
+# Rows held in memory per shard before they are appended to the shard file
+SHARD_CHUNK_ROWS = 50000
+
+def _write_chunk(rows, path, header):
+    df = pd.DataFrame(rows)
+    # Keep the same formatting in every chunk (p1_y only turns float once a player jumps)
+    df['p1_y'] = df['p1_y'].astype(float)
+    df.to_csv(path, mode='a', header=header, index=False)
+
+def _generate_shard(shard_seed, num_frames, path):
+    """Simulate one independent match and stream it to its own CSV file"""
+    rng = random.Random(shard_seed)
+    rows = []
+    header = True
+    for row in _simulate_match(rng, num_frames):
+        rows.append(row)
+        if len(rows) >= SHARD_CHUNK_ROWS:
+            _write_chunk(rows, path, header)
+            rows = []
+            header = False
+    if rows:
+        _write_chunk(rows, path, header)
+    return path
+
+def generate_game_data_parallel(num_frames=1000000, output_file='synthetic_game_data.csv',
+                                workers=None, seed=0, match_frames=100000):
+    """Generate num_frames across a process pool as independent matches of match_frames frames.
+
+    Every match (shard) gets its own RNG seeded from seed and its index, and
+    shards are concatenated in index order, so the output only depends on
+    seed, num_frames and match_frames (not on the number of workers or on
+    scheduling). Each worker streams its shard to disk in chunks instead of
+    holding all rows in memory.
+    """
+    workers = workers or os.cpu_count()
+    n_shards = max(1, -(-num_frames // match_frames))
+    shard_frames = [min(match_frames, num_frames - i * match_frames) for i in range(n_shards)]
+    shard_seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_shards)]
+
+    start = time.perf_counter()
+    shard_dir = output_file + '.shards'
+    os.makedirs(shard_dir, exist_ok=True)
+    paths = [os.path.join(shard_dir, f"shard_{i:05d}.csv") for i in range(n_shards)]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    with ProcessPoolExecutor(workers) as pool:
+        list(pool.map(_generate_shard, shard_seeds, shard_frames, paths))
+
+    # Concatenate the shards in order, keeping only the first header
+    with open(output_file, 'wb') as out:
+        for i, path in enumerate(paths):
+            with open(path, 'rb') as f:
+                if i > 0:
+                    f.readline()
+                shutil.copyfileobj(f, out)
+    shutil.rmtree(shard_dir)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {num_frames} frames in {n_shards} matches with {workers} workers "
+          f"in {elapsed:.1f}s ({num_frames / elapsed:.0f} frames/s) and saved to {output_file}")
+
+def _simulate_batch(rng, n_matches, num_frames):
+    """Step n_matches independent matches of num_frames frames at once with NumPy.
+
+    Follows the same rules as _simulate_match, but every match's positions,
+    health, current sequence and sequence cursor are arrays and each step
+    advances all matches together; moves come from the precompiled
+    SEQUENCE_MASKS instead of parsing move strings. rng is a
+    numpy.random.Generator. Returns per-frame state arrays ordered match by
+    match (all frames of match 0 first).
+    """
+    screen_width = 400
+    max_health = 176
+    move_speed = 5
+    step_y = 30 / 10  # jump_height / jump_duration
+
+    p1_x = rng.integers(50, 151, size=n_matches)
+    p1_y = np.full(n_matches, 192.0)
+    p2_x = rng.integers(250, 351, size=n_matches)
+    p1_health = np.full(n_matches, max_health)
+    p2_health = np.full(n_matches, max_health)
+    sequence = np.zeros(n_matches, dtype=np.int64)
+    # A cursor at the end of the sequence means a new one is picked this frame
+    cursor = np.full(n_matches, SEQUENCE_LENGTHS.max())
+
+    # All random draws for the whole block up front
+    toss3 = rng.integers(0, 3, size=(num_frames, n_matches))
+    toss2 = rng.integers(0, 2, size=(num_frames, n_matches))
+    p2_steps = rng.integers(-3, 4, size=(num_frames, n_matches))
+    p2_speed = np.abs(rng.integers(-3, 4, size=(num_frames, n_matches)))
+
+    out_p1_x = np.empty((num_frames, n_matches), dtype=np.int64)
+    out_p1_y = np.empty((num_frames, n_matches))
+    out_p2_x = np.empty((num_frames, n_matches), dtype=np.int64)
+    out_distance = np.empty((num_frames, n_matches), dtype=np.int64)
+    out_mask = np.empty((num_frames, n_matches), dtype=np.int16)
+    out_command = np.empty((num_frames, n_matches), dtype=np.int16)
+
+    for frame in range(num_frames):
+        diff = p2_x - p1_x
+        out_distance[frame] = np.abs(diff)
+
+        # Pick a new sequence for matches that finished theirs
+        done = cursor >= SEQUENCE_LENGTHS[sequence]
+        if done.any():
+            close = np.where(toss2[frame] == 1,
+                             np.where(diff > 0, SEQ['back_off_left'], SEQ['back_off_right']),
+                             SEQ['close_combat'])
+            picked = np.where(diff > 60, FAR_RIGHT_CHOICES[toss3[frame]],
+                              np.where(diff < -60, FAR_LEFT_CHOICES[toss3[frame]], close))
+            sequence = np.where(done, picked, sequence)
+            cursor = np.where(done, 0, cursor)
+
+        # Execute the current move
+        mask = SEQUENCE_MASKS[sequence, cursor]
+        out_command[frame] = SEQUENCE_COMMANDS[sequence, cursor]
+        cursor += 1
+        p1_x += move_speed * (((mask & SIM_BUTTONS['>']) != 0).astype(np.int64)
+                              - ((mask & SIM_BUTTONS['<']) != 0))
+        p1_y += step_y * (((mask & SIM_BUTTONS['v']) != 0).astype(np.float64)
+                          - ((mask & SIM_BUTTONS['^']) != 0))
+
+        # Random opponent movement
+        p2_x += p2_steps[frame]
+        np.clip(p2_x, 50, screen_width - 50, out=p2_x)
+
+        out_p1_x[frame] = p1_x
+        out_p1_y[frame] = p1_y
+        out_p2_x[frame] = p2_x
+        out_mask[frame] = mask
+
+    def flat(a):
+        return np.ascontiguousarray(a.T).ravel()
+
+    return {
+        'p1_x': flat(out_p1_x),
+        'p1_y': flat(out_p1_y),
+        'p1_health': np.repeat(p1_health, num_frames),
+        'p2_x': flat(out_p2_x),
+        'p2_y': np.full(n_matches * num_frames, 192),
+        'p2_health': np.repeat(p2_health, num_frames),
+        'distance': flat(out_distance),
+        'timer': np.tile(round_timer(np.arange(num_frames)), n_matches),
+        'mask': flat(out_mask),
+        'command': flat(out_command),
+        'p2_speed': flat(p2_speed),
+    }
+
+def simulate_matches(rng, n_matches, num_frames):
+    """Simulate n_matches matches with the NumPy simulator, returning the generate_game_data columns"""
+    state = _simulate_batch(rng, n_matches, num_frames)
+    mask = state['mask']
+    n_rows = len(mask)
+    up = (mask & SIM_BUTTONS['^']) != 0
+    down = (mask & SIM_BUTTONS['v']) != 0
+    right = (mask & SIM_BUTTONS['>']) != 0
+    left = (mask & SIM_BUTTONS['<']) != 0
+    in_move = right | left
+    health_1 = state['p1_health']
+    health_2 = state['p2_health']
+    false = np.zeros(n_rows, dtype=bool)
+    return {
+        'p1_id': np.zeros(n_rows, dtype=np.int64),
+        'p1_health': health_1,
+        'p1_x': state['p1_x'],
+        'p1_y': state['p1_y'],
+        'p1_is_jumping': up,
+        'p1_is_crouching': down,
+        'p1_is_in_move': in_move,
+        'p1_up': up,
+        'p1_down': down,
+        'p1_right': right,
+        'p1_left': left,
+        'p1_Y': (mask & SIM_BUTTONS['Y']) != 0,
+        'p1_B': (mask & SIM_BUTTONS['B']) != 0,
+        'p1_X': false,
+        'p1_A': false,
+        'p1_L': false,
+        'p1_R': (mask & SIM_BUTTONS['R']) != 0,
+        'p2_id': np.full(n_rows, 7),
+        'p2_health': health_2,
+        'p2_x': state['p2_x'],
+        'p2_y': state['p2_y'],
+        'distance_between_players': state['distance'],
+        'health_difference': health_1 - health_2,
+        'p1_winning': health_1 > health_2,
+        'p2_winning': health_2 > health_1,
+        'time_remaining': state['timer'],
+        'p1_movement_speed': np.where(in_move, 5, 0),
+        'p2_movement_speed': state['p2_speed'],
+    }
+
+def _shift_runs(values, run_match, k):
+    """values of the run k runs earlier in the same match (-1 where there is none)"""
+    shifted = np.full(len(values), -1, dtype=values.dtype)
+    if k < len(values):
+        same_match = run_match[k:] == run_match[:-k]
+        shifted[k:] = np.where(same_match, values[:-k], -1)
+    return shifted
+
+def simulate_collector_matches(rng, n_matches, num_frames):
+    """Simulate n_matches matches and return the columns GameDataCollector would record.
+
+    The result has the collector's headers in order and the same semantics as
+    feeding each frame to collect_frame_data with the executed move as
+    current_command: command history only advances when the command changes,
+    command_duration is timer - timer at the start of the previous command
+    (counted across round restarts), and damage is relative to the previous
+    frame (100 before the first one, as in the collector). Command columns are pandas Categoricals (missing
+    history is NaN). Wait steps ("-") are recorded as "neutral".
+    """
+    state = _simulate_batch(rng, n_matches, num_frames)
+    n_rows = n_matches * num_frames
+    match = np.repeat(np.arange(n_matches), num_frames)
+    first = np.zeros(n_rows, dtype=bool)
+    first[::num_frames] = True
+
+    p1_x = state['p1_x']
+    p1_y = state['p1_y']
+    p2_x = state['p2_x']
+    p2_y = state['p2_y']
+    p1_health = state['p1_health']
+    p2_health = state['p2_health']
+    timer = state['timer']
+
+    # Previous frame's health (the collector starts from 100)
+    p1_prev_health = np.where(first, 100, np.roll(p1_health, 1))
+    p2_prev_health = np.where(first, 100, np.roll(p2_health, 1))
+
+    # Runs of the same command; history advances at every change and at each match start
+    command = state['command']
+    change = first | (command != np.roll(command, 1))
+    run = np.cumsum(change) - 1
+    run_command = command[change]
+    run_match = match[change]
+    # Timer steps since the match started; unlike the timer it doesn't restart every round
+    ticks = np.tile(np.arange(num_frames) // ROUND_TIMER_FRAMES, n_matches)
+    run_start_ticks = ticks[change]
+    history = [_shift_runs(run_command, run_match, k)[run] for k in (1, 2, 3)]
+
+    # Duration is measured from the start of the previous frame's command
+    prev_run = np.where(first, 0, np.roll(run, 1))
+    command_duration = np.where(first, 0, run_start_ticks[prev_run] - ticks)
+
+    def categorical(codes):
+        return pd.Categorical.from_codes(codes, categories=COLLECTOR_COMMANDS)
+
+    columns = {
+        'timer': timer,
+        'player1_x': p1_x,
+        'player1_y': p1_y,
+        'player1_health': p1_health,
+        'player1_prev_health': p1_prev_health,
+        'player2_x': p2_x,
+        'player2_y': p2_y,
+        'player2_health': p2_health,
+        'player2_prev_health': p2_prev_health,
+        'distance': np.sqrt((p1_x - p2_x) ** 2 + (p1_y - p2_y) ** 2),
+        'relative_x': p2_x - p1_x,
+        'relative_y': p2_y - p1_y,
+        'current_command': categorical(command),
+        'prev_command': categorical(history[0]),
+        'prev2_command': categorical(history[1]),
+        'prev3_command': categorical(history[2]),
+        'damage_dealt': p2_prev_health - p2_health,
+        'damage_taken': p1_prev_health - p1_health,
+        'command_duration': command_duration,
+    }
+    # The collector skips frames where a player is already knocked out
+    alive = (p1_health > 0) & (p2_health > 0)
+    if not alive.all():
+        columns = {name: values[alive] for name, values in columns.items()}
+    return columns
+
+def generate_game_data_vectorized(num_frames=1000000, output_file='synthetic_game_data.csv',
+                                  seed=0, match_frames=MATCH_FRAMES, batch_matches=1024):
+    """Generate num_frames as matches of match_frames frames with the NumPy simulator.
+
+    Matches are simulated batch_matches at a time and each batch is appended
+    to the CSV, so memory is bounded by one batch.
+    """
+    rng = np.random.default_rng(seed)
+    n_matches = max(1, -(-num_frames // match_frames))
+    start = time.perf_counter()
+    written = 0
+    header = True
+    for first in range(0, n_matches, batch_matches):
+        batch = min(batch_matches, n_matches - first)
+        df = pd.DataFrame(simulate_matches(rng, batch, match_frames))
+        df = df.iloc[:num_frames - written]
+        df.to_csv(output_file, mode='w' if header else 'a', header=header, index=False)
+        written += len(df)
+        header = False
+    elapsed = time.perf_counter() - start
+    print(f"Generated {written} frames in {n_matches} matches in {elapsed:.1f}s "
+          f"({written / elapsed:.0f} frames/s) and saved to {output_file}")
+
+def generate_training_data(num_frames=1000000, output='training_data/training_data.csv', storage='csv',
+                           seed=0, match_frames=MATCH_FRAMES, batch_matches=256):
+    """Generate synthetic frames in the GameDataCollector schema, ready for GameMLP.train.
+
+    storage='csv' appends to a collector CSV file, storage='columnar' to a
+    frame store directory. Matches are simulated batch_matches at a time, so
+    memory is bounded by one batch.
+    """
+    from data_collector import COLLECTOR_HEADERS
+    from frame_store import FrameStoreWriter
+
+    rng = np.random.default_rng(seed)
+    n_matches = max(1, -(-num_frames // match_frames))
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    writer = FrameStoreWriter(output, COLLECTOR_HEADERS) if storage == 'columnar' else None
+    header = not os.path.exists(output)
+
+    start = time.perf_counter()
+    written = 0
+    for first in range(0, n_matches, batch_matches):
+        batch = min(batch_matches, n_matches - first)
+        df = pd.DataFrame(simulate_collector_matches(rng, batch, match_frames))
+        df = df.iloc[:num_frames - written]
+        if writer is not None:
+            writer.append_columns(df)
+        else:
+            df.to_csv(output, mode='a', header=header, index=False)
+            header = False
+        written += len(df)
+    if writer is not None:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"Generated {written} training frames in {n_matches} matches in {elapsed:.1f}s "
+          f"({written / elapsed:.0f} frames/s) into {output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic game data")
+    parser.add_argument('--frames', type=int, default=1000)
+    parser.add_argument('--output', default='synthetic_game_data.csv')
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Generate in parallel with this many processes (default: one sequential match)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for parallel generation")
+    parser.add_argument('--match-frames', type=int, default=None,
+                        help=f"Frames per match (default: {MATCH_FRAMES}, or 100000 per parallel shard)")
+    parser.add_argument('--vectorized', action='store_true', help="Simulate many matches at once with NumPy")
+    parser.add_argument('--training', choices=['csv', 'columnar'], default=None,
+                        help="Write GameDataCollector-format training data (CSV or frame store) instead")
+    args = parser.parse_args()
+    match_frames = {} if args.match_frames is None else {'match_frames': args.match_frames}
+    if args.training:
+        generate_training_data(args.frames, args.output, args.training, args.seed, **match_frames)
+    elif args.vectorized:
+        generate_game_data_vectorized(args.frames, args.output, args.seed, **match_frames)
+    elif args.workers:
+        generate_game_data_parallel(args.frames, args.output, args.workers, args.seed, **match_frames)
+    else:
+        generate_game_data(args.frames, args.output)
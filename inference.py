@@ -0,0 +1,361 @@
+import os
+import numpy as np
+
+# Number of numeric features that precede the one-hot command history
+N_NUMERIC_FEATURES = 14
+# Previous commands the model conditions on (one one-hot block each)
+HISTORY_LENGTH = 3
+# From this many commands on, a single frame looks up the history's first-layer
+# rows instead of multiplying the mostly-zero one-hot input; below it the dense
+# product takes fewer NumPy calls and is faster (see benchmark.py history_encoding)
+EMBEDDING_MIN_COMMANDS = 32
+
+# Format version of the .npz model export
+EXPORT_VERSION = 1
+
+# Numeric precisions the engine can run in (see CompiledMLP)
+PRECISIONS = ('float64', 'float32', 'int8')
+
+class CompiledMLP:
+    """Single-frame forward pass for a trained GameMLP using preallocated NumPy buffers.
+
+    The weights and biases are copied out of the MLPClassifier once, and the
+    StandardScaler is folded into the first layer so a frame goes straight
+    from raw features to probabilities.
+
+    precision='float32' runs the same network in single precision (half the
+    memory, faster matrix products). precision='int8' stores each layer's
+    weights as int8 with one float32 scale per output unit (an eighth of the
+    memory); the scaler is applied to the input instead of being folded in,
+    since folding would mix inputs of very different ranges in one weight
+    column. NumPy has no int8 matrix kernels, so int8 trades speed for size.
+    """
+
+    def __init__(self, model, scaler, command_mapping):
+        mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else None
+        scale = scaler.scale_ if getattr(scaler, 'scale_', None) is not None else None
+        # Column i of predict_proba is model.classes_[i]
+        reverse_mapping = {idx: cmd for cmd, idx in command_mapping.items()}
+        commands = [reverse_mapping[int(label)] for label in model.classes_]
+        self._setup(model.coefs_, model.intercepts_, mean, scale,
+                    model.activation, model.out_activation_, commands, command_mapping)
+
+    @classmethod
+    def from_arrays(cls, weights, biases, mean, scale, activation, out_activation, commands, command_mapping,
+                    precision='float64'):
+        """Build the engine from plain arrays (no scikit-learn objects needed)"""
+        engine = cls.__new__(cls)
+        engine._setup(weights, biases, mean, scale, activation, out_activation, commands, command_mapping,
+                      precision)
+        return engine
+
+    def _setup(self, weights, biases, mean, scale, activation, out_activation, commands, command_mapping,
+               precision='float64'):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        self.precision = precision
+        dtype = np.float64 if precision == 'float64' else np.float32
+        raw_weights = [np.array(w, dtype=np.float64) for w in weights]
+        raw_biases = [np.array(b, dtype=np.float64) for b in biases]
+        self.scaler_mean = None if mean is None else np.array(mean, dtype=np.float64)
+        self.scaler_scale = None if scale is None else np.array(scale, dtype=np.float64)
+        mean = 0.0 if self.scaler_mean is None else self.scaler_mean
+        scale = 1.0 if self.scaler_scale is None else self.scaler_scale
+        n_inputs = raw_weights[0].shape[0]
+        # Scalers fitted on the numeric columns only leave the one-hot history as is
+        if np.ndim(mean) and len(mean) < n_inputs:
+            mean = np.concatenate([mean, np.zeros(n_inputs - len(mean))])
+        if np.ndim(scale) and len(scale) < n_inputs:
+            scale = np.concatenate([scale, np.ones(n_inputs - len(scale))])
+
+        if precision == 'int8':
+            # Symmetric per-output-unit quantization: w ~= weights_q * weight_scales
+            scales = [np.abs(w).max(axis=0) / 127.0 for w in raw_weights]
+            scales = [np.where(s > 0, s, 1.0) for s in scales]
+            self.weights = [np.round(w / s).astype(np.int8) for w, s in zip(raw_weights, scales)]
+            self.weight_scales = [s.astype(np.float32) for s in scales]
+            self.biases = [b.astype(np.float32) for b in raw_biases]
+            self._input_mean = np.broadcast_to(np.asarray(mean, dtype=np.float32), (n_inputs,)).copy()
+            self._input_scale = np.broadcast_to(np.asarray(1.0 / scale, dtype=np.float32), (n_inputs,)).copy()
+            # The quantized weights are what gets exported
+            self.raw_weights = None
+            self.raw_biases = None
+        else:
+            # Unfolded parameters, kept for export. Folding starts from the rounded
+            # values, so a reloaded float32 export computes exactly the same thing
+            self.raw_weights = [w.astype(dtype) for w in raw_weights]
+            self.raw_biases = [b.astype(dtype) for b in raw_biases]
+            raw_weights = [w.astype(np.float64) for w in self.raw_weights]
+            raw_biases = [b.astype(np.float64) for b in self.raw_biases]
+
+            # Fold (x - mean) / scale into the first layer
+            folded = list(raw_weights)
+            biases = list(raw_biases)
+            first = folded[0] / np.reshape(scale, (-1, 1))
+            biases[0] = biases[0] - np.dot(mean / scale, folded[0])
+            folded[0] = first
+            self.weights = [w.astype(dtype) for w in folded]
+            self.biases = [b.astype(dtype) for b in biases]
+            self.weight_scales = None
+
+        self.activation = activation
+        self.out_activation = out_activation
+
+        self.commands = list(commands)
+        self.command_mapping = command_mapping
+        self.n_commands = len(command_mapping)
+        self.n_features = self.weights[0].shape[0]
+
+        # The first layer split into a numeric part and, per history position, an
+        # embedding table: row i is command i's weights (one-hot input times the
+        # weights picks out that row) and the extra last row, for no/unknown
+        # command (-1), is zeros. The first layer's bias is added into table 0.
+        self._w_numeric = None
+        self._embeddings = None
+        history_features = HISTORY_LENGTH * self.n_commands
+        if self.weight_scales is None and self.n_features == N_NUMERIC_FEATURES + history_features:
+            first = self.weights[0]
+            self._w_numeric = first[:N_NUMERIC_FEATURES]
+            self._embeddings = []
+            for col in range(HISTORY_LENGTH):
+                start = N_NUMERIC_FEATURES + col * self.n_commands
+                table = np.zeros((self.n_commands + 1, first.shape[1]), dtype=dtype)
+                table[:-1] = first[start:start + self.n_commands]
+                self._embeddings.append(table)
+            self._embeddings[0] += self.biases[0]
+        self.use_embeddings = self._embeddings is not None and self.n_commands >= EMBEDDING_MIN_COMMANDS
+
+        # Buffers reused on every frame
+        self._x = np.zeros(self.n_features, dtype=dtype)
+        self._x_numeric = self._x[:N_NUMERIC_FEATURES]
+        self._xs = np.empty(self.n_features, dtype=dtype)
+        self._layers = [np.empty(w.shape[1], dtype=dtype) for w in self.weights]
+        self._proba = np.empty(len(self.commands), dtype=dtype)
+        self._hot = []
+
+    def unfolded_parameters(self):
+        """(weights, biases) as float64 arrays in MLPClassifier layout (scaler not folded in)"""
+        if self.weight_scales is not None:
+            weights = [w.astype(np.float64) * s for w, s in zip(self.weights, self.weight_scales)]
+            return weights, [b.astype(np.float64) for b in self.biases]
+        return ([w.astype(np.float64) for w in self.raw_weights],
+                [b.astype(np.float64) for b in self.raw_biases])
+
+    def with_precision(self, precision):
+        """A copy of this engine running in another precision"""
+        weights, biases = self.unfolded_parameters()
+        return CompiledMLP.from_arrays(weights, biases, self.scaler_mean, self.scaler_scale, self.activation,
+                                       self.out_activation, self.commands, self.command_mapping, precision)
+
+    def parameter_bytes(self):
+        """Memory held by the weights and biases used for inference"""
+        arrays = self.weights + self.biases + (self.weight_scales or [])
+        return sum(array.nbytes for array in arrays)
+
+    def save(self, path):
+        """Write the model as a single .npz file (unfolded weights, scaler stats and commands)"""
+        mapping = sorted(self.command_mapping.items(), key=lambda item: item[1])
+        arrays = {
+            'version': np.array(EXPORT_VERSION),
+            'precision': np.array(self.precision),
+            'n_layers': np.array(len(self.weights)),
+            'activation': np.array(self.activation),
+            'out_activation': np.array(self.out_activation),
+            'commands': np.array(self.commands),
+            'mapping_commands': np.array([cmd for cmd, _ in mapping]),
+            'mapping_indices': np.array([idx for _, idx in mapping]),
+        }
+        if self.scaler_mean is not None:
+            arrays['scaler_mean'] = self.scaler_mean
+        if self.scaler_scale is not None:
+            arrays['scaler_scale'] = self.scaler_scale
+        if self.weight_scales is not None:
+            for i, (w, s, b) in enumerate(zip(self.weights, self.weight_scales, self.biases)):
+                arrays[f'weights_{i}'] = w
+                arrays[f'weight_scales_{i}'] = s
+                arrays[f'biases_{i}'] = b
+        else:
+            for i, (w, b) in enumerate(zip(self.raw_weights, self.raw_biases)):
+                arrays[f'weights_{i}'] = w
+                arrays[f'biases_{i}'] = b
+        # Write to a temp file and rename so a running bot never loads a half-written export
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load an engine written by save() using NumPy only"""
+        with np.load(path, allow_pickle=False) as data:
+            n_layers = int(data['n_layers'])
+            # Exports from before precisions were added are float64
+            precision = str(data['precision']) if 'precision' in data else 'float64'
+            weights = [data[f'weights_{i}'] for i in range(n_layers)]
+            if precision == 'int8':
+                # Dequantize; _setup quantizes them back to the same int8 values
+                weights = [w.astype(np.float64) * data[f'weight_scales_{i}'] for i, w in enumerate(weights)]
+            biases = [data[f'biases_{i}'] for i in range(n_layers)]
+            mean = data['scaler_mean'] if 'scaler_mean' in data else None
+            scale = data['scaler_scale'] if 'scaler_scale' in data else None
+            command_mapping = {str(cmd): int(idx) for cmd, idx in zip(data['mapping_commands'], data['mapping_indices'])}
+            return cls.from_arrays(weights, biases, mean, scale, str(data['activation']),
+                                   str(data['out_activation']), [str(cmd) for cmd in data['commands']],
+                                   command_mapping, precision)
+
+    def _write_numeric(self, x, game_state):
+        p1 = game_state.player1
+        p2 = game_state.player2
+        x[0] = p1.x_coord
+        x[1] = p1.y_coord
+        x[2] = p1.health
+        x[3] = p2.x_coord
+        x[4] = p2.y_coord
+        x[5] = p2.health
+        x[6] = game_state.timer
+        x[7] = p2.x_coord - p1.x_coord
+        x[8] = p2.y_coord - p1.y_coord
+        x[9] = ((p1.x_coord - p2.x_coord) ** 2 + (p1.y_coord - p2.y_coord) ** 2) ** 0.5
+        x[10] = getattr(p1, 'x_velocity', 0)
+        x[11] = getattr(p1, 'y_velocity', 0)
+        x[12] = getattr(p2, 'x_velocity', 0)
+        x[13] = getattr(p2, 'y_velocity', 0)
+
+    def set_features(self, game_state, prev_commands):
+        """Write the features of a frame into the input buffer"""
+        x = self._x
+        self._write_numeric(x, game_state)
+
+        # Clear last frame's one-hot entries, then set this frame's
+        for pos in self._hot:
+            x[pos] = 0.0
+        hot = []
+        offset = N_NUMERIC_FEATURES
+        for cmd in prev_commands:
+            idx = self.command_mapping.get(cmd)
+            if idx is not None:
+                x[offset + idx] = 1.0
+                hot.append(offset + idx)
+            offset += self.n_commands
+        self._hot = hot
+        return x
+
+    def _activate(self, h, activation):
+        if activation == 'relu':
+            np.maximum(h, 0.0, out=h)
+        elif activation == 'tanh':
+            np.tanh(h, out=h)
+        elif activation == 'logistic':
+            np.negative(h, out=h)
+            np.exp(h, out=h)
+            h += 1.0
+            np.reciprocal(h, out=h)
+
+    def forward(self, x):
+        """Run the forward pass on one feature vector and return the probability buffer.
+
+        The returned array is reused by the next call; copy it to keep it.
+        """
+        h = x
+        if self.weight_scales is not None:
+            h = self._xs
+            np.subtract(x, self._input_mean, out=h)
+            h *= self._input_scale
+        return self._forward_from(0, h)
+
+    def forward_indexed(self, x_numeric, history):
+        """Forward pass from the numeric features and the history's command indices (-1 for none).
+
+        Same result as forward() on the one-hot encoded vector, but the
+        history's contribution to the first layer is one row lookup per
+        previous command. Needs a float engine (self._embeddings).
+        """
+        out = self._layers[0]
+        np.dot(x_numeric, self._w_numeric, out=out)
+        for table, idx in zip(self._embeddings, history):
+            out += table[idx]
+        if len(self.weights) == 1:
+            return self._output(out)
+        self._activate(out, self.activation)
+        return self._forward_from(1, out)
+
+    def _forward_from(self, start, h):
+        # Layers start.. (h is the input to layer start)
+        scales = self.weight_scales
+        last = len(self.weights) - 1
+        for i in range(start, last + 1):
+            out = self._layers[i]
+            if scales is None:
+                np.dot(h, self.weights[i], out=out)
+            else:
+                # The int8 weights are converted to float32 inside the matmul loop
+                np.matmul(h, self.weights[i], out=out, dtype=np.float32)
+                out *= scales[i]
+            out += self.biases[i]
+            if i < last:
+                self._activate(out, self.activation)
+            h = out
+        return self._output(h)
+
+    def _output(self, h):
+        proba = self._proba
+        if self.out_activation == 'softmax':
+            h -= h.max()
+            np.exp(h, out=h)
+            h /= h.sum()
+            proba[:] = h
+        else:
+            # Binary problems have a single logistic output unit
+            self._activate(h, 'logistic')
+            proba[0] = 1.0 - h[0]
+            proba[1] = h[0]
+        return proba
+
+    def batch_features(self, frames):
+        """Feature matrix (one row per frame) for a list of (game_state, prev_commands)"""
+        X = np.zeros((len(frames), self.n_features), dtype=self._x.dtype)
+        for x, (game_state, prev_commands) in zip(X, frames):
+            self._write_numeric(x, game_state)
+            offset = N_NUMERIC_FEATURES
+            for cmd in prev_commands:
+                idx = self.command_mapping.get(cmd)
+                if idx is not None:
+                    x[offset + idx] = 1.0
+                offset += self.n_commands
+        return X
+
+    def forward_batch(self, X):
+        """Run the forward pass on a feature matrix and return a new (n_frames, n_commands) array"""
+        h = np.asarray(X, dtype=self._x.dtype)
+        scales = self.weight_scales
+        if scales is not None:
+            h = (h - self._input_mean) * self._input_scale
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            if scales is None:
+                h = np.dot(h, w)
+            else:
+                h = np.matmul(h, w, dtype=np.float32)
+                h *= scales[i]
+            h += b
+            if i < last:
+                self._activate(h, self.activation)
+
+        if self.out_activation == 'softmax':
+            h -= h.max(axis=1, keepdims=True)
+            np.exp(h, out=h)
+            h /= h.sum(axis=1, keepdims=True)
+            return h
+        self._activate(h, 'logistic')
+        return np.hstack([1.0 - h, h])
+
+    def predict_proba(self, game_state, prev_commands):
+        """Probabilities for every command (ordered like self.commands) for one frame"""
+        if self.use_embeddings:
+            self._write_numeric(self._x_numeric, game_state)
+            get = self.command_mapping.get
+            return self.forward_indexed(self._x_numeric, [get(cmd, -1) for cmd in prev_commands])
+        return self.forward(self.set_features(game_state, prev_commands))
+
+    def predict(self, game_state, prev_commands):
+        """Most likely command for one frame"""
+        return self.commands[int(self.predict_proba(game_state, prev_commands).argmax())]
@@ -1,206 +1,453 @@
-import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.neural_network import MLPClassifier
-import joblib
-import os
-from tqdm import tqdm
-import time
-
-class GameMLP:
-    def __init__(self):
-        self.model = MLPClassifier(
-            hidden_layer_sizes=(128, 64, 32),  # Deeper network
-            activation='relu',
-            solver='adam',
-            learning_rate='adaptive',
-            max_iter=1000,  # More training iterations
-            batch_size='auto',
-            early_stopping=True,
-            validation_fraction=0.2,  # More validation data
-            n_iter_no_change=20,  # More patience
-            random_state=42,
-            verbose=True
-        )
-        self.scaler = StandardScaler()
-        self.command_mapping = None
-        self.is_trained = False
-        
-    def prepare_features(self, game_state, prev_commands):
-        """Prepare features for the model"""
-        features = [
-            game_state.player1.x_coord,
-            game_state.player1.y_coord,
-            game_state.player1.health,
-            game_state.player2.x_coord,
-            game_state.player2.y_coord,
-            game_state.player2.health,
-            game_state.timer,
-            # Relative positions
-            game_state.player2.x_coord - game_state.player1.x_coord,  # relative_x
-            game_state.player2.y_coord - game_state.player1.y_coord,  # relative_y
-            # Distance
-            ((game_state.player1.x_coord - game_state.player2.x_coord) ** 2 + 
-             (game_state.player1.y_coord - game_state.player2.y_coord) ** 2) ** 0.5,
-            # Velocity (if available)
-            game_state.player1.x_velocity if hasattr(game_state.player1, 'x_velocity') else 0,
-            game_state.player1.y_velocity if hasattr(game_state.player1, 'y_velocity') else 0,
-            game_state.player2.x_velocity if hasattr(game_state.player2, 'x_velocity') else 0,
-            game_state.player2.y_velocity if hasattr(game_state.player2, 'y_velocity') else 0,
-        ]
-        
-        # Add previous commands as one-hot encoded features
-        for cmd in prev_commands:
-            if cmd in self.command_mapping:
-                cmd_idx = self.command_mapping[cmd]
-                cmd_features = [0] * len(self.command_mapping)
-                cmd_features[cmd_idx] = 1
-                features.extend(cmd_features)
-            else:
-                features.extend([0] * len(self.command_mapping))
-                
-        return np.array(features).reshape(1, -1)
-    
-    def train(self, csv_file='training_data/training_data.csv'):
-        """Train the model on collected data"""
-        if not os.path.exists(csv_file):
-            print("No training data found!")
-            return False
-            
-        print("Loading training data...")
-        df = pd.read_csv(csv_file)
-        
-        print("Preparing command mapping...")
-        # Get all unique commands from training data
-        all_commands = set(df['current_command'].unique())
-        self.command_mapping = {cmd: idx for idx, cmd in enumerate(sorted(all_commands))}
-        
-        print(f"Found {len(self.command_mapping)} unique commands")
-        print("Available commands:", list(self.command_mapping.keys()))
-        
-        print("Preparing features and labels...")
-        X = []
-        y = []
-        
-        # Use tqdm for progress bar
-        for i in tqdm(range(len(df)), desc="Processing training data"):
-            features = [
-                df.iloc[i]['player1_x'],
-                df.iloc[i]['player1_y'],
-                df.iloc[i]['player1_health'],
-                df.iloc[i]['player2_x'],
-                df.iloc[i]['player2_y'],
-                df.iloc[i]['player2_health'],
-                df.iloc[i]['timer'],
-                df.iloc[i]['relative_x'],
-                df.iloc[i]['relative_y'],
-                df.iloc[i]['distance']
-            ]
-            
-            # Add velocity features if available
-            if 'player1_x_velocity' in df.columns:
-                features.extend([
-                    df.iloc[i]['player1_x_velocity'],
-                    df.iloc[i]['player1_y_velocity'],
-                    df.iloc[i]['player2_x_velocity'],
-                    df.iloc[i]['player2_y_velocity']
-                ])
-            else:
-                features.extend([0, 0, 0, 0])
-            
-            # Add previous commands
-            prev_commands = [
-                df.iloc[i]['prev_command'],
-                df.iloc[i]['prev2_command'],
-                df.iloc[i]['prev3_command']
-            ]
-            
-            for cmd in prev_commands:
-                if cmd in self.command_mapping:
-                    cmd_idx = self.command_mapping[cmd]
-                    cmd_features = [0] * len(self.command_mapping)
-                    cmd_features[cmd_idx] = 1
-                    features.extend(cmd_features)
-                else:
-                    features.extend([0] * len(self.command_mapping))
-            
-            X.append(features)
-            y.append(self.command_mapping[df.iloc[i]['current_command']])
-        
-        X = np.array(X)
-        y = np.array(y)
-        
-        print(f"Training data shape: {X.shape}")
-        print("Scaling features...")
-        X = self.scaler.fit_transform(X)
-        
-        print("\nStarting model training...")
-        print("Training progress will be shown below:")
-        print("-" * 50)
-        
-        start_time = time.time()
-        self.model.fit(X, y)
-        training_time = time.time() - start_time
-        
-        print("-" * 50)
-        print(f"Training completed in {training_time:.2f} seconds")
-        self.is_trained = True
-        
-        print("Saving model and related files...")
-        joblib.dump(self.model, 'game_model.joblib')
-        joblib.dump(self.scaler, 'game_scaler.joblib')
-        joblib.dump(self.command_mapping, 'command_mapping.joblib')
-        
-        print("Training completed successfully!")
-        return True
-    
-    def predict(self, game_state, prev_commands):
-        """Predict next command based on game state and previous commands"""
-        # Prepare features
-        features = self.prepare_features(game_state, prev_commands)
-        features = self.scaler.transform(features)
-        
-        # Get predictions
-        probabilities = self.model.predict_proba(features)[0]
-        
-        # Create reverse mapping for easier lookup
-        reverse_mapping = {v: k for k, v in self.command_mapping.items()}
-        
-        print("\n=== Model Prediction Debug ===")
-        print(f"Distance to opponent: {abs(game_state.player2.x_coord - game_state.player1.x_coord)}")
-        print(f"Relative position: {'right' if game_state.player2.x_coord > game_state.player1.x_coord else 'left'}")
-        
-        print("\nInitial probabilities:")
-        for i, prob in enumerate(probabilities):
-            if prob > 0.01:  # Only show significant probabilities
-                print(f"{reverse_mapping[i]}: {prob:.4f}")
-        
-        # Get the most likely command
-        predicted_idx = np.argmax(probabilities)
-        predicted_cmd = reverse_mapping[predicted_idx]
-        
-        print(f"\nPredicted command: {predicted_cmd}")
-        print("=" * 30)
-        
-        # Fallback to neutral if prediction is invalid
-        if predicted_cmd not in self.command_mapping:
-            print(f"Warning: Invalid command predicted: {predicted_cmd}")
-            return "neutral"
-        
-        return predicted_cmd
-    
-    def load_model(self):
-        """Load a trained model"""
-        self.model = joblib.load('game_model.joblib')
-        self.scaler = joblib.load('game_scaler.joblib')
-        self.command_mapping = joblib.load('command_mapping.joblib')
-        self.is_trained = True
-        return True
-
-if __name__ == "__main__":
-    print("Starting ML model training...")
-    model = GameMLP()
-    if model.train():
-        print("Model trained and saved successfully!")
-    else:
+import numpy as np
+import os
+import sys
+import time
+from inference import CompiledMLP, EMBEDDING_MIN_COMMANDS, PRECISIONS
+from telemetry import PredictionTelemetry
+from frame_store import load_frames, iter_frame_chunks
+
+# pandas, scikit-learn and joblib are only needed to train or to load the
+# joblib files, so they're imported where they're used; a bot that loads the
+# compact model export only needs NumPy
+
+# Files written by save_model
+MODEL_FILE = 'game_model.joblib'
+SCALER_FILE = 'game_scaler.joblib'
+MAPPING_FILE = 'command_mapping.joblib'
+# Compact export of the trained model (weights, scaler stats and commands), loadable with NumPy only
+MODEL_EXPORT = 'game_model.npz'
+
+# Numeric feature columns, in the order the model expects them
+NUMERIC_COLUMNS = [
+    'player1_x', 'player1_y', 'player1_health',
+    'player2_x', 'player2_y', 'player2_health',
+    'timer', 'relative_x', 'relative_y', 'distance'
+]
+VELOCITY_COLUMNS = [
+    'player1_x_velocity', 'player1_y_velocity',
+    'player2_x_velocity', 'player2_y_velocity'
+]
+HISTORY_COLUMNS = ['prev_command', 'prev2_command', 'prev3_command']
+
+def build_numeric_block(df):
+    """Build the numeric features (positions, health, timer, velocities) for every row"""
+    numeric = df[NUMERIC_COLUMNS].to_numpy(dtype=np.float64)
+    # Add velocity features if available
+    if 'player1_x_velocity' in df.columns:
+        velocity = df[VELOCITY_COLUMNS].to_numpy(dtype=np.float64)
+    else:
+        velocity = np.zeros((len(df), len(VELOCITY_COLUMNS)))
+    return np.hstack([numeric, velocity])
+
+def build_history_indices(df, command_mapping):
+    """Map the previous command columns to command indices (-1 for unknown commands)"""
+    indices = np.empty((len(df), len(HISTORY_COLUMNS)), dtype=np.int64)
+    for col, column in enumerate(HISTORY_COLUMNS):
+        mapped = df[column].map(command_mapping)
+        indices[:, col] = mapped.fillna(-1).to_numpy(dtype=np.int64)
+    return indices
+
+def one_hot_history(indices, n_commands):
+    """Expand command history indices into one one-hot block per history column"""
+    rows = np.arange(len(indices))
+    blocks = []
+    for col in range(indices.shape[1]):
+        block = np.zeros((len(indices), n_commands))
+        known = indices[:, col] >= 0
+        block[rows[known], indices[known, col]] = 1
+        blocks.append(block)
+    return blocks
+
+def build_feature_matrix(df, command_mapping):
+    """Build the training matrix for a whole DataFrame with column operations"""
+    numeric = build_numeric_block(df)
+    history = one_hot_history(build_history_indices(df, command_mapping), len(command_mapping))
+    return np.hstack([numeric] + history)
+
+def sparse_feature_matrix(numeric, indices, n_commands):
+    """The build_feature_matrix layout as a CSR matrix, from the numeric block and history indices.
+
+    Only the numeric values and one 1 per known previous command are stored,
+    instead of len(HISTORY_COLUMNS) * n_commands mostly-zero columns per row.
+    """
+    from scipy import sparse
+    n_rows, n_numeric = numeric.shape
+    n_history = indices.shape[1]
+    known = indices >= 0
+    columns = np.empty((n_rows, n_numeric + n_history), dtype=np.int32)
+    columns[:, :n_numeric] = np.arange(n_numeric)
+    columns[:, n_numeric:] = n_numeric + np.arange(n_history) * n_commands + indices
+    values = np.ones((n_rows, n_numeric + n_history))
+    values[:, :n_numeric] = numeric
+    keep = np.ones((n_rows, n_numeric + n_history), dtype=bool)
+    keep[:, n_numeric:] = known
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(keep.sum(axis=1), out=indptr[1:])
+    # Boolean indexing walks the rows in order, which is CSR order
+    return sparse.csr_matrix((values[keep], columns[keep], indptr),
+                             shape=(n_rows, n_numeric + n_history * n_commands))
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where the resource module is unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def default_classifier(**params):
+    """The untrained MLPClassifier GameMLP starts from (params override the defaults, see tuning.py)"""
+    from sklearn.neural_network import MLPClassifier
+    classifier = MLPClassifier(
+        hidden_layer_sizes=(128, 64, 32),  # Deeper network
+        activation='relu',
+        solver='adam',
+        learning_rate='adaptive',
+        max_iter=1000,  # More training iterations
+        batch_size='auto',
+        early_stopping=True,
+        validation_fraction=0.2,  # More validation data
+        n_iter_no_change=20,  # More patience
+        random_state=42,
+        verbose=True
+    )
+    return classifier.set_params(**params)
+
+class GameMLP:
+    def __init__(self):
+        # The classifier and scaler are created on first use so scikit-learn isn't imported until needed
+        self._model = None
+        self._scaler = None
+        self.command_mapping = None
+        self.engine = None
+        self.telemetry = PredictionTelemetry()
+        self.is_trained = False
+        # True when only the compact export was loaded (no scikit-learn model to train further)
+        self.compact = False
+        # Directory and registry version this model was loaded from (see model_registry.py)
+        self.model_dir = None
+        self.version = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = default_classifier()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+        
+    def prepare_features(self, game_state, prev_commands):
+        """Prepare features for the model"""
+        features = [
+            game_state.player1.x_coord,
+            game_state.player1.y_coord,
+            game_state.player1.health,
+            game_state.player2.x_coord,
+            game_state.player2.y_coord,
+            game_state.player2.health,
+            game_state.timer,
+            # Relative positions
+            game_state.player2.x_coord - game_state.player1.x_coord,  # relative_x
+            game_state.player2.y_coord - game_state.player1.y_coord,  # relative_y
+            # Distance
+            ((game_state.player1.x_coord - game_state.player2.x_coord) ** 2 + 
+             (game_state.player1.y_coord - game_state.player2.y_coord) ** 2) ** 0.5,
+            # Velocity (if available)
+            game_state.player1.x_velocity if hasattr(game_state.player1, 'x_velocity') else 0,
+            game_state.player1.y_velocity if hasattr(game_state.player1, 'y_velocity') else 0,
+            game_state.player2.x_velocity if hasattr(game_state.player2, 'x_velocity') else 0,
+            game_state.player2.y_velocity if hasattr(game_state.player2, 'y_velocity') else 0,
+        ]
+        
+        # Add previous commands as one-hot encoded features
+        for cmd in prev_commands:
+            if cmd in self.command_mapping:
+                cmd_idx = self.command_mapping[cmd]
+                cmd_features = [0] * len(self.command_mapping)
+                cmd_features[cmd_idx] = 1
+                features.extend(cmd_features)
+            else:
+                features.extend([0] * len(self.command_mapping))
+                
+        return np.array(features).reshape(1, -1)
+    
+    def training_matrix(self, numeric, indices):
+        """Scaled training matrix from the numeric block and history indices.
+
+        Only the numeric columns are standardized; the command history stays
+        0/1. From EMBEDDING_MIN_COMMANDS commands on the matrix is sparse:
+        below that the dense one-hot matrix is small and fits faster. Models
+        trained before that scaled every column (their scaler covers the
+        one-hot columns too) get a dense matrix scaled the old way.
+        """
+        n_commands = len(self.command_mapping)
+        if self.scaler.n_features_in_ != numeric.shape[1]:
+            return self.scaler.transform(np.hstack([numeric] + one_hot_history(indices, n_commands)))
+        scaled = self.scaler.transform(numeric)
+        if n_commands >= EMBEDDING_MIN_COMMANDS:
+            return sparse_feature_matrix(scaled, indices, n_commands)
+        return np.hstack([scaled] + one_hot_history(indices, n_commands))
+
+    def frame_features(self, df):
+        """Scaled training matrix for a DataFrame of collected frames"""
+        return self.training_matrix(build_numeric_block(df), build_history_indices(df, self.command_mapping))
+
+    def scale_features(self, X):
+        """Scale a dense build_feature_matrix matrix for this model's predict_proba"""
+        n_scaled = self.scaler.n_features_in_
+        if n_scaled == X.shape[1]:
+            return self.scaler.transform(X)
+        X = np.array(X, dtype=np.float64)
+        X[:, :n_scaled] = self.scaler.transform(X[:, :n_scaled])
+        return X
+
+    def train(self, csv_file='training_data/training_data.csv', use_cache=True):
+        """Train the model on collected data (a CSV file or a frame store directory).
+
+        With use_cache the features are kept in a FeatureCache next to the
+        data, so only rows added since the last training run are parsed.
+        """
+        if not os.path.exists(csv_file):
+            print("No training data found!")
+            return False
+        
+        if use_cache:
+            from feature_cache import FeatureCache
+            print("Loading training features...")
+            cache = FeatureCache(csv_file)
+            numeric, indices, y, self.command_mapping, self.scaler = cache.load_blocks()
+            print(f"Feature cache {cache.cache_dir}: parsed {cache.rows_parsed} new rows")
+            print(f"Found {len(self.command_mapping)} unique commands")
+            print("Available commands:", list(self.command_mapping.keys()))
+        else:
+            print("Loading training data...")
+            df = load_frames(csv_file)
+            
+            print("Preparing command mapping...")
+            # Get all unique commands from training data
+            all_commands = set(df['current_command'].unique())
+            self.command_mapping = {cmd: idx for idx, cmd in enumerate(sorted(all_commands))}
+            
+            print(f"Found {len(self.command_mapping)} unique commands")
+            print("Available commands:", list(self.command_mapping.keys()))
+            
+            print("Preparing features and labels...")
+            numeric = build_numeric_block(df)
+            indices = build_history_indices(df, self.command_mapping)
+            y = df['current_command'].map(self.command_mapping).to_numpy()
+            del df
+            # Only the numeric columns are standardized
+            self.scaler.fit(numeric)
+        
+        print("Scaling features...")
+        X = self.training_matrix(numeric, indices)
+        print(f"Training data shape: {X.shape}")
+        
+        print("\nStarting model training...")
+        print("Training progress will be shown below:")
+        print("-" * 50)
+        
+        start_time = time.time()
+        self.model.fit(X, y)
+        training_time = time.time() - start_time
+        
+        print("-" * 50)
+        print(f"Training completed in {training_time:.2f} seconds")
+        self.compile()
+        self.is_trained = True
+        
+        self.save_model()
+        
+        print("Training completed successfully!")
+        rss = peak_rss_mb()
+        if rss is not None:
+            print(f"Peak memory (RSS): {rss:.1f} MB")
+        return True
+    
+    def train_streaming(self, csv_file='training_data/training_data.csv', chunk_size=50000, epochs=10):
+        """Train in bounded memory by streaming chunks through partial_fit"""
+        if not os.path.exists(csv_file):
+            print("No training data found!")
+            return False
+        
+        print("Preparing command mapping...")
+        all_commands = set()
+        for chunk in iter_frame_chunks(csv_file, chunk_size, columns=['current_command']):
+            all_commands.update(chunk['current_command'].unique())
+        self.command_mapping = {cmd: idx for idx, cmd in enumerate(sorted(all_commands))}
+        classes = np.arange(len(self.command_mapping))
+        print(f"Found {len(self.command_mapping)} unique commands")
+        
+        print("Fitting scaler...")
+        n_rows = 0
+        for chunk in iter_frame_chunks(csv_file, chunk_size):
+            self.scaler.partial_fit(build_numeric_block(chunk))
+            n_rows += len(chunk)
+        print(f"Training data: {n_rows} rows in chunks of {chunk_size}")
+        
+        # partial_fit does one pass per call and doesn't support early stopping
+        from sklearn.base import clone
+        self.model = clone(self.model).set_params(early_stopping=False, verbose=False)
+        
+        print("\nStarting streaming training...")
+        print("-" * 50)
+        start_time = time.time()
+        for epoch in range(epochs):
+            losses = []
+            for chunk in iter_frame_chunks(csv_file, chunk_size):
+                X = self.frame_features(chunk)
+                y = chunk['current_command'].map(self.command_mapping).to_numpy()
+                self.model.partial_fit(X, y, classes=classes)
+                losses.append(self.model.loss_)
+            print(f"Epoch {epoch + 1}/{epochs}, loss = {np.mean(losses):.6f}")
+        training_time = time.time() - start_time
+        
+        print("-" * 50)
+        print(f"Training completed in {training_time:.2f} seconds")
+        self.compile()
+        self.is_trained = True
+        self.save_model()
+        
+        print("Training completed successfully!")
+        rss = peak_rss_mb()
+        if rss is not None:
+            print(f"Peak memory (RSS): {rss:.1f} MB")
+        return True
+    
+    def save_model(self, model_dir='.'):
+        """Save the model, scaler and command mapping, plus the compact export"""
+        import joblib
+        print("Saving model and related files...")
+        joblib.dump(self.model, os.path.join(model_dir, MODEL_FILE))
+        joblib.dump(self.scaler, os.path.join(model_dir, SCALER_FILE))
+        joblib.dump(self.command_mapping, os.path.join(model_dir, MAPPING_FILE))
+        self.export_model(os.path.join(model_dir, MODEL_EXPORT))
+    
+    def export_model(self, path=MODEL_EXPORT, precision=None):
+        """Write the compact NumPy export used for fast bot startup (float64, float32 or int8).
+
+        precision=None keeps the precision of the current engine.
+        """
+        if self.engine is None:
+            self.compile()
+        engine = self.engine
+        if precision is not None and precision != engine.precision:
+            engine = engine.with_precision(precision)
+        engine.save(path)
+    
+    def compile(self):
+        """Build the fast single-frame inference engine from the trained model"""
+        self.engine = CompiledMLP(self.model, self.scaler, self.command_mapping)
+        self.telemetry.commands = self.engine.commands
+        return self.engine
+    
+    def predict(self, game_state, prev_commands):
+        """Predict next command based on game state and previous commands"""
+        if self.engine is None:
+            self.compile()
+        
+        # Telemetry is off by default, so this is a single attribute check per frame
+        telemetry = self.telemetry
+        if telemetry.level:
+            start = time.perf_counter()
+        
+        # Get the most likely command
+        probabilities = self.engine.predict_proba(game_state, prev_commands)
+        predicted_idx = int(probabilities.argmax())
+        predicted_cmd = self.engine.commands[predicted_idx]
+        
+        if telemetry.level:
+            telemetry.record(time.perf_counter() - start, probabilities, predicted_idx, game_state)
+        
+        # Fallback to neutral if prediction is invalid
+        if predicted_cmd not in self.command_mapping:
+            return "neutral"
+        
+        return predicted_cmd
+    
+    def load_model(self, compact=True, model_dir='.'):
+        """Load a trained model from model_dir; False if there is none.
+
+        The compact export is used when there is one, unless compact=False.
+        """
+        export_path = os.path.join(model_dir, MODEL_EXPORT)
+        if compact and os.path.exists(export_path):
+            self.engine = CompiledMLP.load(export_path)
+            self.command_mapping = self.engine.command_mapping
+            self.telemetry.commands = self.engine.commands
+            self.compact = True
+            self.is_trained = True
+            self.model_dir = model_dir
+            return True
+        
+        paths = [os.path.join(model_dir, name) for name in (MODEL_FILE, SCALER_FILE, MAPPING_FILE)]
+        if not all(os.path.exists(path) for path in paths):
+            return False
+        import joblib
+        self.model = joblib.load(paths[0])
+        self.scaler = joblib.load(paths[1])
+        self.command_mapping = joblib.load(paths[2])
+        self.compile()
+        self.compact = False
+        self.is_trained = True
+        self.model_dir = model_dir
+        return True
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the game MLP")
+    parser.add_argument('data', nargs='?', default='training_data/training_data.csv',
+                        help="Training data (CSV file or frame store directory)")
+    parser.add_argument('--stream', action='store_true', help="Train in bounded memory with partial_fit")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--export', action='store_true',
+                        help=f"Only write {MODEL_EXPORT} from the saved joblib model")
+    parser.add_argument('--precision', choices=PRECISIONS, default='float64',
+                        help="Precision of the exported model (see quantize.py for an accuracy/latency comparison)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Rebuild the features from the data instead of using the feature cache")
+    parser.add_argument('--registry', default=None,
+                        help="Also publish the model as a new version in this model registry directory")
+    args = parser.parse_args()
+    
+    if args.export:
+        model = GameMLP()
+        if not model.load_model(compact=False):
+            print("No trained model found to export.")
+            sys.exit(1)
+        model.export_model(precision=args.precision)
+        print(f"Exported {args.precision} model to {MODEL_EXPORT}")
+        if args.registry:
+            from model_registry import ModelRegistry
+            print(f"Published model {ModelRegistry(args.registry).publish(model)}")
+        sys.exit(0)
+    
+    print("Starting ML model training...")
+    model = GameMLP()
+    if args.stream:
+        trained = model.train_streaming(args.data, chunk_size=args.chunk_size, epochs=args.epochs)
+    else:
+        trained = model.train(args.data, use_cache=not args.no_cache)
+    if trained:
+        print("Model trained and saved successfully!")
+        if args.registry:
+            from model_registry import ModelRegistry
+            print(f"Published model {ModelRegistry(args.registry).publish(model)}")
+    else:
         print("Failed to train model. Please ensure training data exists in training_data/training_data.csv") 
\ No newline at end of file
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from ml_model import GameMLP
+
+# Name of the file in the registry root that holds the current version
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+VERSION_PATTERN = re.compile(r'^v(\d+)$')
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hex SHA-256 of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ModelRegistry:
+    """A directory of versioned, checksummed model artifacts.
+
+    Every published model gets its own directory (v0001, v0002, ...) holding
+    what GameMLP.save_model writes plus a manifest.json with the SHA-256 of
+    each file. A version directory is complete before it appears (it is
+    written under a temporary name and renamed), and the CURRENT file naming
+    the version bots should run is replaced atomically, so a reader never sees
+    a half-written model. Rolling back is promote() with an older version.
+    """
+
+    def __init__(self, root='models'):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def versions(self):
+        """Published versions, oldest first"""
+        versions = [name for name in os.listdir(self.root)
+                    if VERSION_PATTERN.match(name) and os.path.isdir(os.path.join(self.root, name))]
+        return sorted(versions, key=lambda name: int(name[1:]))
+
+    def current(self):
+        """Version named by CURRENT (None if nothing has been promoted)"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def path(self, version):
+        return os.path.join(self.root, version)
+
+    def manifest(self, version):
+        with open(os.path.join(self.path(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def publish(self, ml_model, promote=True, notes=None):
+        """Store a trained model as a new version; returns the version name"""
+        staging = tempfile.mkdtemp(prefix='.publish-', dir=self.root)
+        try:
+            if ml_model.compact:
+                # Only the NumPy export was loaded, so that's all there is to store
+                ml_model.export_model(os.path.join(staging, 'game_model.npz'))
+            else:
+                ml_model.save_model(staging)
+            files = {name: file_sha256(os.path.join(staging, name)) for name in sorted(os.listdir(staging))}
+            manifest = {
+                'created': time.time(),
+                'files': files,
+                'commands': len(ml_model.command_mapping),
+                'notes': notes,
+            }
+
+            while True:
+                versions = self.versions()
+                version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+                manifest['version'] = version
+                with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+                    json.dump(manifest, f, indent=2)
+                try:
+                    # Fails if another publisher took this version first; try the next one
+                    os.rename(staging, self.path(version))
+                    break
+                except OSError:
+                    if not os.path.isdir(self.path(version)):
+                        raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if promote:
+            self.promote(version)
+        return version
+
+    def promote(self, version):
+        """Make version the one bots load (atomic replace of CURRENT)"""
+        self.verify(version)
+        tmp_path = os.path.join(self.root, CURRENT_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp_path, os.path.join(self.root, CURRENT_FILE))
+
+    def verify(self, version):
+        """Raise ValueError if any file of version is missing or doesn't match its checksum"""
+        directory = self.path(version)
+        try:
+            files = self.manifest(version)['files']
+        except FileNotFoundError:
+            raise ValueError(f"Model version {version} has no manifest")
+        for name, checksum in files.items():
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                raise ValueError(f"Model version {version} is missing {name}")
+            if file_sha256(path) != checksum:
+                raise ValueError(f"Checksum mismatch for {name} in model version {version}")
+
+    def load(self, version=None, compact=True):
+        """Verify and load a version (default: CURRENT); None if the registry is empty"""
+        if version is None:
+            version = self.current()
+            if version is None:
+                return None
+        self.verify(version)
+        ml_model = GameMLP()
+        if not ml_model.load_model(compact=compact, model_dir=self.path(version)):
+            return None
+        ml_model.version = version
+        return ml_model
+
+class RegistryWatcher:
+    """Hot-swap a running bot to whatever version the registry's CURRENT names.
+
+    A background thread polls CURRENT every interval seconds. When it changes,
+    the new version is verified and loaded on that thread and handed to
+    Bot.swap_model, which switches at the start of the next frame, so the
+    game loop keeps running and the connection stays up. A version that fails
+    verification or loading is reported and skipped; the bot keeps its model.
+    """
+
+    def __init__(self, registry, bot, interval=1.0, version=None, compact=True):
+        self.registry = registry
+        self.bot = bot
+        self.interval = interval
+        self.compact = compact
+        self.version = version
+        self.swaps = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="registry-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """Swap to CURRENT if it names a new version; True if a swap was queued"""
+        version = self.registry.current()
+        if version is None or version == self.version:
+            return False
+        try:
+            ml_model = self.registry.load(version, compact=self.compact)
+        except (OSError, ValueError) as e:
+            print(f"Not loading model {version}: {e}")
+            ml_model = None
+        if ml_model is None:
+            self.failures += 1
+            # Don't retry a bad version every poll; wait for CURRENT to change again
+            self.version = version
+            return False
+        # Keep reporting into the same telemetry (and its flusher thread); Bot.apply_pending_model
+        # switches its command names when the new model actually takes over
+        current = self.bot.ml_model
+        ml_model.telemetry = current.telemetry
+        self.bot.swap_model(ml_model)
+        self.version = version
+        self.swaps += 1
+        print(f"Switching to model {version}")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
@@ -0,0 +1,124 @@
+import copy
+import threading
+import time
+import traceback
+from collections import deque
+import numpy as np
+import pandas as pd
+from ml_model import GameMLP
+
+class OnlineTrainer:
+    """Update the bot's model with partial_fit on frames collected during play.
+
+    Register on_frame as a GameDataCollector listener. Every update_every new
+    frames a background worker copies the current model, runs partial_fit on
+    the most recent frames and hands the updated model to Bot.swap_model, which
+    switches to it at the start of the next frame. The fight loop never waits
+    on training.
+
+    With save, every updated model is written where the current one came
+    from: published as a new (not promoted) version when a registry is given,
+    otherwise saved over the files in the model's directory.
+    """
+
+    def __init__(self, bot, headers, update_every=2000, window=20000, epochs=1, save=False, registry=None):
+        if bot.ml_model.compact:
+            # The compact export can't be trained further; load the full scikit-learn model
+            if not bot.ml_model.load_model(compact=False, model_dir=bot.ml_model.model_dir or '.'):
+                raise ValueError("Online learning needs the joblib model files next to the compact export")
+        self.bot = bot
+        self.headers = headers
+        self.update_every = update_every
+        self.epochs = epochs
+        self.save = save
+        self.registry = registry
+        self.updates = 0
+        self.last_update_time = None
+
+        self._frames = deque(maxlen=window)
+        # on_frame appends on the game thread while update copies on the worker
+        self._frames_lock = threading.Lock()
+        self._new_frames = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="online-trainer", daemon=True)
+        self._thread.start()
+
+    def on_frame(self, row):
+        """Collector listener: remember the frame and wake the worker when an update is due"""
+        with self._frames_lock:
+            self._frames.append(row)
+        self._new_frames += 1
+        if self._new_frames >= self.update_every:
+            self._new_frames = 0
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.update()
+            except Exception:
+                # Keep the worker alive; the bot carries on with the current model
+                print("Online update failed:")
+                traceback.print_exc()
+
+    def update(self):
+        """Run one partial_fit update on the buffered frames and swap the result into the bot"""
+        current = self.bot.ml_model
+        with self._frames_lock:
+            frames = list(self._frames)
+        df = pd.DataFrame(frames, columns=self.headers)
+        # The output layer is fixed, so frames with commands the model has never seen are skipped
+        df = df[df['current_command'].isin(current.command_mapping)]
+        if df.empty:
+            return False
+
+        start = time.perf_counter()
+        updated = GameMLP()
+        updated.command_mapping = current.command_mapping
+        updated.scaler = current.scaler
+        updated.model = copy.deepcopy(current.model)
+        # partial_fit doesn't support early stopping. A model fitted with it has no
+        # best_loss_, which partial_fit's no-improvement check needs to be a number
+        updated.model.set_params(early_stopping=False, verbose=False)
+        updated.model.best_loss_ = np.inf
+        updated.model._no_improvement_count = 0
+
+        X = updated.frame_features(df)
+        y = df['current_command'].map(updated.command_mapping).to_numpy()
+        for _ in range(self.epochs):
+            updated.model.partial_fit(X, y)
+        updated.compile()
+        # Attached after compile() so the old model's records keep their command names until the swap
+        updated.telemetry = current.telemetry
+        updated.is_trained = True
+        if self.save:
+            self._save(current, updated)
+
+        self.bot.swap_model(updated)
+        self.updates += 1
+        self.last_update_time = time.perf_counter() - start
+        print(f"Online update {self.updates}: {len(df)} frames in {self.last_update_time:.2f}s, "
+              f"loss = {updated.model.loss_:.4f}")
+        return True
+
+    def _save(self, current, updated):
+        if self.registry is not None:
+            # A published version is immutable, so the update becomes a version of its own
+            updated.version = self.registry.publish(
+                updated, promote=False, notes=f"online update {self.updates + 1} of {current.version}")
+            updated.model_dir = self.registry.path(updated.version)
+            print(f"Published online update as {updated.version} (promote it to make bots load it)")
+        else:
+            updated.model_dir = current.model_dir or '.'
+            updated.save_model(updated.model_dir)
+
+    def stop(self):
+        """Stop the background worker"""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
@@ -2,6 +2,9 @@ from buttons import Buttons
 
 class Player:
 
+    __slots__ = ('player_id', 'health', 'x_coord', 'y_coord', 'is_jumping', 'is_crouching',
+                 'player_buttons', 'is_player_in_move', 'move_id')
+
     def __init__(self, player_dict):
         
         self.dict_to_object(player_dict)
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from game_state import GameState
+from data_collector import GameDataCollector
+from protocol import FRAMINGS, FrameDecoder, encode_message
+from scheduler import FrameScheduler, RECV, PARSE, PREDICT, COLLECT, SEND
+
+# Format version of the JSON results, bumped when keys change
+RESULTS_VERSION = 1
+
+def synthetic_messages(n_frames, framing='json', seed=0):
+    """Encoded game-state messages as the emulator would send them"""
+    from fake_emulator import synthetic_state_dict
+    rng = np.random.default_rng(seed)
+    return [encode_message(json.dumps(synthetic_state_dict(rng)).encode(), framing) for _ in range(n_frames)]
+
+def load_messages(path, framing='json'):
+    """Messages from a session log (replay.py) or a file of game states, one JSON object per line"""
+    from replay import LOG_MAGIC, read_log
+    with open(path, 'rb') as f:
+        head = f.read(len(LOG_MAGIC))
+    if head == LOG_MAGIC or path.endswith('.gz'):
+        log_framing, records = read_log(path)
+        decoder = FrameDecoder(log_framing)
+        messages = []
+        for _, chunk in records:
+            decoder.feed(chunk)
+            messages += [encode_message(json.dumps(message).encode(), framing) for message in decoder.pop_all()]
+        return messages
+    with open(path, 'rb') as f:
+        return [encode_message(line.strip(), framing) for line in f if line.strip()]
+
+def run_frame(decoder, bot, collector, message, framing, scheduler=None):
+    """Push one message through the whole bot pipeline, timing each stage when scheduler is given"""
+    decoder.feed(message)
+    state_dict, _ = decoder.pop_latest()
+    if scheduler is not None:
+        scheduler.mark(RECV)
+    game_state = GameState(state_dict)
+    if scheduler is not None:
+        scheduler.mark(PARSE)
+    command = bot.fight(game_state, "1")
+    if scheduler is not None:
+        scheduler.mark(PREDICT)
+    if game_state.has_round_started and not game_state.is_round_over:
+        collector.collect_frame_data(game_state, bot._get_current_command())
+    if scheduler is not None:
+        scheduler.mark(COLLECT)
+    reply = encode_message(command.to_bytes(), framing)
+    if scheduler is not None:
+        scheduler.mark(SEND)
+    return reply
+
+def profile_pipeline(messages, bot, framing='json', background=False, warmup=200):
+    """Replay messages through decode -> GameState -> Bot.fight -> collector -> reply.
+
+    Runs the stream twice: once timed (per-stage latencies from a
+    FrameScheduler, in the same stages as the controller's game loop) and
+    once under tracemalloc to measure memory allocated per frame. The two are
+    separate because tracing slows every allocation down. Returns a
+    JSON-serializable dict.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        collector = GameDataCollector(data_dir=tmp, background=background)
+        decoder = FrameDecoder(framing)
+        # Warm up caches (command encodings, feature buffers) before measuring
+        for message in messages[:warmup]:
+            run_frame(decoder, bot, collector, message, framing)
+
+        scheduler = FrameScheduler(capacity=len(messages))
+        start = time.perf_counter()
+        for message in messages:
+            scheduler.begin_frame()
+            run_frame(decoder, bot, collector, message, framing, scheduler)
+            scheduler.end_frame()
+        elapsed = time.perf_counter() - start
+        collector.flush()
+
+        # Python can't count individual allocations, so report the bytes allocated
+        # during each frame (traced peak) and the memory blocks a frame leaves behind
+        frame_bytes = np.zeros(len(messages))
+        tracemalloc.start()
+        blocks_before = sys.getallocatedblocks()
+        for i, message in enumerate(messages):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            run_frame(decoder, bot, collector, message, framing)
+            frame_bytes[i] = tracemalloc.get_traced_memory()[1] - before
+        retained_blocks = sys.getallocatedblocks() - blocks_before
+        tracemalloc.stop()
+        collector.close()
+
+    summary = scheduler.summary()
+    return {
+        'version': RESULTS_VERSION,
+        'created': time.time(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'framing': framing,
+        'background_collector': background,
+        'frames': len(messages),
+        'fps': len(messages) / elapsed,
+        'stages': summary['stages'],
+        'overruns': summary['overruns'],
+        'frame_budget_us': summary['frame_budget_us'],
+        'allocations': {
+            'bytes_per_frame_mean': float(frame_bytes.mean()),
+            'bytes_per_frame_p99': float(np.percentile(frame_bytes, 99)),
+            'retained_blocks_per_frame': retained_blocks / len(messages),
+        },
+    }
+
+def format_results(results):
+    """Results formatted for the console"""
+    allocations = results['allocations']
+    lines = [f"Frames: {results['frames']} ({results['fps']:.0f} fps), "
+             f"overruns: {results['overruns']} over {results['frame_budget_us']:.0f}us"]
+    for name, stats in results['stages'].items():
+        lines.append(f"  {name:8s} p50 {stats['p50_us']:8.1f}us  p95 {stats['p95_us']:8.1f}us  "
+                     f"p99 {stats['p99_us']:8.1f}us  max {stats['max_us']:8.1f}us")
+    lines.append(f"Allocated per frame: {allocations['bytes_per_frame_mean']:.0f} bytes mean, "
+                 f"{allocations['bytes_per_frame_p99']:.0f} bytes p99; "
+                 f"retained blocks per frame: {allocations['retained_blocks_per_frame']:.2f}")
+    return "\n".join(lines)
+
+def compare_results(baseline, results):
+    """Lines comparing p50/p99 per stage and fps against a baseline results dict"""
+    lines = [f"fps: {baseline['fps']:.0f} -> {results['fps']:.0f} ({results['fps'] / baseline['fps'] - 1:+.1%})"]
+    for name, stats in results['stages'].items():
+        if name not in baseline['stages']:
+            continue
+        base = baseline['stages'][name]
+        for key in ('p50_us', 'p99_us'):
+            change = stats[key] / base[key] - 1 if base[key] else 0.0
+            lines.append(f"  {name:8s} {key[:3]} {base[key]:8.1f}us -> {stats[key]:8.1f}us ({change:+.1%})")
+    base_bytes = baseline['allocations']['bytes_per_frame_mean']
+    lines.append(f"  bytes/frame {base_bytes:.0f} -> {results['allocations']['bytes_per_frame_mean']:.0f}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the bot pipeline per frame without an emulator")
+    parser.add_argument('--frames', type=int, default=20000, help="Number of synthetic frames")
+    parser.add_argument('--input', default=None,
+                        help="Replay game states from a session log or a file with one JSON object per line")
+    parser.add_argument('--framing', choices=FRAMINGS, default='json')
+    parser.add_argument('--model-dir', default='.', help="Directory with the trained model")
+    parser.add_argument('--background', action='store_true', help="Use the background collector writer")
+    parser.add_argument('--json', default=None, help="Write the results to this JSON file")
+    parser.add_argument('--compare', default=None, help="Compare against results saved with --json")
+    args = parser.parse_args()
+
+    from bot import Bot
+    from ml_model import GameMLP
+    ml_model = GameMLP()
+    if not ml_model.load_model(model_dir=args.model_dir):
+        raise SystemExit(f"No trained model in {args.model_dir}. Train one with python ml_model.py first.")
+
+    if args.input:
+        messages = load_messages(args.input, args.framing)
+    else:
+        messages = synthetic_messages(args.frames, args.framing)
+    results = profile_pipeline(messages, Bot(ml_model=ml_model), args.framing, args.background)
+    print(format_results(results))
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare_results(json.load(f), results))
+    if args.json:
+        tmp_path = args.json + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        os.replace(tmp_path, args.json)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import json
+import re
+import select
+import struct
+import time
+
+# Framing modes for the socket protocol:
+#   'json'    - back-to-back JSON objects with no delimiter (what the BizHawk script sends)
+#   'newline' - one JSON object per line
+#   'length'  - 4-byte big-endian length prefix followed by the JSON payload
+FRAMINGS = ('json', 'newline', 'length')
+LENGTH_PREFIX = struct.Struct('>I')
+
+# A partial message larger than this is treated as garbage and discarded
+MAX_MESSAGE_BYTES = 1 << 20
+
+# Top-level keys of a game state message (what GameState reads)
+STATE_KEYS = frozenset(('p1', 'p2', 'timer', 'result', 'round_started', 'round_over'))
+
+_STRUCTURE = re.compile(r'[{}"]')
+_STRING_END = re.compile(r'(?<!\\)(?:\\\\)*"')
+
+def _object_end(text, pos):
+    """Index just past the object starting at text[pos] ('{'), or -1 if it isn't closed yet"""
+    depth = 0
+    while True:
+        match = _STRUCTURE.search(text, pos)
+        if match is None:
+            return -1
+        char = match.group()
+        if char == '"':
+            string_end = _STRING_END.search(text, match.end())
+            if string_end is None:
+                return -1
+            pos = string_end.end()
+            continue
+        depth += 1 if char == '{' else -1
+        pos = match.end()
+        if depth == 0:
+            return pos
+
+class FrameDecoder:
+    """Turn a stream of received bytes into complete JSON messages.
+
+    Bytes are appended to one persistent buffer, so messages split across
+    several recv calls or several messages arriving in one recv are both
+    handled. The decoder doesn't do any I/O itself.
+
+    Only JSON objects that have all of required_keys are returned; anything
+    else counts as a decode error. By default those are the game state keys.
+    """
+
+    def __init__(self, framing='json', required_keys=STATE_KEYS):
+        if framing not in FRAMINGS:
+            raise ValueError(f"Unknown framing: {framing}")
+        self.framing = framing
+        self.required_keys = frozenset(required_keys)
+        self.buffer = bytearray()
+        self.decode_errors = 0
+        self._json = json.JSONDecoder()
+
+    def feed(self, data):
+        """Append received bytes to the buffer"""
+        self.buffer += data
+
+    def _split(self):
+        """Remove every complete raw message from the buffer ('newline' and 'length' framing)"""
+        buffer = self.buffer
+        payloads = []
+        pos = 0
+        if self.framing == 'newline':
+            while True:
+                end = buffer.find(b'\n', pos)
+                if end < 0:
+                    break
+                if end > pos:
+                    payloads.append(bytes(buffer[pos:end]))
+                pos = end + 1
+        else:
+            while len(buffer) - pos >= LENGTH_PREFIX.size:
+                (size,) = LENGTH_PREFIX.unpack_from(buffer, pos)
+                if len(buffer) - pos - LENGTH_PREFIX.size < size:
+                    break
+                start = pos + LENGTH_PREFIX.size
+                payloads.append(bytes(buffer[start:start + size]))
+                pos = start + size
+        del buffer[:pos]
+        return payloads
+
+    def _parse_concatenated(self):
+        """Remove and parse every complete JSON object from the buffer ('json' framing)"""
+        text = self.buffer.decode('utf-8', errors='replace')
+        messages = []
+        pos = 0
+        while True:
+            # Skip whitespace between objects
+            while pos < len(text) and text[pos] in ' \t\r\n':
+                pos += 1
+            if pos >= len(text):
+                break
+            if text[pos] != '{':
+                # Not the start of a message: resynchronise on the next object
+                self.decode_errors += 1
+                pos = text.find('{', pos)
+                if pos < 0:
+                    pos = len(text)
+                continue
+            try:
+                message, pos = self._json.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                # Only check whether the object is merely incomplete on the (rare) error path
+                end = _object_end(text, pos)
+                if end < 0:
+                    # Incomplete message, wait for more bytes
+                    break
+                # Corrupt message: drop the whole object
+                self.decode_errors += 1
+                pos = end
+                continue
+            if not self._is_message(message):
+                # Resynchronising can land on a nested object (e.g. a player); drop it and keep going
+                self.decode_errors += 1
+                continue
+            messages.append(message)
+        del self.buffer[:len(text[:pos].encode('utf-8'))]
+        self._check_size()
+        return messages
+
+    def _is_message(self, message):
+        return isinstance(message, dict) and self.required_keys <= message.keys()
+
+    def _check_size(self):
+        if len(self.buffer) > MAX_MESSAGE_BYTES:
+            self.decode_errors += 1
+            self.buffer.clear()
+
+    def _loads(self, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            self.decode_errors += 1
+            return None
+        if not self._is_message(message):
+            self.decode_errors += 1
+            return None
+        return message
+
+    def pop_all(self):
+        """Remove and return every complete message in the buffer (oldest first)"""
+        if self.framing == 'json':
+            return self._parse_concatenated()
+        messages = [self._loads(payload) for payload in self._split()]
+        self._check_size()
+        return [message for message in messages if message is not None]
+
+    def pop_latest(self):
+        """Remove every complete message and return (newest message or None, number of older messages skipped)"""
+        if self.framing == 'json':
+            messages = self._parse_concatenated()
+            if not messages:
+                return None, 0
+            return messages[-1], len(messages) - 1
+
+        # Only the newest payload needs to be parsed
+        payloads = self._split()
+        self._check_size()
+        while payloads:
+            message = self._loads(payloads.pop())
+            if message is not None:
+                return message, len(payloads)
+        return None, 0
+
+class FrameReader:
+    """Read framed JSON messages from a socket using a reusable receive buffer"""
+
+    def __init__(self, sock, framing='json', recv_size=65536, recorder=None, required_keys=STATE_KEYS):
+        self.sock = sock
+        self.decoder = FrameDecoder(framing, required_keys)
+        # Gets every received chunk as it arrived (see replay.SessionRecorder)
+        self.recorder = recorder
+        self._recv_buffer = bytearray(recv_size)
+        self._recv_view = memoryview(self._recv_buffer)
+        self.messages_received = 0
+        self.messages_skipped = 0
+        # Seconds the last read spent blocked waiting for data
+        self.last_wait = 0.0
+
+    def _fill(self):
+        """Receive once into the decoder; False when the peer has closed the connection"""
+        n = self.sock.recv_into(self._recv_buffer)
+        if n == 0:
+            return False
+        self.decoder.feed(self._recv_view[:n])
+        if self.recorder is not None:
+            self.recorder.write(self._recv_view[:n])
+        return True
+
+    def _wait_fill(self):
+        start = time.perf_counter()
+        received = self._fill()
+        self.last_wait += time.perf_counter() - start
+        return received
+
+    def _drain(self):
+        """Pull in everything already waiting in the socket without blocking"""
+        while select.select([self.sock], [], [], 0)[0]:
+            if not self._fill():
+                return
+
+    def read_latest(self, drain=False):
+        """Block until at least one message is complete and return the newest one.
+
+        Older messages that arrived in the same burst are dropped (the bot only
+        acts on the newest game state). With drain=True, bytes already queued in
+        the socket are read first, so states that piled up while the caller was
+        busy are skipped too. Returns None when the connection closes.
+        """
+        self.last_wait = 0.0
+        if drain:
+            self._drain()
+        while True:
+            message, skipped = self.decoder.pop_latest()
+            if message is not None:
+                self.messages_received += skipped + 1
+                self.messages_skipped += skipped
+                return message
+            if not self._wait_fill():
+                return None
+
+    def read_all(self):
+        """Block until at least one message is complete and return all of them (None on close)"""
+        self.last_wait = 0.0
+        while True:
+            messages = self.decoder.pop_all()
+            if messages:
+                self.messages_received += len(messages)
+                return messages
+            if not self._wait_fill():
+                return None
+
+def encode_message(payload, framing='json'):
+    """Frame an encoded JSON payload (bytes) for sending"""
+    if framing == 'newline':
+        return payload + b'\n'
+    if framing == 'length':
+        return LENGTH_PREFIX.pack(len(payload)) + payload
+    return payload
@@ -0,0 +1,84 @@
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from inference import PRECISIONS
+from ml_model import GameMLP, MODEL_EXPORT
+
+def parity(engine, ml_model, X):
+    """Agreement of an engine with the scikit-learn model's predict_proba on raw features X"""
+    reference = ml_model.model.predict_proba(ml_model.scale_features(X))
+    proba = engine.forward_batch(X)
+    return {
+        'top1_agreement': float(np.mean(proba.argmax(axis=1) == reference.argmax(axis=1))),
+        'max_abs_diff': float(np.abs(proba - reference).max()),
+    }
+
+def frame_latency(engine, X):
+    """p50/p99 microseconds of a single-frame forward pass over the rows of X"""
+    x = engine._x
+    times = np.empty(len(X))
+    for i, row in enumerate(X):
+        start = time.perf_counter()
+        x[:] = row
+        engine.forward(x)
+        times[i] = time.perf_counter() - start
+    return np.percentile(times * 1e6, [50, 99])
+
+def compare_precisions(ml_model, X, precisions=PRECISIONS, export_dir=None):
+    """Parity, latency and size of ml_model's engine in each precision; returns one dict per precision"""
+    if ml_model.engine is None:
+        ml_model.compile()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for precision in precisions:
+            engine = ml_model.engine.with_precision(precision)
+            path = os.path.join(export_dir or tmp, f"game_model_{precision}.npz")
+            engine.save(path)
+            p50, p99 = frame_latency(engine, X[:2000])
+            start = time.perf_counter()
+            engine.forward_batch(X)
+            batch_time = time.perf_counter() - start
+            results.append(dict(parity(engine, ml_model, X), precision=precision, path=path,
+                                p50_us=float(p50), p99_us=float(p99), batch_rows_per_s=len(X) / batch_time,
+                                parameter_bytes=engine.parameter_bytes(), file_bytes=os.path.getsize(path)))
+    return results
+
+def print_comparison(results):
+    print(f"{'precision':9s} {'top-1 agree':>11s} {'max |dp|':>9s} {'p50':>8s} {'p99':>8s} "
+          f"{'batch rows/s':>12s} {'params':>8s} {'file':>8s}")
+    for r in results:
+        print(f"{r['precision']:9s} {r['top1_agreement']:11.4%} {r['max_abs_diff']:9.2e} {r['p50_us']:6.1f}us "
+              f"{r['p99_us']:6.1f}us {r['batch_rows_per_s']:12.0f} {r['parameter_bytes'] / 1024:6.0f}KB "
+              f"{r['file_bytes'] / 1024:6.0f}KB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the trained model in lower precision and check it against scikit-learn")
+    parser.add_argument('data', nargs='?', default='training_data/training_data.csv',
+                        help="Training data; the parity check runs on its last rows")
+    parser.add_argument('--check-fraction', type=float, default=0.2,
+                        help="Fraction of rows (from the end) to check on. These are usually rows the model "
+                             "was trained on, which is fine for parity: it compares engines, not accuracy")
+    parser.add_argument('--export-dir', default='.', help="Where to write game_model_<precision>.npz")
+    parser.add_argument('--install', choices=PRECISIONS, default=None,
+                        help=f"Also write this precision as {MODEL_EXPORT}, the export the bot loads")
+    args = parser.parse_args()
+
+    from feature_cache import FeatureCache
+    ml_model = GameMLP()
+    # Parity is measured against the full scikit-learn model
+    if not ml_model.load_model(compact=False):
+        raise SystemExit("No trained model found. Train one with python ml_model.py first.")
+    X, _, command_mapping, _ = FeatureCache(args.data).load()
+    if command_mapping != ml_model.command_mapping:
+        raise SystemExit(f"{args.data} has different commands than the trained model; retrain first.")
+    X = np.asarray(X[-max(1, int(len(X) * args.check_fraction)):])
+    print(f"Checking on the last {len(X)} rows of {args.data}")
+    print_comparison(compare_precisions(ml_model, X, export_dir=args.export_dir))
+    if args.install:
+        ml_model.export_model(precision=args.install)
+        print(f"Wrote {args.install} model to {MODEL_EXPORT}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import atexit
+import gzip
+import hashlib
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from game_state import GameState
+from protocol import FRAMINGS, FrameDecoder
+
+# Log layout: magic, version and framing name, then one record per received chunk:
+# seconds since recording started (float64), chunk length (uint32), the raw bytes
+LOG_MAGIC = b'SFREC'
+LOG_VERSION = 1
+LOG_HEADER = struct.Struct('<5sB8s')
+RECORD_HEADER = struct.Struct('<dI')
+
+def _open_log(path, mode):
+    # .gz logs are compressed (game states compress very well), others are plain
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, compresslevel=1)
+    return open(path, mode)
+
+class SessionRecorder:
+    """Record the raw byte stream received from the emulator, with timestamps.
+
+    Set as FrameReader.recorder (controller.py --record PATH) to capture a
+    session exactly as it arrived, framing and TCP chunking included. Writes
+    go through a buffered file; close() (also registered with atexit) flushes.
+    """
+
+    def __init__(self, path, framing='json'):
+        if framing not in FRAMINGS:
+            raise ValueError(f"Unknown framing: {framing}")
+        self.path = path
+        self.framing = framing
+        self.chunks = 0
+        self.bytes_recorded = 0
+        self._file = _open_log(path, 'wb')
+        self._file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, framing.encode()))
+        self._start = time.perf_counter()
+        atexit.register(self.close)
+
+    def write(self, chunk):
+        """Append one received chunk"""
+        self._file.write(RECORD_HEADER.pack(time.perf_counter() - self._start, len(chunk)))
+        self._file.write(chunk)
+        self.chunks += 1
+        self.bytes_recorded += len(chunk)
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        atexit.unregister(self.close)
+
+def read_log(path):
+    """Framing and [(seconds since start, chunk bytes)] of a recorded session"""
+    with _open_log(path, 'rb') as f:
+        data = f.read()
+    magic, version, framing = LOG_HEADER.unpack_from(data)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError(f"{path} is not a session log")
+    records = []
+    pos = LOG_HEADER.size
+    while pos + RECORD_HEADER.size <= len(data):
+        timestamp, size = RECORD_HEADER.unpack_from(data, pos)
+        pos += RECORD_HEADER.size
+        records.append((timestamp, data[pos:pos + size]))
+        pos += size
+    return framing.rstrip(b'\0').decode(), records
+
+def shard_bounds(framing, records, n_shards):
+    """Split records into up to n_shards contiguous ranges that start on a message boundary"""
+    # Chunks after which the decoder holds no partial message are safe places to cut
+    decoder = FrameDecoder(framing)
+    clean = []
+    for i, (_, chunk) in enumerate(records):
+        decoder.feed(chunk)
+        decoder.pop_all()
+        if not decoder.buffer:
+            clean.append(i + 1)
+    bounds = [0]
+    for k in range(1, n_shards):
+        target = len(records) * k // n_shards
+        cut = next((i for i in clean if i >= target), len(records))
+        if cut > bounds[-1] and cut < len(records):
+            bounds.append(cut)
+    bounds.append(len(records))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def replay_records(framing, records, bot, latest=False, speed=None):
+    """Run recorded chunks through GameState -> Bot.fight -> Command; returns the encoded commands.
+
+    By default every recorded state gets a decision. latest=True answers only
+    the newest state of each chunk, like the live loop does. speed=None runs as
+    fast as possible; otherwise chunks are delivered at speed times the
+    recorded rate.
+    """
+    decoder = FrameDecoder(framing)
+    decisions = []
+    start = time.perf_counter()
+    for timestamp, chunk in records:
+        if speed:
+            delay = timestamp / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        decoder.feed(chunk)
+        if latest:
+            message, _ = decoder.pop_latest()
+            messages = [message] if message is not None else []
+        else:
+            messages = decoder.pop_all()
+        for message in messages:
+            decisions.append(bot.fight(GameState(message), "1").to_bytes())
+    return decisions
+
+def load_replay_model(model_dir='.', registry_dir=None, version=None):
+    """The model to replay with: a registry version (default: current) or the files in model_dir"""
+    if registry_dir is not None:
+        from model_registry import ModelRegistry
+        ml_model = ModelRegistry(registry_dir).load(version)
+    else:
+        from ml_model import GameMLP
+        ml_model = GameMLP()
+        if not ml_model.load_model(model_dir=model_dir):
+            ml_model = None
+    if ml_model is None:
+        raise SystemExit("No trained model found to replay with.")
+    return ml_model
+
+def _replay_shard(path, start, stop, model_dir, registry_dir, version, latest):
+    """Replay records[start:stop] of a log with a fresh Bot (runs in a worker process)"""
+    from bot import Bot
+    framing, records = read_log(path)
+    bot = Bot(ml_model=load_replay_model(model_dir, registry_dir, version))
+    begin = time.perf_counter()
+    decisions = replay_records(framing, records[start:stop], bot, latest)
+    return decisions, time.perf_counter() - begin
+
+def replay_sharded(paths, workers, model_dir='.', registry_dir=None, version=None, latest=False):
+    """Replay logs across a process pool; returns (decisions in log order, seconds of work per shard).
+
+    Every log is a unit of work; a log is also cut into contiguous pieces on
+    message boundaries when there are more workers than logs. Each piece
+    starts with a fresh Bot, so the first few decisions of a piece can differ
+    from a single-process replay (the command history starts empty).
+    """
+    tasks = []
+    per_log = max(1, workers // len(paths))
+    for path in paths:
+        framing, records = read_log(path)
+        for start, stop in shard_bounds(framing, records, per_log):
+            tasks.append((path, start, stop))
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_replay_shard, path, start, stop, model_dir, registry_dir, version, latest)
+                   for path, start, stop in tasks]
+        results = [future.result() for future in futures]
+    decisions = [decision for shard, _ in results for decision in shard]
+    return decisions, [seconds for _, seconds in results]
+
+def decisions_digest(decisions):
+    """SHA-256 over a replay's commands, for comparing model versions at a glance"""
+    digest = hashlib.sha256()
+    for decision in decisions:
+        digest.update(decision)
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through the bot without an emulator")
+    parser.add_argument('logs', nargs='+', help="Session logs recorded with controller.py --record")
+    parser.add_argument('--workers', type=int, default=1, help="Replay across this many processes")
+    parser.add_argument('--model-dir', default='.')
+    parser.add_argument('--registry', default=None, help="Replay with a model from this registry")
+    parser.add_argument('--version', default=None, help="Registry version (default: current)")
+    parser.add_argument('--latest', action='store_true',
+                        help="Answer only the newest state of each received chunk, like the live loop")
+    parser.add_argument('--speed', type=float, default=None,
+                        help="Deliver chunks at this multiple of the recorded rate (default: as fast as possible)")
+    parser.add_argument('--decisions', default=None, help="Write the commands, one per line, to this file")
+    parser.add_argument('--against', default=None,
+                        help="Report how many decisions match a file written with --decisions")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        if args.speed:
+            parser.error("--speed needs a single worker")
+        decisions, shard_seconds = replay_sharded(args.logs, args.workers, args.model_dir,
+                                                  args.registry, args.version, args.latest)
+        work = sum(shard_seconds)
+    else:
+        from bot import Bot
+        bot = Bot(ml_model=load_replay_model(args.model_dir, args.registry, args.version))
+        decisions = []
+        work = 0.0
+        for path in args.logs:
+            framing, records = read_log(path)
+            begin = time.perf_counter()
+            decisions += replay_records(framing, records, bot, args.latest, args.speed)
+            work += time.perf_counter() - begin
+    elapsed = time.perf_counter() - start
+
+    print(f"Replayed {len(decisions)} decisions in {elapsed:.2f}s ({len(decisions) / elapsed:.0f} decisions/s "
+          f"wall clock, {len(decisions) / work:.0f}/s per worker excluding startup)")
+    print(f"Decision digest: {decisions_digest(decisions)}")
+    if args.decisions:
+        with open(args.decisions, 'wb') as f:
+            f.writelines(decision + b'\n' for decision in decisions)
+    if args.against:
+        with open(args.against, 'rb') as f:
+            expected = [line.rstrip(b'\n') for line in f]
+        matches = sum(a == b for a, b in zip(decisions, expected))
+        print(f"Matching decisions: {matches} of {max(len(decisions), len(expected))} "
+              f"({matches / max(len(decisions), len(expected), 1):.1%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+
+# Stages of one game loop iteration, in order
+RECV = 0
+PARSE = 1
+PREDICT = 2
+COLLECT = 3
+SEND = 4
+STAGES = ('recv', 'parse', 'predict', 'collect', 'send')
+
+# The SNES runs at ~60 frames per second
+DEFAULT_FRAME_BUDGET = 1.0 / 60
+
+class FrameScheduler:
+    """Pace the game loop and time each stage of every frame.
+
+    Without a tick rate the loop is paced by the emulator: it blocks until the
+    next game state arrives and answers immediately. With a tick rate it answers
+    at most tick_rate times per second and sleeps off the rest of each tick;
+    states that arrive in between are skipped as stale by the reader.
+
+    Time the loop spends blocked waiting for the emulator is idle time, not
+    work, so it is excluded from the recv stage and from the frame budget. A
+    frame whose work takes longer than the budget is counted as an overrun.
+    """
+
+    def __init__(self, tick_rate=None, frame_budget=None, capacity=4096):
+        self.tick_rate = tick_rate
+        self.period = 1.0 / tick_rate if tick_rate else None
+        self.frame_budget = frame_budget or self.period or DEFAULT_FRAME_BUDGET
+        self.capacity = capacity
+        self.frames = 0
+        self.overruns = 0
+        self.worst_frame = 0.0
+        self.idle_time = 0.0
+        self.missed_ticks = 0
+
+        # Per-frame stage times, preallocated so timing a frame never allocates an array
+        self._times = np.zeros((capacity, len(STAGES)))
+        self._current = [0.0] * len(STAGES)
+        self._mark = 0.0
+        self._next_tick = None
+        self._started = None
+
+    def begin_frame(self):
+        """Start timing a frame (call before receiving)"""
+        now = time.perf_counter()
+        if self._started is None:
+            self._started = now
+        self._mark = now
+        current = self._current
+        for i in range(len(current)):
+            current[i] = 0.0
+
+    def mark(self, stage, idle=0.0):
+        """Charge the time since the previous mark to stage, minus idle seconds spent waiting"""
+        now = time.perf_counter()
+        self._current[stage] += now - self._mark - idle
+        self.idle_time += idle
+        self._mark = now
+
+    def end_frame(self):
+        """Finish the frame: record its stage times, check the budget and wait for the next tick"""
+        work = sum(self._current)
+        self._times[self.frames % self.capacity] = self._current
+        self.frames += 1
+        if work > self.frame_budget:
+            self.overruns += 1
+        if work > self.worst_frame:
+            self.worst_frame = work
+
+        if self.period is None:
+            return
+        now = time.perf_counter()
+        if self._next_tick is None:
+            self._next_tick = now
+        self._next_tick += self.period
+        delay = self._next_tick - now
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Behind schedule: start a new tick now instead of bursting to catch up
+            self.missed_ticks += int(-delay // self.period) + 1
+            self._next_tick = now
+
+    def stage_times(self):
+        """Stage times (seconds) of the most recent frames, one row per frame"""
+        n = min(self.frames, self.capacity)
+        return self._times[:n]
+
+    def summary(self):
+        """Frame counts, overruns and p50/p95/p99/max per stage (microseconds)"""
+        times = self.stage_times() * 1e6
+        elapsed = time.perf_counter() - self._started if self._started is not None else 0.0
+        stages = {}
+        if len(times):
+            for name, column in zip(STAGES + ('total',), list(times.T) + [times.sum(axis=1)]):
+                p50, p95, p99 = np.percentile(column, [50, 95, 99])
+                stages[name] = {'p50_us': p50, 'p95_us': p95, 'p99_us': p99, 'max_us': column.max()}
+        return {
+            'frames': self.frames,
+            'fps': self.frames / elapsed if elapsed else 0.0,
+            'frame_budget_us': self.frame_budget * 1e6,
+            'overruns': self.overruns,
+            'worst_frame_us': self.worst_frame * 1e6,
+            'missed_ticks': self.missed_ticks,
+            'idle_fraction': self.idle_time / elapsed if elapsed else 0.0,
+            'stages': stages,
+        }
+
+    def report(self):
+        """Summary formatted for the console"""
+        summary = self.summary()
+        lines = [f"Frames: {summary['frames']} ({summary['fps']:.0f} fps), "
+                 f"overruns: {summary['overruns']} over {summary['frame_budget_us']:.0f}us "
+                 f"(worst {summary['worst_frame_us']:.0f}us), missed ticks: {summary['missed_ticks']}, "
+                 f"idle {summary['idle_fraction']:.0%}"]
+        for name, stats in summary['stages'].items():
+            lines.append(f"  {name:8s} p50 {stats['p50_us']:8.1f}us  p95 {stats['p95_us']:8.1f}us  "
+                         f"p99 {stats['p99_us']:8.1f}us  max {stats['max_us']:8.1f}us")
+        return "\n".join(lines)
@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import os
+import signal
+import threading
+from game_state import GameState
+from bot import Bot
+from ml_model import GameMLP
+from data_collector import GameDataCollector
+from protocol import FRAMINGS, FrameDecoder, encode_message
+from batching import InferenceBatcher
+
+class Session:
+    """State of one emulator connection: its own Bot (command history) and collector"""
+
+    def __init__(self, session_id, bot, collector):
+        self.session_id = session_id
+        self.bot = bot
+        self.collector = collector
+        self.decoder = None
+        self.frames = 0
+        self.skipped = 0
+
+class BotServer:
+    """Serve many emulator connections from one process with asyncio.
+
+    Every connection gets its own Bot, so command history and queued command
+    steps are per game, and its own GameDataCollector writing to
+    <data_dir>/session_<n>.csv (or .frames). All sessions share one loaded
+    model; that is safe because predictions run on the event loop thread one
+    at a time. With batch_window set, predictions from all sessions go through
+    an InferenceBatcher instead of one forward pass per frame. Either way a
+    frame is predicted with its session's Bot.ml_model, so swap_model (on the
+    server or on one session's bot) takes effect in both modes.
+    """
+
+    def __init__(self, ml_model, host='127.0.0.1', port=9999, framing='json',
+                 data_dir='training_data', storage='csv', collect=True,
+                 batch_window=None, max_batch=32):
+        self.ml_model = ml_model
+        self.batcher = None
+        if batch_window is not None:
+            self.batcher = InferenceBatcher(ml_model, batch_window, max_batch)
+        self.host = host
+        self.port = port
+        self.framing = framing
+        self.data_dir = data_dir
+        self.storage = storage
+        self.collect = collect
+        self.sessions = {}
+        self.frames = 0
+        self._next_session_id = 0
+        self._server = None
+        self._loop = None
+        self._stopped = None
+        self._thread = None
+
+    def swap_model(self, ml_model):
+        """Switch every session, and sessions opened from now on, to ml_model (thread-safe)"""
+        self.ml_model = ml_model
+        for session in list(self.sessions.values()):
+            session.bot.swap_model(ml_model)
+
+    def _open_session(self):
+        session_id = self._next_session_id
+        self._next_session_id += 1
+        collector = None
+        if self.collect:
+            # Rows are written by a background thread so disk stalls don't block the event loop
+            collector = GameDataCollector(csv_file=f"session_{session_id}.csv", data_dir=self.data_dir,
+                                          background=True, storage=self.storage)
+        session = Session(session_id, Bot(ml_model=self.ml_model), collector)
+        session.decoder = FrameDecoder(self.framing)
+        self.sessions[session_id] = session
+        return session
+
+    def handle_message(self, session, message):
+        """Run one game state through the session's bot and return the encoded reply"""
+        game_state = GameState(message)
+        command = session.bot.fight(game_state, "1")
+        return self._finish_frame(session, game_state, command)
+
+    async def handle_message_batched(self, session, message):
+        """Like handle_message, but the prediction is batched with other sessions' frames"""
+        game_state = GameState(message)
+        bot = session.bot
+        # The same model switch Bot.fight does, so swaps apply in batched mode too
+        bot.apply_pending_model()
+        predicted_command = await self.batcher.predict(game_state, bot.command_history(), bot.ml_model)
+        command = bot.apply_prediction(game_state, predicted_command)
+        return self._finish_frame(session, game_state, command)
+
+    def _finish_frame(self, session, game_state, command):
+        if game_state.has_round_started and not game_state.is_round_over:
+            if session.collector is not None:
+                session.collector.collect_frame_data(game_state, session.bot._get_current_command())
+        session.frames += 1
+        self.frames += 1
+        return encode_message(command.to_bytes(), self.framing)
+
+    async def _handle_connection(self, reader, writer):
+        session = self._open_session()
+        print(f"Session {session.session_id} connected ({len(self.sessions)} active)")
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                session.decoder.feed(data)
+                # Answer only the newest state of this read; older ones are stale
+                message, skipped = session.decoder.pop_latest()
+                session.skipped += skipped
+                if message is None:
+                    continue
+                if self.batcher is None:
+                    reply = self.handle_message(session, message)
+                else:
+                    reply = await self.handle_message_batched(session, message)
+                writer.write(reply)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.sessions[session.session_id]
+            writer.close()
+            if session.collector is not None:
+                # Joining the writer thread blocks, so don't do it on the event loop
+                await asyncio.get_running_loop().run_in_executor(None, session.collector.close)
+            print(f"Session {session.session_id} closed: {session.frames} frames, "
+                  f"{session.skipped} stale states skipped, {session.decoder.decode_errors} decode errors")
+
+    async def start(self):
+        """Start listening (port 0 picks a free port, stored in self.port)"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+
+    async def serve(self):
+        """Serve until stop() is called"""
+        if self._server is None:
+            await self.start()
+        print(f"Serving on {self.host}:{self.port}...")
+        async with self._server:
+            await self._stopped.wait()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def stop(self):
+        """Stop serving (safe to call from any thread or a signal handler)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def start_in_thread(self):
+        """Run the server on a background thread; returns once it is listening"""
+        ready = threading.Event()
+
+        async def run():
+            await self.start()
+            ready.set()
+            await self.serve()
+
+        self._thread = threading.Thread(target=asyncio.run, args=(run(),), name="bot-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.port
+
+    def join(self):
+        """Wait for a server started with start_in_thread to stop"""
+        if self._thread is not None:
+            self._thread.join()
+
+def load_shared_model():
+    """Load the trained model once for all sessions"""
+    ml_model = GameMLP()
+    if not ml_model.load_model():
+        raise SystemExit("No trained model found. Train one with python ml_model.py first.")
+    return ml_model
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many BizHawk instances from one bot process")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--framing', choices=FRAMINGS, default='json')
+    parser.add_argument('--data-dir', default='training_data')
+    parser.add_argument('--storage', choices=['csv', 'columnar'], default='csv')
+    parser.add_argument('--no-collect', action='store_true', help="Don't record gameplay data")
+    parser.add_argument('--batch-window', type=float, default=None,
+                        help="Batch predictions across sessions, waiting up to this many seconds (e.g. 0.001)")
+    parser.add_argument('--max-batch', type=int, default=32, help="Largest prediction batch")
+    args = parser.parse_args()
+
+    server = BotServer(load_shared_model(), args.host, args.port, args.framing,
+                       args.data_dir, args.storage, collect=not args.no_collect,
+                       batch_window=args.batch_window, max_batch=args.max_batch)
+
+    async def run():
+        await server.start()
+        if os.name == 'posix':
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                asyncio.get_running_loop().add_signal_handler(signum, server.stop)
+        await server.serve()
+
+    asyncio.run(run())
+    print(f"Served {server.frames} frames")
+    if server.batcher is not None:
+        print(f"Prediction batches: {server.batcher.stats()}")
+
+if __name__ == "__main__":
+    main()
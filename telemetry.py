@@ -0,0 +1,161 @@
+import bisect
+import os
+import threading
+import time
+import numpy as np
+
+# Telemetry levels: OFF records nothing, COUNTERS keeps counters and the
+# inference time histogram, TRACE also writes one record per prediction
+# (top-k probabilities, entropy) into the ring buffer
+OFF = 0
+COUNTERS = 1
+TRACE = 2
+LEVELS = {'off': OFF, 'counters': COUNTERS, 'trace': TRACE}
+
+# Upper edges (microseconds) of the inference time histogram buckets
+HISTOGRAM_EDGES_US = [10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 16667]
+
+def level_from_env(default='off'):
+    """Read the telemetry level from the BOT_TELEMETRY environment variable"""
+    return LEVELS.get(os.environ.get('BOT_TELEMETRY', default).lower(), OFF)
+
+class PredictionTelemetry:
+    """Counters, inference time histogram and a ring buffer of recent predictions"""
+
+    def __init__(self, level=None, capacity=1024, top_k=3):
+        self.level = level_from_env() if level is None else level
+        self.capacity = capacity
+        self.top_k = top_k
+        self.counters = {}
+        self.histogram = [0] * (len(HISTOGRAM_EDGES_US) + 1)
+        self.commands = []
+
+        # Ring buffer columns, preallocated so recording never allocates
+        self._time = np.zeros(capacity)
+        self._inference_us = np.zeros(capacity)
+        self._entropy = np.zeros(capacity)
+        self._distance = np.zeros(capacity)
+        self._relative_x = np.zeros(capacity)
+        self._predicted = np.zeros(capacity, dtype=np.int32)
+        self._top_idx = np.zeros((capacity, top_k), dtype=np.int32)
+        self._top_prob = np.zeros((capacity, top_k))
+        # Entries of _top_idx/_top_prob in use per slot (fewer than top_k when there are fewer commands)
+        self._top_n = np.zeros(capacity, dtype=np.int32)
+        # The commands list the slot's indices refer to (the model may be swapped before a drain)
+        self._slot_commands = [None] * capacity
+        self._written = 0
+        self._drained = 0
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._stop = threading.Event()
+
+    def count(self, name, amount=1):
+        """Increment a named counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, inference_time, probabilities, predicted_idx, game_state):
+        """Record one prediction (call only when level is not OFF)"""
+        inference_us = inference_time * 1e6
+        self.count('predictions')
+        self.histogram[bisect.bisect_left(HISTOGRAM_EDGES_US, inference_us)] += 1
+        if self.level < TRACE:
+            return
+
+        k = min(self.top_k, len(probabilities))
+        top = np.argpartition(probabilities, -k)[-k:]
+        top = top[np.argsort(probabilities[top])[::-1]]
+        nonzero = probabilities[probabilities > 0]
+        entropy = float(-(nonzero * np.log(nonzero)).sum())
+        relative_x = game_state.player2.x_coord - game_state.player1.x_coord
+
+        with self._lock:
+            slot = self._written % self.capacity
+            self._time[slot] = time.time()
+            self._inference_us[slot] = inference_us
+            self._entropy[slot] = entropy
+            self._distance[slot] = abs(relative_x)
+            self._relative_x[slot] = relative_x
+            self._predicted[slot] = predicted_idx
+            self._top_idx[slot, :k] = top
+            self._top_prob[slot, :k] = probabilities[top]
+            self._top_n[slot] = k
+            self._slot_commands[slot] = self.commands
+            self._written += 1
+
+    def _records(self, start, stop):
+        """Decode ring buffer slots [start, stop) into dicts"""
+        records = []
+        for n in range(max(start, stop - self.capacity, 0), stop):
+            slot = n % self.capacity
+            k = self._top_n[slot]
+            commands = self._slot_commands[slot]
+            records.append({
+                'time': float(self._time[slot]),
+                'inference_us': float(self._inference_us[slot]),
+                'entropy': float(self._entropy[slot]),
+                'distance': float(self._distance[slot]),
+                'relative_position': 'right' if self._relative_x[slot] > 0 else 'left',
+                'predicted': self._command(commands, self._predicted[slot]),
+                'top_k': [(self._command(commands, idx), float(prob))
+                          for idx, prob in zip(self._top_idx[slot, :k], self._top_prob[slot, :k])],
+            })
+        return records
+
+    @staticmethod
+    def _command(commands, idx):
+        return commands[idx] if idx < len(commands) else int(idx)
+
+    def sample(self, n=10):
+        """The n most recent prediction records"""
+        with self._lock:
+            return self._records(self._written - n, self._written)
+
+    def drain(self):
+        """Prediction records written since the last drain (oldest are lost if the buffer wrapped)"""
+        with self._lock:
+            records = self._records(self._drained, self._written)
+            self._drained = self._written
+        return records
+
+    def summary(self):
+        """Counters and histogram as a dict"""
+        labels = [f"<={edge}us" for edge in HISTOGRAM_EDGES_US] + [f">{HISTOGRAM_EDGES_US[-1]}us"]
+        return {
+            'counters': dict(self.counters),
+            'inference_time_histogram': dict(zip(labels, self.histogram)),
+        }
+
+    def start_flusher(self, sink=None, interval=1.0):
+        """Drain the ring buffer to sink(records) every interval seconds on a background thread"""
+        sink = sink or print_records
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                records = self.drain()
+                if records:
+                    sink(records)
+            records = self.drain()
+            if records:
+                sink(records)
+
+        self._flusher = threading.Thread(target=run, name="telemetry-flusher", daemon=True)
+        self._flusher.start()
+
+    def stop_flusher(self):
+        """Stop the background flusher after a final drain"""
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join()
+            self._flusher = None
+
+def print_records(records):
+    """Default sink: print records in the old prediction debug format"""
+    for record in records:
+        print("\n=== Model Prediction Debug ===")
+        print(f"Distance to opponent: {record['distance']:.0f}")
+        print(f"Relative position: {record['relative_position']}")
+        print(f"Inference time: {record['inference_us']:.1f}us, entropy: {record['entropy']:.3f}")
+        for command, prob in record['top_k']:
+            print(f"{command}: {prob:.4f}")
+        print(f"Predicted command: {record['predicted']}")
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from frame_store import FrameStore, FrameStoreWriter, convert_csv
+
+def test_convert_csv_keeps_float_columns(tmp_path):
+    df = pd.DataFrame({
+        'timer': [99, 98, 97, 96, 95],
+        'player1_y': [192, 192, 152.5, 160, 192],
+        'player1_x_velocity': [0.5, 1.5, -2.25, 0.1, 3.7],
+        'player2_health': [176, 170, np.nan, 150, 140],
+        'current_command': ['>', '<', '>', 'neutral', '>'],
+    })
+    csv_path = tmp_path / 'frames.csv'
+    df.to_csv(csv_path, index=False)
+    convert_csv(str(csv_path), str(tmp_path / 'frames.frames'), chunksize=2)
+
+    store = FrameStore(str(tmp_path / 'frames.frames'))
+    assert store.dtypes['timer'] == np.dtype('<i4')
+    assert store.dtypes['player1_y'] == np.dtype('<f8')
+    loaded = store.to_dataframe()
+    for name in ('timer', 'player1_y', 'player1_x_velocity', 'player2_health'):
+        np.testing.assert_array_equal(loaded[name].to_numpy(dtype=float), df[name].to_numpy(dtype=float))
+    assert list(loaded['current_command']) == list(df['current_command'])
+
+def test_writer_rejects_values_an_int_column_cannot_hold(tmp_path):
+    path = str(tmp_path / 'frames.frames')
+    writer = FrameStoreWriter(path, ['timer', 'player1_y'])
+    writer.append_columns({'timer': [99, 98], 'player1_y': [192.0, 190.0]})
+    with pytest.raises(ValueError):
+        writer.append_columns({'timer': [97, 96], 'player1_y': [152.5, 150.0]})
+    writer.write_row((95, None))
+    with pytest.raises(ValueError):
+        writer.flush()
+    writer.close()
+    # Nothing from the rejected batches reached the store
+    store = FrameStore(path)
+    assert store.n_rows == 2
+    assert list(store.column('player1_y')) == [192, 190]
@@ -0,0 +1,27 @@
+from benchmark import synthetic_training_frame
+from bot import Bot
+from ml_model import GameMLP
+from online_learning import OnlineTrainer
+
+def test_update_on_model_from_train(tmp_path, monkeypatch):
+    # train() saves the model files into the working directory
+    monkeypatch.chdir(tmp_path)
+    df = synthetic_training_frame(2000)
+    df.to_csv('frames.csv', index=False)
+    ml_model = GameMLP()
+    ml_model.model.set_params(max_iter=5, verbose=False)
+    assert ml_model.train('frames.csv')
+    # Fitted with early stopping, so best_loss_ is None
+    assert ml_model.model.best_loss_ is None
+
+    bot = Bot(ml_model=ml_model)
+    trainer = OnlineTrainer(bot, list(df.columns), update_every=10 ** 9)
+    try:
+        for row in df.itertuples(index=False):
+            trainer.on_frame(list(row))
+        assert trainer.update()
+    finally:
+        trainer.stop()
+    assert trainer.updates == 1
+    assert bot._pending_model is not None
+    assert bot._pending_model.model is not ml_model.model
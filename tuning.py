@@ -0,0 +1,187 @@
+import argparse
+import itertools
+import os
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from game_state import GameState
+from inference import CompiledMLP
+from ml_model import GameMLP, build_history_indices, build_numeric_block, default_classifier
+from frame_store import load_frames
+
+# Candidates searched by default: every combination of these MLPClassifier settings
+SEARCH_SPACE = {
+    'hidden_layer_sizes': [(32,), (64,), (64, 32), (128, 64, 32)],
+    'alpha': [1e-4, 1e-3],
+    'learning_rate_init': [1e-3, 3e-3],
+}
+
+# Read-only feature matrix (CSR) and labels, memory-mapped once per worker process
+_X = None
+_y = None
+
+def candidates(space):
+    """Every combination of a search space, as parameter dicts"""
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+def fold_indices(n_rows, folds, seed=0):
+    """(train, test) row indices for k-fold cross-validation over shuffled rows"""
+    order = np.random.default_rng(seed).permutation(n_rows)
+    parts = np.array_split(order, folds)
+    return [(np.concatenate(parts[:k] + parts[k + 1:]), parts[k]) for k in range(folds)]
+
+def _init_worker(x_paths, shape, y_path):
+    global _X, _y
+    # Every worker maps the same files, so the matrix is in memory once (page cache), not per process
+    arrays = [np.load(path, mmap_mode='r') for path in x_paths]
+    if len(arrays) == 1:
+        _X = arrays[0]
+    else:
+        from scipy import sparse
+        _X = sparse.csr_matrix(tuple(arrays), shape=shape, copy=False)
+    _y = np.load(y_path, mmap_mode='r')
+
+def _evaluate(params, folds, max_iter, seed):
+    """Cross-validate one candidate (runs in a worker); returns fold accuracies, fit seconds and the last model"""
+    scores = []
+    start = time.perf_counter()
+    model = None
+    for train, test in fold_indices(len(_y), folds, seed):
+        model = default_classifier(**params).set_params(max_iter=max_iter, verbose=False)
+        with warnings.catch_warnings():
+            # Candidates that stop at max_iter are still worth comparing
+            warnings.simplefilter('ignore')
+            model.fit(_X[train], _y[train])
+        scores.append(float(model.score(_X[test], _y[test])))
+    return scores, (time.perf_counter() - start) / folds, model
+
+def frame_latency(engine, states, prev_commands):
+    """p50/p99 microseconds of one single-frame prediction"""
+    times = np.empty(len(states))
+    for i, state in enumerate(states):
+        start = time.perf_counter()
+        engine.predict(state, prev_commands)
+        times[i] = time.perf_counter() - start
+    return np.percentile(times * 1e6, [50, 99])
+
+def pareto_front(results):
+    """Results no other result beats on both accuracy and p50 latency"""
+    return [r for r in results
+            if not any(o['accuracy'] >= r['accuracy'] and o['p50_us'] < r['p50_us'] or
+                       o['accuracy'] > r['accuracy'] and o['p50_us'] <= r['p50_us'] for o in results)]
+
+def search(data, space=None, folds=3, workers=None, max_iter=200, seed=0, latency_frames=2000, latency_rounds=3):
+    """Cross-validate every candidate in a process pool and time its inference.
+
+    The feature matrix is built and scaled once (GameMLP.training_matrix),
+    its arrays written to temporary .npy files and memory-mapped read-only by
+    every worker, so it isn't copied or pickled per candidate. The scaler is fitted on all rows before splitting,
+    which leaks a little information into the folds; it is the same for every
+    candidate, so the ranking isn't affected. Inference latency is timed in
+    this process after the search, one candidate at a time, so the numbers
+    aren't skewed by workers competing for the CPU.
+    """
+    df = load_frames(data)
+    command_mapping = {cmd: idx for idx, cmd in enumerate(sorted(set(df['current_command'])))}
+    ml_model = GameMLP()
+    ml_model.command_mapping = command_mapping
+    scaler = ml_model.scaler
+    numeric = build_numeric_block(df)
+    scaler.fit(numeric)
+    X = ml_model.training_matrix(numeric, build_history_indices(df, command_mapping))
+    y = df['current_command'].map(command_mapping).to_numpy()
+    del df
+    params_list = candidates(space or SEARCH_SPACE)
+    workers = workers or os.cpu_count()
+    print(f"{len(params_list)} candidates, {folds}-fold cross-validation on {X.shape[0]} rows x "
+          f"{X.shape[1]} features, {workers} workers")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # A sparse matrix is saved as its CSR arrays
+        parts = {'data': X.data, 'indices': X.indices, 'indptr': X.indptr} if hasattr(X, 'indptr') else {'X': X}
+        x_paths = [os.path.join(tmp, f'{name}.npy') for name in parts]
+        y_path = os.path.join(tmp, 'y.npy')
+        for path, array in zip(x_paths, parts.values()):
+            np.save(path, array)
+        np.save(y_path, y)
+        shape = X.shape
+        del X
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(x_paths, shape, y_path)) as pool:
+            start = time.perf_counter()
+            futures = [pool.submit(_evaluate, params, folds, max_iter, seed) for params in params_list]
+            evaluated = [future.result() for future in futures]
+            elapsed = time.perf_counter() - start
+    print(f"Search took {elapsed:.1f}s")
+
+    rng = np.random.default_rng(seed)
+    from fake_emulator import synthetic_state_dict
+    states = [GameState(synthetic_state_dict(rng)) for _ in range(latency_frames)]
+    prev_commands = list(command_mapping)[:3]
+    engines = [CompiledMLP(model, scaler, command_mapping) for _, _, model in evaluated]
+    # Candidates are timed in interleaved rounds and keep their best round, so a
+    # burst of background load doesn't land on one candidate only
+    latencies = np.full((len(engines), 2), np.inf)
+    for _ in range(latency_rounds):
+        for i, engine in enumerate(engines):
+            p50, p99 = frame_latency(engine, states, prev_commands)
+            if p50 < latencies[i, 0]:
+                latencies[i] = p50, p99
+
+    results = []
+    for params, (scores, fit_seconds, _), (p50, p99) in zip(params_list, evaluated, latencies):
+        results.append({
+            'params': params,
+            'accuracy': float(np.mean(scores)),
+            'accuracy_std': float(np.std(scores)),
+            'fit_seconds': fit_seconds,
+            'p50_us': float(p50),
+            'p99_us': float(p99),
+        })
+    return results
+
+def choose(results, min_accuracy):
+    """The fastest candidate (p50) whose accuracy is at least min_accuracy, else the most accurate"""
+    good = [r for r in results if r['accuracy'] >= min_accuracy]
+    if good:
+        return min(good, key=lambda r: r['p50_us'])
+    return max(results, key=lambda r: r['accuracy'])
+
+def print_results(results):
+    front = pareto_front(results)
+    names = [", ".join(f"{key}={value}" for key, value in r['params'].items()) for r in results]
+    width = max(len(name) for name in names)
+    print(f"{'candidate':{width}s} {'accuracy':>14s} {'fit':>7s} {'p50':>8s} {'p99':>8s}")
+    for name, r in sorted(zip(names, results), key=lambda item: item[1]['p50_us']):
+        marker = " *" if r in front else ""
+        print(f"{name:{width}s} {r['accuracy']:7.3f} ±{r['accuracy_std']:.3f} {r['fit_seconds']:6.1f}s "
+              f"{r['p50_us']:6.1f}us {r['p99_us']:6.1f}us{marker}")
+    print("* = Pareto front (no other candidate is both more accurate and faster)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Search GameMLP architectures for accuracy against inference latency")
+    parser.add_argument('data', nargs='?', default='training_data/training_data.csv',
+                        help="Training data (CSV file or frame store directory)")
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--max-iter', type=int, default=200, help="Epoch limit per fit")
+    parser.add_argument('--min-accuracy', type=float, default=None,
+                        help="Pick the fastest candidate at least this accurate (default: the most accurate)")
+    parser.add_argument('--save', action='store_true', help="Train the chosen candidate on all data and save it")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        raise SystemExit("No training data found!")
+    results = search(args.data, folds=args.folds, workers=args.workers, max_iter=args.max_iter)
+    print_results(results)
+    best = choose(results, args.min_accuracy if args.min_accuracy is not None else 1.1)
+    print(f"Chosen: {best['params']} (accuracy {best['accuracy']:.3f}, p50 {best['p50_us']:.1f}us)")
+    if args.save:
+        ml_model = GameMLP()
+        ml_model.model = default_classifier(**best['params'])
+        ml_model.train(args.data)
+
+if __name__ == "__main__":
+    main()